@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+ECHTABLE Benchmarks
+Storage, substitution, executor and cold-start timings as JSON
+
+    python3 benchmarks/bench.py --out before.json
+    python3 benchmarks/bench.py --sizes 1000 --compare before.json
+
+Each group runs in a fresh interpreter with HOME pointed at a temporary
+directory holding a synthetic library, so real data is never touched.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import itertools
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from library import generate, NOOP_COMMAND
+
+DEFAULT_SIZES = "1000,10000,100000"
+DEFAULT_CONCURRENCY = "1,2,4,8,16,32,64,128,256"
+
+# Per-benchmark time budget in seconds, and bounds on the number of calls
+DEFAULT_BUDGET = 0.5
+MIN_CALLS = 3
+MAX_CALLS = 100000
+
+# Cold-start runs per command
+STARTUP_RUNS = 5
+
+def summarize(samples):
+    """Timing statistics in microseconds for a list of durations"""
+    samples = sorted(samples)
+    count = len(samples)
+    return {
+        "calls": count,
+        "mean_us": round(sum(samples) / count * 1e6, 2),
+        "p50_us": round(samples[count // 2] * 1e6, 2),
+        "p95_us": round(samples[min(int(count * 0.95), count - 1)] * 1e6, 2),
+        "min_us": round(samples[0] * 1e6, 2)
+    }
+
+def measure(fn, args, budget):
+    """Call fn(*arg) cycling through args until the time budget is spent"""
+    args = itertools.cycle(args)
+    samples = []
+    deadline = time.perf_counter() + budget
+    while len(samples) < MIN_CALLS or (time.perf_counter() < deadline and len(samples) < MAX_CALLS):
+        arg = next(args)
+        start = time.perf_counter()
+        fn(*arg)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+def result(name, params, stats):
+    """One benchmark record"""
+    return dict({"name": name, "params": params}, **stats)
+
+def bench_library(size, budget):
+    """SlotManager lookups/creates and variable substitution on a generated library"""
+    from core.slots import SlotManager
+    
+    rng = random.Random(size)
+    slots = SlotManager()
+    ids = [(rng.randint(1, size),) for i in range(1000)]
+    names = [(f"slot_{slot_id}",) for (slot_id,) in ids]
+    commands = [(slots.get(slot_id)["command"],) for (slot_id,) in ids]
+    params = {"slots": size}
+    
+    results = [
+        result("slots.get", params, measure(slots.get, ids, budget)),
+        result("slots.find_by_name", params, measure(slots.find_by_name, names, budget)),
+        result("slots.list_all", params, measure(slots.list_all, [()], budget)),
+        result("variables.substitute", params, measure(slots.variables.substitute, commands, budget)),
+    ]
+    
+    # Last, since it grows the library
+    counter = itertools.count()
+    results.append(result(
+        "slots.create", params,
+        measure(lambda: slots.create(NOOP_COMMAND, f"bench_{next(counter)}"), [()], budget)
+    ))
+    return results
+
+def bench_executor(concurrency, commands, budget):
+    """Whole-load runs of no-op commands at one concurrency"""
+    from core.slots import SlotManager
+    from core.loads import LoadManager
+    from core.executor import RunContext
+    
+    slots, loads = SlotManager(), LoadManager()
+    with open(os.devnull, "w") as devnull:
+        def run():
+            context = RunContext(output=devnull, name="bench")
+            outcome = loads.execute_load("noop", slots, context=context, max_workers=concurrency)
+            if not outcome["success"]:
+                raise RuntimeError(outcome.get("error", "load failed"))
+        
+        stats = measure(run, [()], budget)
+    
+    stats["commands_per_sec"] = round(commands / (stats["mean_us"] / 1e6), 1)
+    return [result("loads.execute_load", {"concurrency": concurrency, "commands": commands}, stats)]
+
+def bench_startup(home, size):
+    """Wall time of fresh echt processes against the library"""
+    env = dict(os.environ, HOME=home)
+    echt = os.path.join(ROOT_DIR, "echt.py")
+    cases = [
+        ("echt --help", ["--help"]),
+        ("echt var get", ["var", "get", "var_0"]),
+        ("echt run", ["run", "noop_0"]),
+    ]
+    
+    results = []
+    for name, args in cases:
+        samples = []
+        for i in range(STARTUP_RUNS):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, echt] + args, env=env, stdout=subprocess.DEVNULL,
+                           stderr=subprocess.DEVNULL)
+            samples.append(time.perf_counter() - start)
+        results.append(result(f"startup.{name}", {"slots": size}, summarize(samples)))
+    return results
+
+def child(home, group, *args):
+    """Run one benchmark group in a fresh interpreter with HOME set to home"""
+    command = [sys.executable, os.path.abspath(__file__), "--child", group] + [str(arg) for arg in args]
+    process = subprocess.run(command, env=dict(os.environ, HOME=home), stdout=subprocess.PIPE)
+    if process.returncode != 0:
+        raise RuntimeError(f"Benchmark group failed: {group} {' '.join(map(str, args))}")
+    return json.loads(process.stdout)
+
+def library_home(slots, noop=0):
+    """Temporary HOME with a generated library"""
+    home = tempfile.mkdtemp(prefix="echtable-bench-")
+    generate(os.path.join(home, ".echtable"), slots, noop=noop)
+    return home
+
+def run_all(sizes, concurrency, commands, budget, groups):
+    """Run the selected groups; returns the result records"""
+    results = []
+    for size in sizes:
+        if not groups & {"storage", "startup"}:
+            break
+        home = library_home(size, noop=1)
+        try:
+            if "storage" in groups:
+                log(f"[*] Storage and substitution, {size} slots")
+                results.extend(child(home, "library", size, DEFAULT_BUDGET if budget is None else budget))
+            if "startup" in groups:
+                log(f"[*] Cold start, {size} slots")
+                results.extend(bench_startup(home, size))
+        finally:
+            shutil.rmtree(home, ignore_errors=True)
+    
+    if "executor" in groups:
+        home = library_home(0, noop=commands)
+        try:
+            for workers in concurrency:
+                log(f"[*] Executor, concurrency {workers}")
+                # The pool cap comes from config.json, so raise it to the concurrency under test
+                with open(os.path.join(home, ".echtable", "config.json"), "w") as f:
+                    json.dump({"max_workers": workers}, f)
+                results.extend(child(home, "executor", workers, commands,
+                                     DEFAULT_BUDGET * 4 if budget is None else budget))
+        finally:
+            shutil.rmtree(home, ignore_errors=True)
+    return results
+
+def key(record):
+    """Identity of a benchmark across result files"""
+    return record["name"], json.dumps(record["params"], sort_keys=True)
+
+def compare(baseline, results, threshold):
+    """Print p50 changes against a baseline; returns the number of regressions"""
+    before = {key(record): record for record in baseline["results"]}
+    regressions = 0
+    print(f"{'Benchmark':<26} {'Params':<32} {'Before us':>11} {'After us':>11} {'Change':>8}")
+    print("-" * 92)
+    for record in results:
+        old = before.get(key(record))
+        if not old or not old["p50_us"]:
+            continue
+        change = record["p50_us"] / old["p50_us"] - 1
+        flag = ""
+        if change > threshold:
+            regressions += 1
+            flag = "  [!]"
+        params = ",".join(f"{name}={value}" for name, value in sorted(record["params"].items()))
+        print(f"{record['name']:<26} {params:<32} {old['p50_us']:>11.1f} {record['p50_us']:>11.1f} "
+              f"{change * 100:>+7.1f}%{flag}")
+    return regressions
+
+def metadata():
+    """Where and when the results were taken"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count()
+    }
+
+def log(message):
+    """Progress goes to stderr so stdout stays valid JSON"""
+    print(message, file=sys.stderr, flush=True)
+
+def parse_list(text):
+    """'1,2,4' -> [1, 2, 4]"""
+    return [int(part) for part in text.split(",") if part.strip()]
+
+def main():
+    parser = argparse.ArgumentParser(description="ECHTABLE benchmarks")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Library sizes in slots (default: %(default)s)")
+    parser.add_argument("--concurrency", default=DEFAULT_CONCURRENCY,
+                        help="Executor worker counts (default: %(default)s)")
+    parser.add_argument("--commands", type=int, default=256, help="No-op commands per load run (default: 256)")
+    parser.add_argument("--budget", type=float, help="Seconds spent on each benchmark")
+    parser.add_argument("--only", default="storage,startup,executor", help="Groups to run (default: all)")
+    parser.add_argument("--out", metavar="FILE", help="Write results to FILE instead of stdout")
+    parser.add_argument("--compare", metavar="FILE", help="Report changes against an earlier result file")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Slowdown that counts as a regression (default: 0.10)")
+    parser.add_argument("--child", nargs="+", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.child:
+        # Inside a fresh interpreter whose HOME holds the library
+        sys.path.insert(0, ROOT_DIR)
+        group, params = args.child[0], args.child[1:]
+        if group == "library":
+            results = bench_library(int(params[0]), float(params[1]))
+        else:
+            results = bench_executor(int(params[0]), int(params[1]), float(params[2]))
+        json.dump(results, sys.stdout)
+        return 0
+    
+    groups = {group.strip() for group in args.only.split(",")}
+    results = run_all(parse_list(args.sizes), parse_list(args.concurrency), args.commands, args.budget, groups)
+    report = {"meta": metadata(), "results": results}
+    
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        log(f"[+] {len(results)} results written to {args.out}")
+    elif not args.compare:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, results, args.threshold)
+        if regressions:
+            log(f"[!] {regressions} benchmark(s) slower by more than {args.threshold:.0%}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
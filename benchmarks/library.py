@@ -0,0 +1,79 @@
+"""
+ECHTABLE Benchmark Library
+Synthetic slots, variables and loads written straight into a data directory
+"""
+
+import os
+import json
+from datetime import datetime
+
+# Slots per generated load
+LOAD_SIZE = 10
+
+# Command of the no-op slots used for executor runs
+NOOP_COMMAND = ":"
+
+def _write(path, data):
+    """Write a store file the way JsonStore does"""
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+
+def generate(base_dir, slots, variables=None, noop=0):
+    """Fill base_dir with slots.json, variables.json and loads.json
+
+    Slot commands reference the variables so substitution has real work to
+    do. A "noop" load of noop ':' slots is added for executor runs.
+    """
+    os.makedirs(base_dir, exist_ok=True)
+    variables = variables if variables is not None else max(slots // 10, 1)
+    created = datetime.now().isoformat()
+    
+    values = {
+        f"var_{i}": {"value": f"10.0.{i // 256 % 256}.{i % 256}", "created_at": created}
+        for i in range(variables)
+    }
+    
+    records = {}
+    for i in range(1, slots + noop + 1):
+        if i <= slots:
+            a, b = i % variables, (i * 7) % variables
+            name = f"slot_{i}"
+            command = f"nmap -p @var_{a} @var_{b} -oN scan_{i}.txt"
+        else:
+            name = f"noop_{i - slots - 1}"
+            command = NOOP_COMMAND
+        records[str(i)] = {
+            "id": i,
+            "name": name,
+            "command": command,
+            "created_at": created,
+            "last_used": None,
+            "usage_count": i % 7,
+            "deleted": False
+        }
+    
+    loads, names = {}, {}
+    for number, start in enumerate(range(1, slots + 1, LOAD_SIZE), 1):
+        loads[str(number)] = {
+            "id": number,
+            "name": f"load_{number}",
+            "slot_ids": list(range(start, min(start + LOAD_SIZE, slots + 1))),
+            "mode": "parallel" if number % 2 else "serial",
+            "created_at": created
+        }
+        names[f"load_{number}"] = str(number)
+    
+    if noop:
+        number = len(loads) + 1
+        loads[str(number)] = {
+            "id": number,
+            "name": "noop",
+            "slot_ids": list(range(slots + 1, slots + noop + 1)),
+            "mode": "parallel",
+            "created_at": created
+        }
+        names["noop"] = str(number)
+    
+    _write(os.path.join(base_dir, "slots.json"), records)
+    _write(os.path.join(base_dir, "variables.json"), values)
+    _write(os.path.join(base_dir, "loads.json"), {"version": 2, "loads": loads, "names": names})
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+ECHTABLE Executor Stress
+Mixed synthetic workloads against CommandExecutor across modes and worker counts
+
+    python3 benchmarks/stress.py
+    python3 benchmarks/stress.py --mix tiny=500,output=8 --output-mb 32 --modes capture,stream
+    python3 benchmarks/stress.py --cancel-after 0.5 --out stress.json
+
+Modes: capture (output buffered in memory, as parallel loads do), stream
+(piped line by line, as captures do) and plain (straight to the output file).
+Each combination runs in a fresh interpreter so peak RSS is its own.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import resource
+import tempfile
+import threading
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from bench import log, metadata, parse_list
+
+DEFAULT_MIX = "tiny=200,sleep=8,output=4,stubborn=4"
+DEFAULT_MODES = "capture,stream,plain"
+DEFAULT_WORKERS = "1,4,16,64"
+
+# Seconds between RSS/fd samples while a workload runs
+SAMPLE_INTERVAL = 0.02
+
+def workload_command(kind, output_mb, sleep):
+    """Shell command for one kind of synthetic work"""
+    if kind == "tiny":
+        return ":"
+    if kind == "sleep":
+        return f"sleep {sleep}"
+    if kind == "output":
+        # Lines of 100 bytes as fast as the pipe takes them
+        return f"head -c {output_mb * 1024 * 1024} /dev/zero | tr '\\0' x | fold -w 99"
+    if kind == "stubborn":
+        # Ignored signals are inherited, so sleep shrugs off SIGTERM too
+        return f"trap '' TERM; sleep {sleep}"
+    raise ValueError(f"Unknown workload: {kind}")
+
+def parse_mix(text):
+    """'tiny=200,sleep=8' -> [("tiny", 200), ("sleep", 8)]"""
+    mix = []
+    for part in text.split(","):
+        kind, sep, count = part.partition("=")
+        if not sep:
+            raise ValueError(f"Expected kind=count: {part}")
+        mix.append((kind.strip(), int(count)))
+    return mix
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of sorted samples"""
+    if not samples:
+        return None
+    return samples[min(int(len(samples) * fraction), len(samples) - 1)]
+
+class Sampler:
+    """Background thread tracking this process's peak RSS and open fds"""
+    
+    def __init__(self):
+        self.peak_rss = 0
+        self.peak_fds = 0
+        self.stopped = threading.Event()
+        self.page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+        self.thread = threading.Thread(target=self._run, daemon=True)
+    
+    def sample(self):
+        """Take one reading"""
+        try:
+            with open("/proc/self/statm", "r") as f:
+                rss = int(f.read().split()[1]) * self.page_size
+            fds = len(os.listdir("/proc/self/fd"))
+        except OSError:
+            return
+        self.peak_rss = max(self.peak_rss, rss)
+        self.peak_fds = max(self.peak_fds, fds)
+    
+    def _run(self):
+        while not self.stopped.wait(SAMPLE_INTERVAL):
+            self.sample()
+    
+    def __enter__(self):
+        self.sample()
+        self.thread.start()
+        return self
+    
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.thread.join()
+        self.sample()
+        return False
+
+def run_workload(mode, workers, commands, cancel_after=None):
+    """Run commands on one flow and measure it; runs inside a child interpreter"""
+    from core.executor import CommandExecutor, RunContext
+    
+    durations = []
+    baseline_fds = len(os.listdir("/proc/self/fd")) if os.path.isdir("/proc/self/fd") else None
+    with open(os.devnull, "w") as devnull, Sampler() as sampler:
+        context = RunContext(output=devnull, name="stress")
+        flow = context.flow(max_active=workers)
+        capture = mode == "capture"
+        on_line = (lambda line: None) if mode == "stream" else None
+        
+        def timed(command):
+            # Timed here rather than through a tracer or metrics sink, which
+            # would switch plain mode to streaming through a pipe
+            start = time.perf_counter()
+            result = CommandExecutor.execute(command, capture, context, on_line)
+            if result.get("returncode") is not None:
+                durations.append(time.perf_counter() - start)
+            return result
+        
+        started = time.perf_counter()
+        futures = [context.submit(flow, None, timed, command) for command in commands]
+        
+        drain = None
+        if cancel_after is not None:
+            time.sleep(cancel_after)
+            cancelled = time.perf_counter()
+            context.cancel()
+        results = [future.result() for future in futures]
+        wall = time.perf_counter() - started
+        if cancel_after is not None:
+            drain = time.perf_counter() - cancelled
+    
+    durations.sort()
+    completed = sum(1 for result in results if result.get("returncode") is not None)
+    return {
+        "mode": mode,
+        "workers": workers,
+        "commands": len(commands),
+        "completed": completed,
+        "failed": sum(1 for result in results if not result["success"]),
+        "wall_s": round(wall, 3),
+        "throughput": round(completed / wall, 1) if wall else None,
+        "p50_ms": round(percentile(durations, 0.50) * 1000, 2) if durations else None,
+        "p99_ms": round(percentile(durations, 0.99) * 1000, 2) if durations else None,
+        "peak_rss_mb": round(max(sampler.peak_rss, peak_rusage()) / 1024 / 1024, 1),
+        "baseline_fds": baseline_fds,
+        "peak_fds": sampler.peak_fds or None,
+        "drain_s": round(drain, 3) if drain is not None else None
+    }
+
+def peak_rusage():
+    """Peak RSS in bytes according to the kernel (kilobytes on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def build_commands(mix, output_mb, sleep, seed):
+    """Workload commands, shuffled so the kinds interleave"""
+    commands = []
+    for kind, count in mix:
+        commands.extend([workload_command(kind, output_mb, sleep)] * count)
+    random.Random(seed).shuffle(commands)
+    return commands
+
+def format_table(records):
+    """Summary lines for stress results"""
+    header = (f"{'Mode':<8} {'Workers':>7} {'Done':>6} {'Wall s':>8} {'Cmd/s':>8} {'p50 ms':>9} "
+              f"{'p99 ms':>9} {'RSS MB':>8} {'FDs':>5} {'Drain s':>8}")
+    lines = [header, "-" * len(header)]
+    
+    def cell(value, width, spec=""):
+        return ("-" if value is None else format(value, spec)).rjust(width)
+    
+    for record in records:
+        lines.append(
+            f"{record['mode']:<8} {record['workers']:>7} {record['completed']:>6} {cell(record['wall_s'], 8, '.2f')} "
+            f"{cell(record['throughput'], 8, '.1f')} {cell(record['p50_ms'], 9, '.1f')} "
+            f"{cell(record['p99_ms'], 9, '.1f')} {cell(record['peak_rss_mb'], 8, '.1f')} "
+            f"{cell(record['peak_fds'], 5)} {cell(record['drain_s'], 8, '.2f')}"
+        )
+    return lines
+
+def main():
+    parser = argparse.ArgumentParser(description="ECHTABLE executor stress harness")
+    parser.add_argument("--mix", default=DEFAULT_MIX,
+                        help="Workload counts: tiny, sleep, output, stubborn (default: %(default)s)")
+    parser.add_argument("--modes", default=DEFAULT_MODES, help="Executor modes (default: %(default)s)")
+    parser.add_argument("--workers", default=DEFAULT_WORKERS, help="Worker counts (default: %(default)s)")
+    parser.add_argument("--output-mb", type=int, default=8, help="Output per producer in MB (default: 8)")
+    parser.add_argument("--sleep", type=float, default=1.0, help="Seconds per sleeper (default: 1)")
+    parser.add_argument("--cancel-after", type=float, metavar="SECONDS",
+                        help="Cancel each run after SECONDS and report how long it takes to drain")
+    parser.add_argument("--seed", type=int, default=1, help="Shuffle seed for the workload order")
+    parser.add_argument("--out", metavar="FILE", help="Also write results as JSON to FILE")
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    try:
+        mix = parse_mix(args.mix)
+        commands = build_commands(mix, args.output_mb, args.sleep, args.seed)
+    except ValueError as e:
+        print(f"[!] {e}", file=sys.stderr)
+        return 2
+    
+    if args.child:
+        sys.path.insert(0, ROOT_DIR)
+        mode, workers = args.child[0], int(args.child[1])
+        json.dump(run_workload(mode, workers, commands, args.cancel_after), sys.stdout)
+        return 0
+    
+    modes = [mode.strip() for mode in args.modes.split(",") if mode.strip()]
+    for mode in modes:
+        if mode not in ("capture", "stream", "plain"):
+            print(f"[!] Unknown mode: {mode}", file=sys.stderr)
+            return 2
+    
+    records = []
+    home = tempfile.mkdtemp(prefix="echtable-stress-")
+    try:
+        os.makedirs(os.path.join(home, ".echtable"))
+        for workers in parse_list(args.workers):
+            # The pool cap comes from config.json, so raise it to the worker count under test
+            with open(os.path.join(home, ".echtable", "config.json"), "w") as f:
+                json.dump({"max_workers": workers}, f)
+            for mode in modes:
+                log(f"[*] {mode}, {workers} workers, {len(commands)} commands")
+                process = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--mix", args.mix, "--output-mb",
+                     str(args.output_mb), "--sleep", str(args.sleep), "--seed", str(args.seed),
+                     "--child", mode, str(workers)]
+                    + (["--cancel-after", str(args.cancel_after)] if args.cancel_after is not None else []),
+                    env=dict(os.environ, HOME=home), stdout=subprocess.PIPE
+                )
+                if process.returncode != 0:
+                    log(f"[!] Run failed: {mode}, {workers} workers")
+                    continue
+                records.append(json.loads(process.stdout))
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+    
+    print("\n".join(format_table(records)))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"meta": metadata(), "mix": args.mix, "output_mb": args.output_mb, "results": records},
+                      f, indent=2)
+        log(f"[+] {len(records)} results written to {args.out}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
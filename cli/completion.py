@@ -0,0 +1,222 @@
+"""
+ECHTABLE Tab Completion
+Readline completer backed by in-memory prefix tries
+"""
+
+try:
+    import readline
+except ImportError:
+    readline = None
+
+class _TrieNode:
+    """One character step in a PrefixTrie"""
+    
+    __slots__ = ("children", "count")
+    
+    def __init__(self):
+        self.children = {}
+        self.count = 0
+
+class PrefixTrie:
+    """Prefix tree of completion candidates (duplicates are reference counted)"""
+    
+    def __init__(self, words=()):
+        self.root = _TrieNode()
+        for word in words:
+            self.add(word)
+    
+    def add(self, word):
+        """Insert a word"""
+        node = self.root
+        for char in word:
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = _TrieNode()
+            node = child
+        node.count += 1
+    
+    def remove(self, word):
+        """Remove one occurrence of a word, pruning empty branches"""
+        path = []
+        node = self.root
+        for char in word:
+            child = node.children.get(char)
+            if child is None:
+                return
+            path.append((node, char))
+            node = child
+        
+        if node.count == 0:
+            return
+        node.count -= 1
+        
+        while path and node.count == 0 and not node.children:
+            parent, char = path.pop()
+            del parent.children[char]
+            node = parent
+    
+    def complete(self, prefix, limit=200):
+        """Return up to limit words starting with prefix, in sorted order"""
+        node = self.root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        
+        results = []
+        stack = [(node, prefix)]
+        while stack and len(results) < limit:
+            node, word = stack.pop()
+            if node.count:
+                results.append(word)
+            for char in sorted(node.children, reverse=True):
+                stack.append((node.children[char], word + char))
+        return results
+
+class FrameworkCompleter:
+    """Completes commands, slot and load names/ids and @variables without touching disk"""
+    
+    SUBCOMMANDS = {
+        "show": ["slots", "vars", "loads", "slot", "var", "load"],
+        "edit": ["slot", "load"],
+        "delete": ["slot", "var", "load"],
+        "create": ["slot", "load"],
+        "sort": ["id"],
+        "stats": ["slow", "failures", "loads", "unused", "rebuild"]
+    }
+    
+    def __init__(self, commands, slots, loads, variables):
+        self.commands = PrefixTrie(commands)
+        self.slot_manager = slots
+        self.load_manager = loads
+        self.var_manager = variables
+        self._matches = []
+        self._generations = None
+        
+        self.slots = PrefixTrie()
+        self.loads = PrefixTrie()
+        self.variables = PrefixTrie()
+        self.rebuild()
+        
+        slots.add_listener(self._on_slot_change)
+        loads.add_listener(self._on_load_change)
+        variables.add_listener(self._on_variable_change)
+    
+    def install(self):
+        """Register with readline"""
+        if readline is None:
+            return
+        
+        readline.set_completer(self.complete)
+        readline.set_completer_delims(" \t\n")
+        if "libedit" in (readline.__doc__ or ""):
+            readline.parse_and_bind("bind ^I rl_complete")
+        else:
+            readline.parse_and_bind("tab: complete")
+    
+    def _store_generations(self):
+        """Current store generations, used to notice outside changes"""
+        return (
+            self.slot_manager.store.generation,
+            self.load_manager.store.generation,
+            self.var_manager.store.generation
+        )
+    
+    def rebuild(self):
+        """Rebuild all tries from the managers"""
+        self.slots = PrefixTrie()
+        for slot in self.slot_manager.list_all():
+            self._add_record(self.slots, slot)
+        
+        self.loads = PrefixTrie()
+        for load in self.load_manager.list_all():
+            self._add_record(self.loads, load)
+        
+        self.variables = PrefixTrie(var["name"] for var in self.var_manager.list_all())
+        self._generations = self._store_generations()
+    
+    def refresh(self):
+        """Rebuild if a session merged in changes from another process"""
+        if self.slot_manager.store.session and self._store_generations() != self._generations:
+            self.rebuild()
+    
+    def _add_record(self, trie, record):
+        """Index a slot or load by name and id"""
+        trie.add(record["name"])
+        trie.add(str(record["id"]))
+    
+    def _remove_record(self, trie, record):
+        """Drop a slot or load from a trie"""
+        trie.remove(record["name"])
+        trie.remove(str(record["id"]))
+    
+    def _on_slot_change(self, action, record):
+        """Keep the slot trie in step with SlotManager"""
+        if action == "add":
+            self._add_record(self.slots, record)
+        elif action == "remove":
+            self._remove_record(self.slots, record)
+        elif action == "reset":
+            self.rebuild()
+    
+    def _on_load_change(self, action, record):
+        """Keep the load trie in step with LoadManager"""
+        if action == "add":
+            self._add_record(self.loads, record)
+        elif action == "remove":
+            self._remove_record(self.loads, record)
+        elif action == "reset":
+            self.rebuild()
+    
+    def _on_variable_change(self, action, name):
+        """Keep the variable trie in step with VariableManager"""
+        if action == "add":
+            self.variables.add(f"@{name}")
+        elif action == "remove":
+            self.variables.remove(f"@{name}")
+    
+    def candidates(self, words, text):
+        """Completions for text given the words already typed before it"""
+        if text.startswith("@"):
+            return self.variables.complete(text)
+        
+        if not words:
+            return self.commands.complete(text)
+        
+        cmd = words[0].lower()
+        if cmd in ("runs", "capture", "diff"):
+            return self.slots.complete(text)
+        if cmd == "runl":
+            return self.loads.complete(text)
+        if cmd == "use":
+            if len(words) == 2 and words[1] == "load":
+                return self.loads.complete(text)
+            return sorted(set(self.slots.complete(text) + self.loads.complete(text)))
+        
+        if len(words) == 1:
+            return [word for word in self.SUBCOMMANDS.get(cmd, []) if word.startswith(text)]
+        
+        if cmd == "sort" and words[1] == "id":
+            return [word for word in ["slots", "loads"] if word.startswith(text)]
+        
+        if len(words) == 2 and cmd in ("show", "edit", "delete"):
+            kind = words[1].lower()
+            if kind == "slot":
+                return self.slots.complete(text)
+            if kind == "load":
+                return self.loads.complete(text)
+            if kind == "var":
+                return self.variables.complete(text or "@")
+        
+        return []
+    
+    def complete(self, text, state):
+        """readline completer entry point"""
+        if state == 0:
+            line = readline.get_line_buffer()
+            words = line[:readline.get_begidx()].split()
+            self._matches = self.candidates(words, text)
+        
+        if state < len(self._matches):
+            return self._matches[state]
+        return None
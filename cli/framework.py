@@ -4,21 +4,57 @@ Interactive command interface for ECHTABLE system
 """
 
 import sys
+import time
+import argparse
 import readline
 import subprocess
+import signal
 import os
 from core.slots import SlotManager
 from core.variables import VariableManager
-from core.loads import LoadManager
-from core.executor import CommandExecutor
+from core.loads import LoadManager, DEFAULT_LOAD_WORKERS
+from core.executor import CommandExecutor, RunContext
+from core.scheduler import Throttle
+from core.captures import parse_capture, compile_captures, line_feeder
+from core.plan import parse_entries
+from core.sweep import parse_sweep, format_table, DEFAULT_SWEEP_WORKERS
+from core.session import Session
+from core.jobs import JobManager
+from core.storage import StorageManager
+from core.listing import write_ndjson
+from core.profiling import profiler, record
+from core.memtrace import memtracer
+from core.metrics import metrics_sink
+from core.history import run_history, read_stats, rebuild, report, SECTIONS
+from core.objects import run_outputs, keep_outputs, RunOutputs
+from core.diff import select_runs, diff_runs
+from cli.completion import FrameworkCompleter
+from cli.progress import progress_dashboard
 
 class ECHTableFramework:
     """Interactive framework class"""
     
-    def __init__(self):
-        self.slots = SlotManager()
-        self.vars = VariableManager()
-        self.loads = LoadManager()
+    COMMANDS = [
+        "show", "search", "var", "sorts", "sortl", "sort", "shell", "runl", "runs", "capture", "jobs", "fg",
+        "kill", "wait", "edit", "use", "create", "delete", "compact", "stats", "diff", "export", "sync", "help",
+        "clear", "exit", "quit"
+    ]
+    
+    def __init__(self, session=True):
+        # Session mode keeps all stores in memory and flushes them in the background
+        self.session = Session() if session else None
+        self.slots = SlotManager(session=self.session)
+        self.vars = self.slots.variables
+        self.loads = LoadManager(session=self.session)
+        
+        if self.session:
+            self.session.preload([self.slots.path, self.vars.path, self.loads.path])
+            self.session.start()
+        
+        self.jobs = JobManager()
+        self.completer = FrameworkCompleter(self.COMMANDS, self.slots, self.loads, self.vars)
+        self.completer.install()
+        
         self.running = True
         self.current_dir = os.getcwd()
         
@@ -44,6 +80,7 @@ class ECHTableFramework:
         print(f"{self.WARNING}Active slot: {self.slots.active_slot or 'None'}")
         print(f"{self.WARNING}Active load: {self.loads.active_load or 'None'}")
         print()
+        self._report_profile()
         
         while self.running:
             try:
@@ -52,7 +89,11 @@ class ECHTableFramework:
                     continue
                 
                 self._dispatch_command(user_input)
-                
+                self._report_profile()
+                self._report_finished_jobs()
+                self._report_session_warnings()
+                self.completer.refresh()
+            
             except KeyboardInterrupt:
                 print(f"\n{self.INFO}Exiting...")
                 break
@@ -61,6 +102,46 @@ class ECHTableFramework:
                 break
             except Exception as e:
                 print(f"{self.ERROR}Error: {e}")
+        
+        self._shutdown_jobs()
+        self._close_session()
+    
+    def _report_profile(self):
+        """With --profile, print the phase breakdown of the last command"""
+        if profiler.enabled and profiler.phases:
+            profiler.report(sys.stdout)
+            profiler.reset()
+    
+    def _report_finished_jobs(self):
+        """Announce background jobs that finished since the last prompt"""
+        for job in self.jobs.drain_notices():
+            print(f"{self.INFO}[{job.id}] {job.status.capitalize()}: {job.description} ({job.elapsed:.1f}s)")
+    
+    def _shutdown_jobs(self):
+        """Stop background jobs before exiting"""
+        running = self.jobs.running()
+        if running:
+            print(f"{self.WARNING}Killing {len(running)} running job(s)")
+        self.jobs.shutdown()
+    
+    def _report_session_warnings(self):
+        """Print merge warnings collected by the background flush"""
+        if not self.session:
+            return
+        
+        for warning in self.session.drain_warnings():
+            print(f"{self.WARNING}{warning}")
+    
+    def _close_session(self):
+        """Flush pending session state to disk"""
+        if not self.session:
+            return
+        
+        try:
+            self.session.close()
+        except OSError as e:
+            print(f"{self.ERROR}Failed to save session state: {e}")
+        self._report_session_warnings()
     
     def _dispatch_command(self, command):
         """Dispatch commands to appropriate handlers"""
@@ -83,10 +164,22 @@ class ECHTableFramework:
             self._cmd_sort_id(args)
         elif cmd == "shell":
             self._cmd_shell(args)
+        elif cmd == "search":
+            self._cmd_search(args)
         elif cmd == "runl":
             self._cmd_runl(args)
         elif cmd == "runs":
             self._cmd_runs(args)
+        elif cmd == "capture":
+            self._cmd_capture(args)
+        elif cmd == "jobs":
+            self._cmd_jobs(args)
+        elif cmd == "fg":
+            self._cmd_fg(args)
+        elif cmd == "kill":
+            self._cmd_kill(args)
+        elif cmd == "wait":
+            self._cmd_wait(args)
         elif cmd == "edit":
             self._cmd_edit(args)
         elif cmd == "use":
@@ -95,6 +188,16 @@ class ECHTableFramework:
             self._cmd_create(args)
         elif cmd == "delete":
             self._cmd_delete(args)
+        elif cmd == "compact":
+            self._cmd_compact(args)
+        elif cmd == "stats":
+            self._cmd_stats(args)
+        elif cmd == "diff":
+            self._cmd_diff(args)
+        elif cmd == "export":
+            self._cmd_export(args)
+        elif cmd == "sync":
+            self._cmd_sync(args)
         elif cmd == "help":
             self._cmd_help()
         elif cmd == "clear":
@@ -142,7 +245,7 @@ class ECHTableFramework:
                 print(f"{self.INFO}Command executed successfully")
             else:
                 print(f"{self.ERROR}Command failed with code: {process.returncode}")
-                
+        
         except Exception as e:
             print(f"{self.ERROR}Shell execution error: {e}")
     
@@ -154,8 +257,20 @@ class ECHTableFramework:
         
         show_type = args[0].lower()
         
+        if show_type in ("slots", "vars", "loads"):
+            options = self._parse_list_options(args[1:])
+            if options is None:
+                return
+            ndjson = options.pop("ndjson")
+        
         if show_type == "slots":
-            slots_list = self.slots.list_sorted()
+            options["sort"] = options["sort"] or "id"
+            slots_page = self.slots.page(**options)
+            if ndjson:
+                write_ndjson(slots_page)
+                return
+            
+            slots_list = list(slots_page)
             if not slots_list:
                 print(f"{self.WARNING}No slots found")
             else:
@@ -167,7 +282,12 @@ class ECHTableFramework:
                     print(f"{slot['id']:<3} {slot['name']:<15} {cmd_preview}")
         
         elif show_type == "vars":
-            vars_list = self.vars.list_all()
+            vars_page = self.vars.page(**options)
+            if ndjson:
+                write_ndjson(vars_page)
+                return
+            
+            vars_list = list(vars_page)
             if not vars_list:
                 print(f"{self.WARNING}No variables found")
             else:
@@ -178,7 +298,13 @@ class ECHTableFramework:
                     print(f"{var['name']:<15} {var['value']}")
         
         elif show_type == "loads":
-            loads_list = self.loads.list_sorted()
+            options["sort"] = options["sort"] or "id"
+            loads_page = self.loads.page(**options)
+            if ndjson:
+                write_ndjson(loads_page)
+                return
+            
+            loads_list = list(loads_page)
             if not loads_list:
                 print(f"{self.WARNING}No loads found")
             else:
@@ -208,6 +334,8 @@ class ECHTableFramework:
             print(f"  Created: {slot.get('created_at', 'unknown')}")
             print(f"  Last Used: {slot.get('last_used', 'never')}")
             print(f"  Usage Count: {slot.get('usage_count', 0)}")
+            for capture in slot.get("captures", []):
+                print(f"  Capture: @{capture['var']} = {capture['selector']}")
             
             substituted = self.vars.substitute(slot['command'])
             if substituted != slot['command']:
@@ -250,6 +378,54 @@ class ECHTableFramework:
         else:
             print(f"{self.ERROR}Unknown show type: {show_type}")
     
+    def _parse_list_options(self, args):
+        """Parse --limit/--offset/--filter/--sort/--desc/--ndjson for listings"""
+        options = {"offset": 0, "limit": None, "pattern": None, "sort": None, "reverse": False, "ndjson": False}
+        
+        i = 0
+        while i < len(args):
+            if args[i] in ("--limit", "--offset") and i + 1 < len(args):
+                try:
+                    options[args[i][2:]] = int(args[i + 1])
+                except ValueError:
+                    print(f"{self.ERROR}{args[i]} expects a number")
+                    return None
+                i += 2
+            elif args[i] == "--filter" and i + 1 < len(args):
+                options["pattern"] = args[i + 1]
+                i += 2
+            elif args[i] == "--sort" and i + 1 < len(args):
+                options["sort"] = args[i + 1].lower()
+                i += 2
+            elif args[i] == "--desc":
+                options["reverse"] = True
+                i += 1
+            elif args[i] == "--ndjson":
+                options["ndjson"] = True
+                i += 1
+            else:
+                i += 1
+        
+        return options
+    
+    def _cmd_search(self, args):
+        """Search slots by name, command and variables"""
+        if not args:
+            print(f"{self.ERROR}Usage: search <terms>")
+            return
+        
+        results = self.slots.search(" ".join(args))
+        if not results:
+            print(f"{self.WARNING}No matching slots")
+            return
+        
+        print(f"\n{self.INFO}Search results:")
+        print("ID  Name            Score  Command")
+        print("-" * 60)
+        for slot in results:
+            cmd_preview = slot["command"][:40] + "..." if len(slot["command"]) > 40 else slot["command"]
+            print(f"{slot['id']:<3} {slot['name']:<15} {slot['score']:<6.2f} {cmd_preview}")
+    
     def _cmd_var(self, args):
         """Variable operations"""
         if not args:
@@ -310,6 +486,85 @@ class ECHTableFramework:
         else:
             print(f"{self.ERROR}Unknown sort type: {sort_type}")
     
+    def _cmd_compact(self, args):
+        """Drop deleted slot and load records"""
+        slot_count = self.slots.compact()
+        load_count = self.loads.compact()
+        print(f"{self.INFO}Compacted: {slot_count} slot and {load_count} load tombstones removed")
+        removed, freed = RunOutputs(keep_outputs()).compact(self.slots.list_all())
+        if removed:
+            print(f"{self.INFO}Stored outputs: {removed} unreferenced objects removed ({freed // 1024} KB)")
+    
+    def _cmd_stats(self, args):
+        """Show run statistics from the history rollups"""
+        if args and args[0] == "rebuild":
+            count = rebuild(slots=self.slots.list_all())
+            print(f"{self.INFO}Rebuilt run statistics from {count} history records")
+            return
+        
+        if args and args[0] not in SECTIONS:
+            print(f"{self.ERROR}Usage: stats [slow|failures|loads|unused|rebuild] [N]")
+            return
+        
+        try:
+            number = int(args[1]) if len(args) > 1 else None
+        except ValueError:
+            print(f"{self.ERROR}Expected a number: {args[1]}")
+            return
+        
+        stats = read_stats()
+        for section in args[:1] or SECTIONS:
+            lines = report(section, stats, self.slots, number)
+            print(f"\n{self.WARNING}{lines[0]}")
+            print("\n".join(lines[1:]))
+    
+    def _cmd_diff(self, args):
+        """Compare the stored outputs of two runs of a slot"""
+        if not args or len(args) > 3:
+            print(f"{self.ERROR}Usage: diff <slot> [run_a] [run_b]")
+            return
+        
+        slot = self.slots.get(args[0]) or self.slots.find_by_name(args[0])
+        if not slot:
+            print(f"{self.ERROR}Slot not found: {args[0]}")
+            return
+        
+        try:
+            numbers = [int(arg) for arg in args[1:]]
+        except ValueError:
+            print(f"{self.ERROR}Expected run numbers: {' '.join(args[1:])}")
+            return
+        
+        outputs = RunOutputs(keep_outputs())
+        try:
+            old, new = select_runs(outputs.runs(slot), *numbers)
+            changed = False
+            for line in diff_runs(outputs.store, old, new):
+                print(line)
+                changed = True
+        except ValueError as e:
+            print(f"{self.ERROR}{e}")
+            if not outputs.keep:
+                print(f"{self.WARNING}Outputs are only stored when config.json sets \"keep_outputs\"")
+            return
+        if not changed:
+            print(f"{self.WARNING}Runs {old['run']} and {new['run']} of {slot['name']} have identical output")
+    
+    def _cmd_export(self, args):
+        """Export all stores as a JSON bundle"""
+        if not args:
+            print(f"{self.ERROR}Usage: export <file>")
+            return
+        
+        if self.session:
+            self.session.sync()
+        
+        try:
+            StorageManager().export(args[0])
+            print(f"{self.INFO}Exported to {args[0]}")
+        except OSError as e:
+            print(f"{self.ERROR}Export failed: {e}")
+    
     def _cmd_shell(self, args):
         """Shell command execution"""
         if not args:
@@ -319,14 +574,133 @@ class ECHTableFramework:
         command = " ".join(args)
         self._execute_shell(command)
     
+    def _split_background(self, args):
+        """Strip a trailing '&' and report whether it was there"""
+        if args and args[-1] == "&":
+            return args[:-1], True
+        if args and args[-1].endswith("&"):
+            return args[:-1] + [args[-1][:-1]], True
+        return args, False
+    
+    def _parse_throttle(self, args):
+        """Split --key/--per-host/--rate/--burst off args; returns (args, Throttle) or None"""
+        options = {"key": None, "per_key": None, "rate": None, "burst": None}
+        flags = {"--key": "key", "--per-host": "per_key", "--rate": "rate", "--burst": "burst"}
+        rest = []
+        
+        i = 0
+        while i < len(args):
+            field = flags.get(args[i])
+            if field and i + 1 < len(args):
+                value = args[i + 1]
+                if field != "key":
+                    try:
+                        value = int(value) if field == "per_key" else float(value)
+                    except ValueError:
+                        print(f"{self.ERROR}{args[i]} expects a number")
+                        return None
+                options[field] = value
+                i += 2
+            else:
+                rest.append(args[i])
+                i += 1
+        
+        if (options["per_key"] or options["rate"]) and not options["key"]:
+            options["key"] = "@target"
+        return rest, Throttle(**options)
+    
+    def _split_flag(self, args, flag):
+        """Remove a boolean flag from args and report whether it was there"""
+        if flag in args:
+            return [arg for arg in args if arg != flag], True
+        return args, False
+    
+    def _split_option(self, args, flag):
+        """Remove every 'flag value' pair from args; returns (args, values)"""
+        rest, values = [], []
+        i = 0
+        while i < len(args):
+            if args[i] == flag and i + 1 < len(args):
+                values.append(args[i + 1])
+                i += 2
+            else:
+                rest.append(args[i])
+                i += 1
+        return rest, values
+    
     def _cmd_runl(self, args):
         """Run load"""
+        args, background = self._split_background(args)
+        args, save_captures = self._split_flag(args, "--save-captures")
+        args, no_progress = self._split_flag(args, "--no-progress")
+        args, sweep_specs = self._split_option(args, "--sweep")
+        args, workers = self._split_option(args, "--workers")
+        args, traces = self._split_option(args, "--trace")
+        trace = traces[-1] if traces else None
+        args, metrics_files = self._split_option(args, "--metrics")
+        metrics = metrics_files[-1] if metrics_files else None
+        parsed = self._parse_throttle(args)
+        if parsed is None:
+            return
+        args, throttle = parsed
         if not args:
-            print(f"{self.ERROR}Usage: runl <load_id|load_name>")
+            print(f"{self.ERROR}Usage: runl <load_id|load_name> [--sweep @var=file|a,b,c]... [--workers N] "
+                  f"[--key @var[/24]] [--per-host N] [--rate R] [&]")
+            return
+        
+        try:
+            sweeps = [parse_sweep(spec) for spec in sweep_specs]
+            max_workers = int(workers[-1]) if workers else None
+            if max_workers is not None and max_workers < 1:
+                raise ValueError(f"--workers must be at least 1: {max_workers}")
+        except ValueError as e:
+            print(f"{self.ERROR}{e}")
             return
         
         load_name = args[0]
-        result = self.loads.execute_load(load_name, self.slots)
+        
+        def run_load(context=None):
+            if not sweeps:
+                # Background jobs bring their own context; foreground parallel runs get a live view
+                dashboard = None
+                if context is None and not no_progress:
+                    dashboard = progress_dashboard(self.loads.get(load_name))
+                if dashboard is None:
+                    return self.loads.execute_load(
+                        load_name, self.slots, context=context, throttle=throttle, save_captures=save_captures,
+                        trace=trace, metrics=metrics, max_workers=max_workers or DEFAULT_LOAD_WORKERS
+                    )
+                
+                dashboard.start()
+                try:
+                    return self.loads.execute_load(
+                        load_name, self.slots, context=dashboard.context, throttle=throttle,
+                        save_captures=save_captures, trace=trace, metrics=metrics,
+                        max_workers=max_workers or DEFAULT_LOAD_WORKERS
+                    )
+                finally:
+                    dashboard.stop()
+            
+            result = self.loads.sweep_load(
+                load_name, self.slots, sweeps, context=context, throttle=throttle,
+                max_workers=max_workers or DEFAULT_SWEEP_WORKERS, trace=trace, metrics=metrics
+            )
+            if result.get("rows"):
+                lines = format_table(result["rows"], [name for name, values in sweeps])
+                log = context.log if context else print
+                log("\n" + "\n".join(lines))
+            return result
+        
+        if background:
+            if not self.loads.get(load_name):
+                print(f"{self.ERROR}Load not found: {load_name}")
+                return
+            
+            job = self.jobs.submit(f"runl {load_name}", run_load)
+            print(f"{self.INFO}[{job.id}] Started in background: runl {load_name}")
+            return
+        
+        result = run_load()
         
         if result["success"]:
             print(f"{self.INFO}Load execution completed: {load_name}")
@@ -335,8 +709,10 @@ class ECHTableFramework:
     
     def _cmd_runs(self, args):
         """Run slot"""
+        args, background = self._split_background(args)
+        args, save_captures = self._split_flag(args, "--save-captures")
         if not args:
-            print(f"{self.ERROR}Usage: runs <slot_id|slot_name>")
+            print(f"{self.ERROR}Usage: runs <slot_id|slot_name> [&]")
             return
         
         identifier = args[0]
@@ -352,12 +728,129 @@ class ECHTableFramework:
             print(f"{self.ERROR}Could not prepare command")
             return
         
+        captures = compile_captures(slot.get("captures"))
+        
+        def store_captures(context):
+            for capture in captures:
+                if capture.value is None:
+                    continue
+                if save_captures:
+                    self.vars.set(capture.var, capture.value)
+                context.log(f"[+] Captured @{capture.var} = {capture.value}" + (" (saved)" if save_captures else ""))
+        
+        if background:
+            def run_in_background(context):
+                context.metrics = metrics_sink()
+                context.history = run_history()
+                context.outputs = run_outputs()
+                step = context.label(command, slot)
+                result = CommandExecutor.run(command, context, line_feeder(captures), step)
+                context.flush()
+                store_captures(context)
+                return result
+            
+            job = self.jobs.submit(f"runs {slot['name']}", run_in_background)
+            print(f"{self.INFO}[{job.id}] Started in background: runs {slot['name']}")
+            return
+        
         print(f"{self.INFO}Running slot [{slot['id']}] {slot['name']}")
-        result = CommandExecutor.execute(command)
+        context = RunContext(metrics=metrics_sink(), history=run_history(), outputs=run_outputs())
+        step = context.label(command, slot)
+        result = CommandExecutor.run(command, context, line_feeder(captures), step)
+        context.flush()
+        store_captures(context)
         
         if not result["success"]:
             print(f"{self.ERROR}Command failed")
     
+    def _cmd_capture(self, args):
+        """Declare, list or clear values captured from a slot's output"""
+        if not args:
+            print(f"{self.ERROR}Usage: capture <slot> [@var = /regex/[g]|line:N|last | clear]")
+            return
+        
+        slot = self.slots.get(args[0]) or self.slots.find_by_name(args[0])
+        if not slot:
+            print(f"{self.ERROR}Slot not found: {args[0]}")
+            return
+        
+        captures = slot.get("captures", [])
+        if len(args) == 1:
+            if not captures:
+                print(f"{self.WARNING}No captures for slot {slot['name']}")
+            for capture in captures:
+                print(f"  @{capture['var']} = {capture['selector']}")
+            return
+        
+        if args[1].lower() == "clear":
+            self.slots.set_captures(slot["id"], [])
+            print(f"{self.INFO}Captures cleared: {slot['name']}")
+            return
+        
+        try:
+            spec = parse_capture(" ".join(args[1:]))
+        except ValueError as e:
+            print(f"{self.ERROR}{e}")
+            return
+        
+        # One capture per variable; declaring it again replaces the selector
+        captures = [capture for capture in captures if capture["var"] != spec["var"]] + [spec]
+        self.slots.set_captures(slot["id"], captures)
+        print(f"{self.INFO}Capture added: {slot['name']} -> @{spec['var']} = {spec['selector']}")
+    
+    def _cmd_jobs(self, args):
+        """List background jobs"""
+        jobs = self.jobs.list()
+        if not jobs:
+            print(f"{self.WARNING}No jobs")
+            return
+        
+        print(f"\n{self.INFO}Jobs:")
+        print("ID  Status   Elapsed  Job")
+        print("-" * 60)
+        for job in jobs:
+            print(f"{job.id:<3} {job.status:<8} {job.elapsed:>6.1f}s  {job.description}  {job.progress()}")
+    
+    def _cmd_fg(self, args):
+        """Follow a job's output until it finishes"""
+        job = self.jobs.get(args[0]) if args else (self.jobs.list() or [None])[-1]
+        if not job:
+            print(f"{self.ERROR}Usage: fg <job_id>")
+            return
+        
+        print(f"{self.INFO}[{job.id}] {job.description} (Ctrl-C to detach)")
+        try:
+            self.jobs.follow(job, sys.stdout)
+        except KeyboardInterrupt:
+            print(f"\n{self.WARNING}Detached from job {job.id}")
+    
+    def _cmd_kill(self, args):
+        """Kill a background job"""
+        sig = signal.SIGTERM
+        if args and args[0] == "-9":
+            sig = signal.SIGKILL
+            args = args[1:]
+        
+        if not args:
+            print(f"{self.ERROR}Usage: kill [-9] <job_id>")
+            return
+        
+        if self.jobs.kill(args[0], sig):
+            print(f"{self.INFO}Job {args[0]} signalled")
+        else:
+            print(f"{self.ERROR}No running job: {args[0]}")
+    
+    def _cmd_wait(self, args):
+        """Wait for one or all background jobs"""
+        if args and not self.jobs.get(args[0]):
+            print(f"{self.ERROR}Job not found: {args[0]}")
+            return
+        
+        try:
+            self.jobs.wait(args[0] if args else None)
+        except KeyboardInterrupt:
+            print(f"\n{self.WARNING}Stopped waiting")
+    
     def _cmd_edit(self, args):
         """Edit slot or load"""
         if not args:
@@ -389,16 +882,14 @@ class ECHTableFramework:
                 if choice == '1' or choice == 'name':
                     new_name = input(f"New name [{slot['name']}]> ").strip()
                     if new_name:
-                        self.slots.delete(identifier)
-                        new_id = self.slots.create(slot['command'], new_name)
-                        print(f"{self.INFO}Slot updated: {new_id} ({new_name})")
+                        self.slots.edit(slot['id'], name=new_name)
+                        print(f"{self.INFO}Slot updated: {slot['id']} ({new_name})")
                 
                 elif choice == '2' or choice == 'command':
                     new_command = input(f"New command [{slot['command']}]> ").strip()
                     if new_command:
-                        self.slots.delete(identifier)
-                        new_id = self.slots.create(new_command, slot['name'])
-                        print(f"{self.INFO}Slot updated: {new_id} ({slot['name']})")
+                        self.slots.edit(slot['id'], command=new_command)
+                        print(f"{self.INFO}Slot updated: {slot['id']} ({slot['name']})")
                 
                 elif choice == 'c' or choice == 'cancel':
                     print(f"{self.WARNING}Edit cancelled")
@@ -427,7 +918,8 @@ class ECHTableFramework:
             print(f"1. Name: {load['name']}")
             print(f"2. Slots: {', '.join(map(str, load['slot_ids']))}")
             print(f"3. Mode: {load['mode']}")
-            print(f"{self.INFO}Enter field number to edit (1-3) or 'c' to cancel:")
+            print(f"4. Weight: {load.get('weight', 1)}")
+            print(f"{self.INFO}Enter field number to edit (1-4) or 'c' to cancel:")
             
             try:
                 choice = input("Choice> ").strip().lower()
@@ -441,18 +933,29 @@ class ECHTableFramework:
                 elif choice == '2' or choice == 'slots':
                     new_slots = input(f"New slots (comma separated) [{', '.join(map(str, load['slot_ids']))}]> ").strip()
                     if new_slots:
-                        slot_ids = [int(x.strip()) for x in new_slots.split(',')]
-                        self.loads.edit_load(identifier, slot_ids=slot_ids)
-                        print(f"{self.INFO}Load slots updated")
+                        try:
+                            self.loads.edit_load(identifier, slot_ids=parse_entries(new_slots))
+                            print(f"{self.INFO}Load slots updated")
+                        except ValueError as e:
+                            print(f"{self.ERROR}Invalid slots: {e}")
                 
                 elif choice == '3' or choice == 'mode':
-                    new_mode = input(f"New mode (s=serial, p=parallel) [{load['mode']}]> ").strip().lower()
+                    new_mode = input(f"New mode (s=serial, p=parallel, pipe) [{load['mode']}]> ").strip().lower()
                     if new_mode:
                         mode_map = {"s": "serial", "p": "parallel"}
                         final_mode = mode_map.get(new_mode, new_mode)
                         self.loads.edit_load(identifier, mode=final_mode)
                         print(f"{self.INFO}Load mode updated: {final_mode}")
                 
+                elif choice == '4' or choice == 'weight':
+                    new_weight = input(f"New weight [{load.get('weight', 1)}]> ").strip()
+                    if new_weight:
+                        try:
+                            self.loads.edit_load(identifier, weight=new_weight)
+                            print(f"{self.INFO}Load weight updated: {new_weight}")
+                        except ValueError as e:
+                            print(f"{self.ERROR}{e}")
+                
                 elif choice == 'c' or choice == 'cancel':
                     print(f"{self.WARNING}Edit cancelled")
                 
@@ -550,6 +1053,7 @@ class ECHTableFramework:
             slots_str = args[1]
             name = None
             mode = "serial"
+            weight = None
             
             i = 2
             while i < len(args):
@@ -559,6 +1063,9 @@ class ECHTableFramework:
                 elif args[i] == "--mode" and i + 1 < len(args):
                     mode = args[i + 1]
                     i += 2
+                elif args[i] == "--weight" and i + 1 < len(args):
+                    weight = args[i + 1]
+                    i += 2
                 else:
                     i += 1
             
@@ -567,11 +1074,16 @@ class ECHTableFramework:
                 return
             
             try:
-                slot_ids = [int(x.strip()) for x in slots_str.split(',')]
-                load_id = self.loads.create_load(name, slot_ids, mode)
-                print(f"{self.INFO}Load created: {load_id} ({name}, mode: {mode})")
+                slot_ids = parse_entries(slots_str)
             except ValueError:
-                print(f"{self.ERROR}Invalid slot IDs. Use format: 1,2,3")
+                print(f"{self.ERROR}Invalid slot IDs. Use format: 1,2,3 or 1,load:<id|name>")
+                return
+            
+            try:
+                load_id = self.loads.create_load(name, slot_ids, mode, weight)
+                print(f"{self.INFO}Load created: {load_id} ({name}, mode: {mode})")
+            except ValueError as e:
+                print(f"{self.ERROR}{e}")
         
         else:
             print(f"{self.ERROR}Unknown create type: {create_type}")
@@ -616,12 +1128,12 @@ class ECHTableFramework:
             return
         
         try:
-            slot_ids = [int(x.strip()) for x in slots_input.split(',')]
+            slot_ids = parse_entries(slots_input)
         except ValueError:
             print(f"{self.ERROR}Invalid slot IDs")
             return
         
-        mode = input("Mode (s=serial, p=parallel) [s]: ").strip().lower()
+        mode = input("Mode (s=serial, p=parallel, pipe) [s]: ").strip().lower()
         if not mode:
             mode = "serial"
         elif mode == 's':
@@ -629,7 +1141,11 @@ class ECHTableFramework:
         elif mode == 'p':
             mode = "parallel"
         
-        load_id = self.loads.create_load(name, slot_ids, mode)
+        try:
+            load_id = self.loads.create_load(name, slot_ids, mode)
+        except ValueError as e:
+            print(f"{self.ERROR}{e}")
+            return
         print(f"{self.INFO}Load created: {load_id} ({name}, mode: {mode})")
     
     def _cmd_delete(self, args):
@@ -657,7 +1173,12 @@ class ECHTableFramework:
         
         elif delete_type == "load":
             name = args[1]
-            if self.loads.delete(name):
+            try:
+                deleted = self.loads.delete(name)
+            except ValueError as e:
+                print(f"{self.ERROR}{e}")
+                return
+            if deleted:
                 print(f"{self.INFO}Load deleted: {name}")
             else:
                 print(f"{self.ERROR}Load not found: {name}")
@@ -665,6 +1186,15 @@ class ECHTableFramework:
         else:
             print(f"{self.ERROR}Unknown delete type: {delete_type}")
     
+    def _cmd_sync(self, args):
+        """Flush session state to disk now"""
+        if not self.session:
+            print(f"{self.WARNING}Session mode is off, changes are written immediately")
+            return
+        
+        self.session.sync()
+        print(f"{self.INFO}Session state saved")
+    
     def _cmd_help(self):
         """Help menu"""
         help_text = f"""
@@ -674,6 +1204,7 @@ class ECHTableFramework:
   help                    Show this help
   exit, quit             Exit framework
   clear                  Clear screen
+  sync                   Save session state to disk now
   shell <cmd>            Execute shell command
   +<cmd>                 Quick shell command (e.g., +ls, +cd)
 
@@ -681,15 +1212,27 @@ class ECHTableFramework:
   show slots             List all slots
   show vars              List all variables
   show loads             List all loads
+    [--limit N] [--offset N] [--filter text] [--sort field] [--desc] [--ndjson]
+                         Page, filter, sort or stream any of the above
+                         (slots: id|name|usage|last_used, vars: name|value|created,
+                          loads: id|name|mode)
   show slot <id|name>    Show slot details
   show var <name>        Show variable value
   show load <id|name>    Show load details
+  search <terms>         Find slots by name, command or variables
 
 {self.WARNING}Sort Commands:
   sorts                  Show sorted slots
   sortl                  Show sorted loads
   sort id slots         Reorder slot IDs (1,2,3...)
   sort id loads         Reorder load IDs
+  compact                Drop deleted records (IDs are kept) and unused outputs
+  stats [slow|failures|unused] [N]
+                         Slowest slots by p95, failure rates, never used slots
+  stats loads [days]     Runs and total time per load (default: last 7 days)
+  stats rebuild          Recompute statistics from the full run history
+  diff <slot> [a] [b]    Diff stored outputs of two runs (default: last two)
+  export <file>          Export slots, variables and loads as JSON
 
 {self.WARNING}Variable Operations:
   var @name value        Set/update variable
@@ -698,6 +1241,10 @@ class ECHTableFramework:
 {self.WARNING}Slot Operations:
   use <id|name>          Activate slot
   runs <id|name>         Run slot
+  capture <id|name> @var = /regex/[g]|line:N|last
+                         Capture a value from the slot's output for later slots
+  capture <id|name> [clear]  List or remove a slot's captures
+  runs|runl ... --save-captures  Also store captured values as variables
   create slot <cmd> --name <name>  Create new slot
   create                 Interactive create menu
   edit slot <id|name>    Edit slot (interactive)
@@ -706,13 +1253,32 @@ class ECHTableFramework:
 {self.WARNING}Load Operations:
   use load <id|name>     Activate load
   runl <id|name>         Run load
-  create load <1,2,3> --name <name> --mode s|p
+  runl <id|name> --sweep @target=hosts.txt --sweep @port=80,443 [--workers N]
+                         Run the load for every combination and print a summary table
+  runl <id|name> --no-progress
+                         Parallel loads show a live status table; this prints plain output instead
+  runl <id|name> --trace run.json
+                         Save a timeline of the run (open in ui.perfetto.dev)
+  runl <id|name> --metrics /var/lib/node_exporter/echtable.prom
+                         Add the run to a Prometheus textfile (config.json "metrics_file" sets a default)
+  runl <id|name> --per-host N --rate R [--key @var/24]
+                         Limit concurrent runs and starts/sec per target (default key @target)
+  create load <1,2,3> --name <name> --mode s|p|pipe [--weight W]
+  create load 1,load:recon --name <name>  Include another load (nested loads run as one plan)
   create                 Interactive create menu
   edit load <id|name>    Edit load (interactive)
   delete load <id|name>  Delete load
 
+{self.WARNING}Job Control:
+  runl <id|name> &       Run load in the background
+  runs <id|name> &       Run slot in the background
+  jobs                   List background jobs with live status
+  fg [job]               Follow job output until it finishes
+  kill [-9] <job>        Stop a background job
+  wait [job]             Wait for one or all jobs
+
 {self.WARNING}Mode Shortcuts:
-  s = serial, p = parallel
+  s = serial, p = parallel, pipe = stdout of each slot feeds the next
 
 {self.WARNING}Examples:
   var @target 10.10.10.5
@@ -725,10 +1291,36 @@ class ECHTableFramework:
         """
         print(help_text)
 
-def start_framework():
+def parse_framework_args(argv=None):
+    """Parse command-line arguments for the echtable framework"""
+    parser = argparse.ArgumentParser(
+        prog="echtable",
+        description="ECHTABLE Framework - Command Execution Memory System"
+    )
+    parser.add_argument("--profile", action="store_true", help="Print a timing breakdown after each command")
+    parser.add_argument("--profile-out", metavar="FILE", help="Write cProfile stats to FILE on exit (implies --profile)")
+    parser.add_argument("--memtrace", action="store_true",
+                        help="Report allocation sites and memory growth between phases on exit (tracemalloc)")
+    return parser.parse_args(argv)
+
+def start_framework(started=None):
     """Start the framework"""
+    args = parse_framework_args()
+    if args.profile or args.profile_out:
+        profiler.enable(cprofile=bool(args.profile_out))
+        if started is not None:
+            profiler.started = started
+    if args.memtrace:
+        memtracer.enable()
+    
+    initializing = time.perf_counter()
     framework = ECHTableFramework()
+    record("startup", time.perf_counter() - initializing)
     framework.start()
+    memtracer.report(sys.stdout)
+    
+    if args.profile_out and profiler.dump(args.profile_out):
+        print(f"[*] cProfile stats written to {args.profile_out}")
 
 if __name__ == "__main__":
     start_framework()
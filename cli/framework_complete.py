@@ -9,16 +9,25 @@ from core.slots import SlotManager
 from core.variables import VariableManager
 from core.loads import LoadManager
 from core.executor import CommandExecutor
+from cli.completion import FrameworkCompleter
 
 class ECHTableFramework:
     """Extended framework with additional commands"""
     
+    COMMANDS = [
+        "runl", "runs", "edit", "use", "run", "create", "set", "show", "list",
+        "delete", "help", "clear", "exit", "quit"
+    ]
+    
     def __init__(self):
         self.slots = SlotManager()
         self.vars = VariableManager()
         self.loads = LoadManager()
         self.running = True
         
+        self.completer = FrameworkCompleter(self.COMMANDS, self.slots, self.loads, self.vars)
+        self.completer.install()
+        
         # Prompt colors
         self.PROMPT = "\033[94mechtable >\033[0m "
         self.INFO = "\033[92m[+]\033[0m "
@@ -49,7 +58,7 @@ class ECHTableFramework:
                     continue
                 
                 self._dispatch_command(user_input)
-                
+            
             except KeyboardInterrupt:
                 print(f"\n{self.INFO}Exiting...")
                 break
@@ -133,7 +142,7 @@ class ECHTableFramework:
             return
         
         print(f"{self.INFO}Running slot [{slot['id']}] {slot['name']}")
-        result = CommandExecutor.execute(command)
+        result = CommandExecutor.run(command)
         
         if not result["success"]:
             print(f"{self.ERROR}Command failed")
@@ -154,10 +163,8 @@ class ECHTableFramework:
                     new_command = " ".join(args[cmd_index+1:])
                     slot = self.slots.get(identifier) or self.slots.find_by_name(identifier)
                     if slot:
-                        old_name = slot["name"]
-                        self.slots.delete(identifier)
-                        new_id = self.slots.create(new_command, old_name)
-                        print(f"{self.INFO}Slot edited: {new_id} ({old_name})")
+                        self.slots.edit(slot["id"], command=new_command)
+                        print(f"{self.INFO}Slot edited: {slot['id']} ({slot['name']})")
                     else:
                         print(f"{self.ERROR}Slot not found: {identifier}")
                 else:
@@ -167,7 +174,12 @@ class ECHTableFramework:
                 name_index = args.index("--name")
                 if name_index + 1 < len(args):
                     new_name = args[name_index+1]
-                    print(f"{self.WARNING}Slot name edit coming soon")
+                    slot = self.slots.get(identifier) or self.slots.find_by_name(identifier)
+                    if slot:
+                        self.slots.edit(slot["id"], name=new_name)
+                        print(f"{self.INFO}Slot name edited: {slot['id']} -> {new_name}")
+                    else:
+                        print(f"{self.ERROR}Slot not found: {identifier}")
                 else:
                     print(f"{self.ERROR}Missing name after --name")
         
@@ -204,8 +216,20 @@ class ECHTableFramework:
                     print(f"{self.INFO}Load mode edited: {mode}")
                 else:
                     print(f"{self.ERROR}Missing mode after --mode")
+            
+            elif "--weight" in args:
+                weight_index = args.index("--weight")
+                if weight_index + 1 < len(args):
+                    weight = args[weight_index+1]
+                    try:
+                        self.loads.edit_load(identifier, weight=weight)
+                        print(f"{self.INFO}Load weight edited: {weight}")
+                    except ValueError as e:
+                        print(f"{self.ERROR}{e}")
+                else:
+                    print(f"{self.ERROR}Missing weight after --weight")
             else:
-                print(f"{self.ERROR}Specify what to edit: --name, --slots, or --mode")
+                print(f"{self.ERROR}Specify what to edit: --name, --slots, --mode or --weight")
         else:
             print(f"{self.ERROR}Unknown edit type: {edit_type}")
     
@@ -450,7 +474,12 @@ class ECHTableFramework:
         
         elif delete_type == "load":
             name = args[1]
-            if self.loads.delete(name):
+            try:
+                deleted = self.loads.delete(name)
+            except ValueError as e:
+                print(f"{self.ERROR}{e}")
+                return
+            if deleted:
                 print(f"{self.INFO}Load deleted: {name}")
             else:
                 print(f"{self.ERROR}Load not found: {name}")
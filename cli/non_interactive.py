@@ -5,21 +5,100 @@ Fast command-line interface for quick operations
 
 import sys
 import json
-from core.slots import SlotManager
+import time
+from core.slots import SlotManager, flush_pending_usage
 from core.variables import VariableManager
-from core.loads import LoadManager
-from core.executor import CommandExecutor
+from core.loads import LoadManager, DEFAULT_LOAD_WORKERS
+from core.executor import CommandExecutor, RunContext
+from core.scheduler import Throttle
+from core.captures import parse_capture, compile_captures, line_feeder
+from core.plan import parse_entries
+from core.sweep import parse_sweep, format_table, DEFAULT_SWEEP_WORKERS
+from core.storage import StorageManager
+from core.listing import write_ndjson
+from core.profiling import profiler, record
+from core.memtrace import memtracer
+from core.metrics import metrics_sink
+from core.history import run_history, read_stats, rebuild, report, SECTIONS
+from core.objects import run_outputs, keep_outputs, RunOutputs
+from core.diff import select_runs, diff_runs
 from cli.parser import parse_echt_args
+from cli.progress import progress_dashboard
 
-def main():
+def listing_options(args):
+    """Collect page options from parsed list arguments"""
+    return {
+        "offset": args.offset,
+        "limit": args.limit,
+        "sort": args.sort,
+        "pattern": args.pattern,
+        "reverse": args.reverse
+    }
+
+def run_slot(slots, identifier, params, save_captures):
+    """Run one slot with its captures; returns the exit code"""
+    slot = slots.get(identifier) or slots.find_by_name(identifier)
+    if not slot:
+        print(f"[!] Slot not found: {identifier}")
+        return 1
+    
+    # Prepare and execute command
+    command = slots.prepare_command(slot["id"], params)
+    if not command:
+        print(f"[!] Could not prepare command for slot {identifier}")
+        return 1
+    
+    print(f"[+] Running slot: {slot['name']}")
+    captures = compile_captures(slot.get("captures"))
+    context = RunContext(metrics=metrics_sink(), history=run_history(), outputs=run_outputs())
+    step = context.label(command, slot)
+    result = CommandExecutor.run(command, context, line_feeder(captures), step)
+    context.flush()
+    for capture in captures:
+        if capture.value is not None:
+            if save_captures:
+                slots.variables.set(capture.var, capture.value)
+            print(f"[+] Captured @{capture.var} = {capture.value}")
+    if not result["success"]:
+        print("[!] Command failed")
+        return 1
+    return 0
+
+def main(started=None):
     """
     Main entry point for non-interactive CLI
     
+    Args:
+        started: perf_counter() taken before imports, for --profile
+    
     Returns:
         int: Exit code (0 for success, 1 for error)
     """
+    parsing = time.perf_counter()
     args = parse_echt_args()
     
+    if args.profile or args.profile_out:
+        profiler.enable(cprofile=bool(args.profile_out))
+        if started is not None:
+            profiler.started = started
+            record("imports", parsing - started)
+        record("parse_echt_args", time.perf_counter() - parsing)
+    if args.memtrace:
+        memtracer.enable()
+    
+    try:
+        return run_command(args)
+    finally:
+        # Batched usage would otherwise be written at exit, after the reports
+        flush_pending_usage()
+        memtracer.report()
+        if profiler.enabled:
+            profiler.report()
+            if args.profile_out and profiler.dump(args.profile_out):
+                print(f"[*] cProfile stats written to {args.profile_out}", file=sys.stderr)
+
+def run_command(args):
+    """Execute parsed echt arguments; returns the exit code"""
     if not args.command:
         print("Error: No command specified. Use 'echt --help' for usage.")
         return 1
@@ -32,27 +111,40 @@ def main():
             if args.slot_cmd == "create":
                 slot_id = slots.create(args.command, args.name)
                 print(f"[+] Slot created: {slot_id} ({args.name})")
-                
+            
             elif args.slot_cmd == "run":
-                # Find slot
+                return run_slot(slots, args.identifier, args.params, args.save_captures)
+            
+            elif args.slot_cmd == "capture":
                 slot = slots.get(args.identifier) or slots.find_by_name(args.identifier)
                 if not slot:
                     print(f"[!] Slot not found: {args.identifier}")
                     return 1
                 
-                # Prepare and execute command
-                command = slots.prepare_command(slot["id"], args.params)
-                if not command:
-                    print(f"[!] Could not prepare command for slot {args.identifier}")
-                    return 1
-                
-                result = CommandExecutor.execute(command)
-                if not result["success"]:
-                    print(f"[!] Command failed")
-                    return 1
-                
+                captures = slot.get("captures", [])
+                if args.clear:
+                    slots.set_captures(slot["id"], [])
+                    print(f"[+] Captures cleared: {slot['name']}")
+                elif args.spec:
+                    try:
+                        spec = parse_capture(args.spec)
+                    except ValueError as e:
+                        print(f"[!] {e}")
+                        return 1
+                    captures = [capture for capture in captures if capture["var"] != spec["var"]] + [spec]
+                    slots.set_captures(slot["id"], captures)
+                    print(f"[+] Capture added: {slot['name']} -> @{spec['var']} = {spec['selector']}")
+                else:
+                    for capture in captures:
+                        print(f"@{capture['var']} = {capture['selector']}")
+            
             elif args.slot_cmd == "list":
-                slots_list = slots.list_all()
+                slots_page = slots.page(**listing_options(args))
+                if args.ndjson:
+                    write_ndjson(slots_page)
+                    return 0
+                
+                slots_list = list(slots_page)
                 if not slots_list:
                     print("[*] No slots found")
                 else:
@@ -61,7 +153,7 @@ def main():
                     for slot in slots_list:
                         cmd_preview = slot["command"][:30] + "..." if len(slot["command"]) > 30 else slot["command"]
                         print(f"{slot['id']:<3} {slot['name']:<15} {cmd_preview}")
-                
+            
             elif args.slot_cmd == "delete":
                 if slots.delete(args.identifier):
                     print(f"[+] Slot deleted: {args.identifier}")
@@ -77,14 +169,19 @@ def main():
                 vars.set(args.name, args.value)
                 clean_name = args.name.lstrip('@')
                 print(f"[+] Variable set: @{clean_name} = {args.value}")
-                
+            
             elif args.var_cmd == "get":
                 value = vars.get(args.name)
                 clean_name = args.name.lstrip('@')
                 print(f"@{clean_name} = {value}")
-                
+            
             elif args.var_cmd == "list":
-                vars_list = vars.list_all()
+                vars_page = vars.page(**listing_options(args))
+                if args.ndjson:
+                    write_ndjson(vars_page)
+                    return 0
+                
+                vars_list = list(vars_page)
                 if not vars_list:
                     print("[*] No variables found")
                 else:
@@ -92,7 +189,7 @@ def main():
                     print("-" * 40)
                     for var in vars_list:
                         print(f"{var['name']:<15} {var['value']}")
-                
+            
             elif args.var_cmd == "delete":
                 if vars.delete(args.name):
                     clean_name = args.name.lstrip('@')
@@ -107,25 +204,73 @@ def main():
             
             if args.load_cmd == "create":
                 # Parse slot IDs
-                slot_ids = [int(x.strip()) for x in args.slots.split(',')]
-                loads.create_load(args.name, slot_ids, args.mode)
+                slot_ids = parse_entries(args.slots)
+                try:
+                    loads.create_load(args.name, slot_ids, args.mode, args.weight)
+                except ValueError as e:
+                    print(f"[!] {e}")
+                    return 1
                 print(f"[+] Load created: {args.name} (slots: {slot_ids}, mode: {args.mode})")
-                
+            
             elif args.load_cmd == "run":
                 load = loads.get(args.name)
                 if not load:
                     print(f"[!] Load not found: {args.name}")
                     return 1
                 
-                print(f"[+] Running load: {args.name}")
-                print(f"[*] Slots: {load['slot_ids']}")
-                print(f"[*] Mode: {load['mode']}")
+                key = args.key
+                if (args.per_key or args.rate) and not key:
+                    key = "@target"
+                throttle = Throttle(key, args.per_key, args.rate, args.burst)
+                if args.workers is not None and args.workers < 1:
+                    print(f"[!] --workers must be at least 1: {args.workers}")
+                    return 1
                 
-                # TODO: Implement load execution
-                print("[*] Load execution coming soon...")
+                if args.sweep:
+                    try:
+                        sweeps = [parse_sweep(spec) for spec in args.sweep]
+                    except ValueError as e:
+                        print(f"[!] {e}")
+                        return 1
+                    
+                    result = loads.sweep_load(
+                        args.name, SlotManager(), sweeps, throttle=throttle,
+                        max_workers=args.workers or DEFAULT_SWEEP_WORKERS, trace=args.trace, metrics=args.metrics
+                    )
+                    if result.get("rows"):
+                        print()
+                        print("\n".join(format_table(result["rows"], [name for name, values in sweeps])))
+                    if not result["success"]:
+                        print(f"[!] Load execution failed: {result.get('error', 'Unknown error')}")
+                        return 1
+                    return 1 if any(row["failed"] for row in result["rows"]) else 0
                 
+                print(f"[+] Running load: {args.name}")
+                dashboard = None if args.no_progress else progress_dashboard(load)
+                if dashboard:
+                    dashboard.start()
+                try:
+                    result = loads.execute_load(
+                        args.name, SlotManager(), context=dashboard and dashboard.context, throttle=throttle,
+                        save_captures=args.save_captures, trace=args.trace, metrics=args.metrics,
+                        max_workers=args.workers or DEFAULT_LOAD_WORKERS
+                    )
+                finally:
+                    if dashboard:
+                        dashboard.stop()
+                if not result["success"]:
+                    print(f"[!] Load execution failed: {result.get('error', 'Unknown error')}")
+                    return 1
+                if not all(r["success"] for r in result["results"]):
+                    return 1
+            
             elif args.load_cmd == "list":
-                loads_list = loads.list_all()
+                loads_page = loads.page(**listing_options(args))
+                if args.ndjson:
+                    write_ndjson(loads_page)
+                    return 0
+                
+                loads_list = list(loads_page)
                 if not loads_list:
                     print("[*] No loads found")
                 else:
@@ -135,27 +280,72 @@ def main():
                         slots_str = ', '.join(map(str, load['slots']))
                         print(f"{load['name']:<15} {slots_str:<15} {load['mode']}")
         
-        # === QUICK RUN ALIAS ===
-        elif args.command == "run":
-            slots = SlotManager()
+        # === SEARCH ===
+        elif args.command == "search":
+            results = SlotManager().search(" ".join(args.terms), args.limit)
+            if not results:
+                print("[*] No matching slots")
+            else:
+                print("\nID  Name            Score  Command")
+                print("-" * 60)
+                for slot in results:
+                    cmd_preview = slot["command"][:30] + "..." if len(slot["command"]) > 30 else slot["command"]
+                    print(f"{slot['id']:<3} {slot['name']:<15} {slot['score']:<6.2f} {cmd_preview}")
+        
+        # === STATISTICS ===
+        elif args.command == "stats":
+            if args.section == "rebuild":
+                count = rebuild(slots=SlotManager().list_all())
+                print(f"[+] Rebuilt run statistics from {count} history records")
+                return 0
             
-            # Find slot
-            slot = slots.get(args.identifier) or slots.find_by_name(args.identifier)
+            stats = read_stats()
+            slots = SlotManager()
+            for section in [args.section] if args.section else SECTIONS:
+                print()
+                print("\n".join(report(section, stats, slots, args.days if section == "loads" else args.limit)))
+        
+        # === OUTPUT DIFF ===
+        elif args.command == "diff":
+            slots = SlotManager()
+            slot = slots.get(args.slot) or slots.find_by_name(args.slot)
             if not slot:
-                print(f"[!] Slot not found: {args.identifier}")
+                print(f"[!] Slot not found: {args.slot}")
                 return 1
             
-            # Prepare and execute command
-            command = slots.prepare_command(slot["id"], args.params)
-            if not command:
-                print(f"[!] Could not prepare command for slot {args.identifier}")
-                return 1
-            
-            print(f"[+] Running slot: {slot['name']}")
-            result = CommandExecutor.execute(command)
-            if not result["success"]:
-                print(f"[!] Command failed")
+            outputs = RunOutputs(keep_outputs())
+            try:
+                old, new = select_runs(outputs.runs(slot), args.run_a, args.run_b)
+                changed = False
+                for line in diff_runs(outputs.store, old, new, args.context):
+                    print(line)
+                    changed = True
+            except ValueError as e:
+                print(f"[!] {e}")
+                if not outputs.keep:
+                    print("[*] Outputs are only stored when config.json sets \"keep_outputs\"")
                 return 1
+            if not changed:
+                print(f"[*] Runs {old['run']} and {new['run']} of {slot['name']} have identical output")
+        
+        # === MAINTENANCE ===
+        elif args.command == "compact":
+            slots = SlotManager()
+            slot_count = slots.compact()
+            load_count = LoadManager().compact()
+            print(f"[+] Compacted: {slot_count} slot and {load_count} load tombstones removed")
+            removed, freed = RunOutputs(keep_outputs()).compact(slots.list_all())
+            if removed:
+                print(f"[+] Stored outputs: {removed} unreferenced objects removed ({freed // 1024} KB)")
+        
+        elif args.command == "export":
+            StorageManager().export(args.file)
+            if args.file != "-":
+                print(f"[+] Exported to {args.file}")
+        
+        # === QUICK RUN ALIAS ===
+        elif args.command == "run":
+            return run_slot(SlotManager(), args.identifier, args.params, args.save_captures)
         
         # === QUICK SET ALIAS ===
         elif args.command == "set":
@@ -165,7 +355,7 @@ def main():
             print(f"[+] Set: @{clean_name} = {args.value}")
         
         return 0
-        
+    
     except Exception as e:
         print(f"[!] Error: {e}")
         return 1
@@ -5,6 +5,15 @@ Parses command-line arguments
 
 import argparse
 
+def add_listing_args(parser, sort_choices, default_sort=None):
+    """Add pagination, filter, sort and NDJSON options to a list command"""
+    parser.add_argument("--limit", type=int, help="Show at most N entries")
+    parser.add_argument("--offset", type=int, default=0, help="Skip the first N entries")
+    parser.add_argument("--filter", dest="pattern", help="Only entries containing this text")
+    parser.add_argument("--sort", choices=sort_choices, default=default_sort, help="Sort field")
+    parser.add_argument("--desc", dest="reverse", action="store_true", help="Reverse sort order")
+    parser.add_argument("--ndjson", action="store_true", help="Stream entries as newline-delimited JSON")
+
 def parse_echt_args():
     """Parse command-line arguments for echt command"""
     parser = argparse.ArgumentParser(
@@ -13,6 +22,11 @@ def parse_echt_args():
         epilog="Example: echt run 1 10.10.10.1"
     )
     
+    parser.add_argument("--profile", action="store_true", help="Print a timing breakdown of each phase")
+    parser.add_argument("--profile-out", metavar="FILE", help="Also write cProfile stats to FILE (implies --profile)")
+    parser.add_argument("--memtrace", action="store_true",
+                        help="Report allocation sites and memory growth between phases (tracemalloc)")
+    
     subparsers = parser.add_subparsers(dest="command", help="Commands")
     
     # Slot commands
@@ -26,8 +40,15 @@ def parse_echt_args():
     run_slot = slot_sub.add_parser("run", help="Run slot")
     run_slot.add_argument("identifier", help="Slot ID or name")
     run_slot.add_argument("params", nargs="*", help="Extra parameters")
+    run_slot.add_argument("--save-captures", action="store_true", help="Store captured values as variables")
     
-    slot_sub.add_parser("list", help="List all slots")
+    capture_slot = slot_sub.add_parser("capture", help="Capture a value from slot output into a variable")
+    capture_slot.add_argument("identifier", help="Slot ID or name")
+    capture_slot.add_argument("spec", nargs="?", help="'@var = /regex/[g]', '@var = line:N' or '@var = last'")
+    capture_slot.add_argument("--clear", action="store_true", help="Remove all captures from the slot")
+    
+    list_slots = slot_sub.add_parser("list", help="List all slots")
+    add_listing_args(list_slots, ["id", "name", "usage", "last_used"], "id")
     
     delete_slot = slot_sub.add_parser("delete", help="Delete slot")
     delete_slot.add_argument("identifier", help="Slot ID or name")
@@ -43,7 +64,8 @@ def parse_echt_args():
     get_var = var_sub.add_parser("get", help="Get variable value")
     get_var.add_argument("name", help="Variable name")
     
-    var_sub.add_parser("list", help="List all variables")
+    list_vars = var_sub.add_parser("list", help="List all variables")
+    add_listing_args(list_vars, ["name", "value", "created"])
     
     delete_var = var_sub.add_parser("delete", help="Delete variable")
     delete_var.add_argument("name", help="Variable name")
@@ -53,19 +75,63 @@ def parse_echt_args():
     load_sub = load_parser.add_subparsers(dest="load_cmd")
     
     create_load = load_sub.add_parser("create", help="Create load")
-    create_load.add_argument("slots", help="Comma-separated slot IDs")
+    create_load.add_argument("slots", help="Comma-separated slot IDs and load:<id|name> references")
     create_load.add_argument("--name", required=True, help="Load name")
-    create_load.add_argument("--mode", choices=["serial", "parallel"], default="serial", help="Execution mode")
+    create_load.add_argument("--mode", choices=["serial", "parallel", "pipe"], default="serial", help="Execution mode")
+    create_load.add_argument("--weight", type=float,
+                             help="Share of the worker pool against other runs (default: 1)")
     
     run_load = load_sub.add_parser("run", help="Run load")
     run_load.add_argument("name", help="Load name")
-    
-    load_sub.add_parser("list", help="List all loads")
+    run_load.add_argument("--key", help="Throttle per value of this variable, e.g. @target or @target/24 "
+                                        "(taken when each command starts, so captured values count)")
+    run_load.add_argument("--per-host", dest="per_key", type=int, help="Max concurrent commands per key")
+    run_load.add_argument("--rate", type=float, help="Max command starts per second per key")
+    run_load.add_argument("--burst", type=float, help="Token bucket size for --rate")
+    run_load.add_argument("--save-captures", action="store_true", help="Store captured values as variables")
+    run_load.add_argument("--sweep", action="append", default=[], metavar="@VAR=FILE|A,B,C",
+                          help="Run once per value (repeat for a cartesian product)")
+    run_load.add_argument("--workers", type=int,
+                          help="Concurrent commands of a parallel load or sweep (default: 3, or 8 for a sweep)")
+    run_load.add_argument("--no-progress", action="store_true",
+                          help="Don't show the live status table for parallel loads")
+    run_load.add_argument("--trace", metavar="FILE", help="Write a Chrome/Perfetto trace of the run to FILE")
+    run_load.add_argument("--metrics", metavar="FILE",
+                          help="Add counters to a Prometheus textfile (default: config.json metrics_file)")
+    
+    list_loads = load_sub.add_parser("list", help="List all loads")
+    add_listing_args(list_loads, ["id", "name", "mode"], "id")
+    
+    # Search
+    search_parser = subparsers.add_parser("search", help="Search slots by name, command and variables")
+    search_parser.add_argument("terms", nargs="+", help="Search terms")
+    search_parser.add_argument("--limit", type=int, default=20, help="Maximum results")
+    
+    # Statistics
+    stats_parser = subparsers.add_parser("stats", help="Run statistics from the history rollups")
+    stats_parser.add_argument("section", nargs="?", choices=["slow", "failures", "loads", "unused", "rebuild"],
+                              help="Show one section (default: all) or rebuild the rollups from history")
+    stats_parser.add_argument("--limit", type=int, help="Show at most N slots")
+    stats_parser.add_argument("--days", type=int, default=7, help="Days of load totals (default: 7)")
+    
+    # Output diff
+    diff_parser = subparsers.add_parser("diff", help="Compare the stored outputs of two runs of a slot")
+    diff_parser.add_argument("slot", help="Slot ID or name")
+    diff_parser.add_argument("run_a", nargs="?", type=int, help="Older run (default: the run before run_b)")
+    diff_parser.add_argument("run_b", nargs="?", type=int, help="Newer run (default: the latest)")
+    diff_parser.add_argument("--context", type=int, default=3, help="Unchanged lines around changes (default: 3)")
+    
+    # Maintenance
+    subparsers.add_parser("compact", help="Drop deleted slot/load records (IDs are kept) and unused stored outputs")
+    
+    export_parser = subparsers.add_parser("export", help="Export slots, variables and loads as JSON")
+    export_parser.add_argument("file", nargs="?", default="-", help="Output file (default: stdout)")
     
     # Quick aliases
     run_parser = subparsers.add_parser("run", help="Quick run slot")
     run_parser.add_argument("identifier", help="Slot ID or name")
     run_parser.add_argument("params", nargs="*", help="Extra parameters")
+    run_parser.add_argument("--save-captures", action="store_true", help="Store captured values as variables")
     
     set_parser = subparsers.add_parser("set", help="Quick set variable")
     set_parser.add_argument("name", help="Variable name")
@@ -0,0 +1,237 @@
+"""
+ECHTABLE Progress Dashboard
+Live status of a parallel load run, redrawn in place with ANSI cursor control
+"""
+
+import sys
+import time
+import shutil
+import threading
+from core.executor import RunContext
+from core.plan import is_load_ref
+
+# Redraw at most this often on a terminal, and only when something changed
+FRAME_INTERVAL = 0.1
+
+# Elapsed times still tick this often while nothing else changes
+IDLE_REDRAW = 1.0
+
+# Status line interval when stdout is not a terminal
+PLAIN_INTERVAL = 5.0
+
+RESET = "\033[0m"
+STATE_COLORS = {
+    "queued": "\033[90m",
+    "running": "\033[94m",
+    "done": "\033[92m",
+    "failed": "\033[91m"
+}
+
+# Running rows first, then the most recent finishes, then what's still waiting
+STATE_ORDER = {"running": 0, "failed": 1, "done": 2, "queued": 3}
+
+def _size(count):
+    """Compact byte count"""
+    for unit in ("B", "KB", "MB"):
+        if count < 1024:
+            return f"{count:.0f}{unit}" if unit == "B" else f"{count:.1f}{unit}"
+        count /= 1024
+    return f"{count:.1f}GB"
+
+def _duration(seconds):
+    """Compact elapsed time"""
+    if seconds is None:
+        return "-"
+    if seconds < 60:
+        return f"{seconds:.1f}s"
+    return f"{int(seconds // 60)}m{int(seconds % 60):02d}s"
+
+def supports(load):
+    """Whether a load's run can be followed on the dashboard"""
+    return load["mode"] == "parallel" and not any(is_load_ref(entry) for entry in load["slot_ids"])
+
+class _Row:
+    """One command of the run"""
+    
+    __slots__ = ("name", "state", "started", "ended", "bytes", "changed")
+    
+    def __init__(self, name):
+        self.name = name
+        self.state = "queued"
+        self.started = None
+        self.ended = None
+        self.bytes = 0
+        self.changed = 0.0
+    
+    def elapsed(self, now):
+        """Seconds since the command started (None while queued)"""
+        if self.started is None:
+            return None
+        return (self.ended or now) - self.started
+
+class ProgressDashboard:
+    """Follows a run through RunContext hooks and redraws its status table
+
+    On a terminal the run's log is written above the table, so the dashboard
+    doubles as the context's output stream. Elsewhere it prints a status line
+    every few seconds and leaves output alone.
+    """
+    
+    def __init__(self, title, stream=None):
+        self.title = title
+        self.stream = stream or sys.stdout
+        self.tty = self.stream.isatty()
+        self.rows = []
+        self.waiting = {}
+        self.active = {}
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = None
+        self.began = time.monotonic()
+        self.pending = []
+        self.dirty = True
+        self.drawn = 0
+        self.last_draw = 0.0
+        self.context = RunContext(output=self if self.tty else None, name=title, progress=self)
+    
+    # --- RunContext hooks (called from worker threads) ---
+    
+    def queued(self, step, slot):
+        """A slot's command was prepared as step"""
+        with self.lock:
+            row = _Row(slot["name"])
+            self.rows.append(row)
+            self.waiting[step] = row
+            self.dirty = True
+    
+    def started(self, step, command):
+        """A command's process was spawned on the calling worker"""
+        now = time.monotonic()
+        with self.lock:
+            row = self.waiting.pop(step, None)
+            if row is None:
+                row = _Row(command)
+                self.rows.append(row)
+            row.state = "running"
+            row.started = row.changed = now
+            self.active[threading.get_ident()] = row
+            self.dirty = True
+    
+    def output(self, size):
+        """Bytes of output arrived for the calling worker's command"""
+        row = self.active.get(threading.get_ident())
+        if row:
+            row.bytes += size
+            self.dirty = True
+    
+    def finished(self, step, returncode):
+        """The calling worker's command exited"""
+        now = time.monotonic()
+        with self.lock:
+            row = self.active.pop(threading.get_ident(), None)
+            if row:
+                row.state = "done" if returncode == 0 else "failed"
+                row.ended = row.changed = now
+                self.dirty = True
+    
+    # --- output stream for the run's log (terminal mode) ---
+    
+    def write(self, text):
+        """Queue log text to print above the next frame"""
+        with self.lock:
+            self.pending.append(text)
+            self.dirty = True
+        return len(text)
+    
+    def flush(self):
+        """Nothing to do; text is written with the next frame"""
+    
+    # --- drawing ---
+    
+    def summary(self, now):
+        """One-line totals with throughput and ETA"""
+        counts = {state: 0 for state in STATE_ORDER}
+        total_bytes = 0
+        for row in self.rows:
+            counts[row.state] += 1
+            total_bytes += row.bytes
+        finished = counts["done"] + counts["failed"]
+        elapsed = max(now - self.began, 1e-6)
+        rate = finished / elapsed
+        remaining = len(self.rows) - finished
+        eta = remaining / rate if rate and remaining else None
+        return (
+            f"[*] {self.title}: {finished}/{len(self.rows)} finished, {counts['failed']} failed, "
+            f"{counts['running']} running | {rate:.1f} cmd/s, {_size(total_bytes / elapsed)}/s | "
+            f"{_size(total_bytes)} | {_duration(elapsed)} elapsed"
+            + (f", ETA {_duration(eta)}" if eta is not None else "")
+        )
+    
+    def table(self, now, limit):
+        """Status rows, capped at limit lines"""
+        rows = sorted(self.rows, key=lambda row: (STATE_ORDER[row.state], -row.changed))
+        lines = [f"  {'State':<8} {'Slot':<24} {'Elapsed':>9} {'Output':>9}"]
+        for row in rows[:limit]:
+            color = STATE_COLORS[row.state]
+            lines.append(f"  {color}{row.state:<8}{RESET} {row.name[:24]:<24} "
+                         f"{_duration(row.elapsed(now)):>9} {_size(row.bytes):>9}")
+        if len(rows) > limit:
+            lines.append(f"  ... {len(rows) - limit} more")
+        return lines
+    
+    def draw(self, final=False):
+        """Redraw the table in place, printing queued log text above it"""
+        now = time.monotonic()
+        with self.lock:
+            pending, self.pending = self.pending, []
+            self.dirty = False
+            size = shutil.get_terminal_size()
+            # Wrapped lines would throw off the cursor movement, so keep them to one row each
+            lines = [self.summary(now)[:size.columns]] + self.table(now, max(size.lines - 6, 3))
+        
+        out = self.stream
+        if self.drawn:
+            # Back to the first line of the previous frame and clear to the end of screen
+            out.write(f"\033[{self.drawn}F\033[J")
+        text = "".join(pending)
+        if text:
+            out.write(text if text.endswith("\n") else text + "\n")
+        out.write("\n".join(lines) + "\n")
+        out.flush()
+        self.drawn = 0 if final else len(lines)
+        self.last_draw = now
+    
+    def _run(self):
+        """Redraw loop of the background thread"""
+        interval = FRAME_INTERVAL if self.tty else PLAIN_INTERVAL
+        while not self.stopped.wait(interval):
+            if not self.tty:
+                with self.lock:
+                    line = self.summary(time.monotonic())
+                print(line, file=self.stream, flush=True)
+            elif self.dirty or (self.active and time.monotonic() - self.last_draw >= IDLE_REDRAW):
+                self.draw()
+    
+    def start(self):
+        """Begin redrawing in the background"""
+        self.began = time.monotonic()
+        self.thread = threading.Thread(target=self._run, name="echtable-progress", daemon=True)
+        self.thread.start()
+    
+    def stop(self):
+        """Stop redrawing and leave the final state on screen"""
+        self.stopped.set()
+        if self.thread:
+            self.thread.join()
+        if self.tty:
+            self.draw(final=True)
+        else:
+            with self.lock:
+                line = self.summary(time.monotonic())
+            print(line, file=self.stream, flush=True)
+
+def progress_dashboard(load, stream=None):
+    """Dashboard for a load run, or None if its mode can't be followed"""
+    if not load or not supports(load):
+        return None
+    return ProgressDashboard(load["name"], stream)
@@ -0,0 +1,107 @@
+"""
+ECHTABLE Output Captures
+Extracts values from streamed slot output into variables
+"""
+
+import re
+from collections import deque
+
+CAPTURE_PATTERN = re.compile(r"^\s*@?(\w+)\s*=\s*(.+?)\s*$")
+
+def parse_capture(text):
+    """Parse '@var = <selector>' into {"var", "selector"} (raises ValueError)"""
+    match = CAPTURE_PATTERN.match(text)
+    if not match:
+        raise ValueError("Expected: @var = /regex/[g] | line:N | last")
+    
+    spec = {"var": match.group(1), "selector": match.group(2)}
+    Capture(spec)
+    return spec
+
+class Capture:
+    """Streaming extractor for one capture spec
+
+    Selectors:
+      /regex/     first match (group 1 if the pattern has groups)
+      /regex/g    every distinct match, comma-separated
+      line:N      Nth line of output (negative counts from the end)
+      last        last non-empty line
+    """
+    
+    def __init__(self, spec):
+        self.var = spec["var"]
+        self.selector = selector = spec["selector"]
+        self.regex = None
+        self.all = False
+        self.line_number = None
+        self.matches = []
+        self.value = None
+        self.seen = 0
+        
+        if selector.startswith("/") and (selector.endswith("/") or selector.endswith("/g")) and len(selector) > 2:
+            self.all = selector.endswith("/g")
+            pattern = selector[1:-2] if self.all else selector[1:-1]
+            try:
+                self.regex = re.compile(pattern)
+            except re.error as e:
+                raise ValueError(f"Bad capture regex {pattern!r}: {e}")
+        elif selector.startswith("line:"):
+            try:
+                self.line_number = int(selector[5:])
+            except ValueError:
+                raise ValueError(f"Bad line selector: {selector}")
+            if self.line_number == 0:
+                raise ValueError("Line numbers start at 1")
+            if self.line_number < 0:
+                # Only the tail we might need is kept
+                self.tail = deque(maxlen=-self.line_number)
+        elif selector != "last":
+            raise ValueError(f"Unknown capture selector: {selector}")
+    
+    @property
+    def done(self):
+        """Whether more output can no longer change the value"""
+        if self.regex is not None:
+            return not self.all and self.value is not None
+        return self.line_number is not None and self.line_number > 0 and self.value is not None
+    
+    def feed(self, line):
+        """Consume one line of output (without its newline)"""
+        if self.done:
+            return
+        self.seen += 1
+        
+        if self.regex is not None:
+            for match in self.regex.finditer(line):
+                found = match.group(1) if self.regex.groups else match.group(0)
+                if not self.all:
+                    self.value = found
+                    return
+                if found not in self.matches:
+                    self.matches.append(found)
+            if self.matches:
+                self.value = ",".join(self.matches)
+        elif self.line_number is None:
+            if line.strip():
+                self.value = line.strip()
+        elif self.line_number > 0:
+            if self.seen == self.line_number:
+                self.value = line.strip()
+        else:
+            self.tail.append(line.strip())
+            if len(self.tail) == self.tail.maxlen:
+                self.value = self.tail[0]
+
+def compile_captures(specs):
+    """Fresh extractors for a slot's capture specs"""
+    return [Capture(spec) for spec in specs or ()]
+
+def line_feeder(captures):
+    """One on_line callback feeding every extractor, or None without captures"""
+    if not captures:
+        return None
+    
+    def feed(line):
+        for capture in captures:
+            capture.feed(line)
+    return feed
@@ -0,0 +1,148 @@
+"""
+ECHTABLE Output Diff
+Line diff between stored runs that only reads the chunks that differ
+"""
+
+import zlib
+import difflib
+
+# Unchanged lines shown around each change
+CONTEXT = 3
+
+# Differing regions bigger than this (bytes per side) are compared as sets of
+# lines rather than aligned, which keeps memory bounded on unrelated outputs
+ALIGN_LIMIT = 2 * 1024 * 1024
+
+def _lines(store, chunks):
+    """Decoded lines of consecutive chunks, reading one chunk at a time"""
+    partial = b""
+    for digest, size in chunks:
+        lines = (partial + store.get(digest)).split(b"\n")
+        partial = lines.pop()
+        for line in lines:
+            yield line.decode("utf-8", "replace")
+    if partial:
+        yield partial.decode("utf-8", "replace")
+
+def _count(store, chunks):
+    """Lines in consecutive chunks"""
+    return sum(store.get(digest).count(b"\n") for digest, size in chunks)
+
+def _range(start, length):
+    """Unified diff range: 1-based start and length, as diff prints them"""
+    beginning = start + 1
+    if length == 1:
+        return f"{beginning}"
+    if not length:
+        beginning -= 1
+    return f"{beginning},{length}"
+
+def _hunks(old, new, old_start, new_start, context):
+    """Unified hunks for two lists of lines starting at the given line offsets"""
+    matcher = difflib.SequenceMatcher(None, old, new, autojunk=False)
+    for group in matcher.get_grouped_opcodes(context):
+        # Chunks can differ only in where they were cut
+        if all(tag == "equal" for tag, i1, i2, j1, j2 in group):
+            continue
+        first, last = group[0], group[-1]
+        yield (f"@@ -{_range(old_start + first[1], last[2] - first[1])} "
+               f"+{_range(new_start + first[3], last[4] - first[3])} @@")
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                for line in old[i1:i2]:
+                    yield " " + line
+                continue
+            for line in old[i1:i2]:
+                yield "-" + line
+            for line in new[j1:j2]:
+                yield "+" + line
+
+def _unordered(store, old, new, old_start, new_start):
+    """Lines found on only one side of two large regions; returns their line counts"""
+    yield f"@@ -{old_start + 1} +{new_start + 1} @@ large change, lines compared without order"
+    new_hashes = {hash(line) for line in _lines(store, new)}
+    old_hashes = set()
+    old_count = new_count = 0
+    for line in _lines(store, old):
+        old_count += 1
+        old_hashes.add(hash(line))
+        if hash(line) not in new_hashes:
+            yield "-" + line
+    for line in _lines(store, new):
+        new_count += 1
+        if hash(line) not in old_hashes:
+            yield "+" + line
+    return old_count, new_count
+
+def diff_outputs(store, old_digest, new_digest, context=CONTEXT):
+    """Unified diff hunks between two stored outputs (nothing if they're identical)
+
+    Both chunk lists are aligned by digest first; chunks they share are
+    skipped without being read for anything but their line count, and only
+    the regions in between are decompressed and diffed line by line.
+    """
+    if old_digest == new_digest:
+        return
+    old = store.manifest(old_digest)["chunks"]
+    new = store.manifest(new_digest)["chunks"]
+    matcher = difflib.SequenceMatcher(None, [chunk[0] for chunk in old], [chunk[0] for chunk in new],
+                                      autojunk=False)
+    old_line = new_line = 0
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            lines = _count(store, old[i1:i2])
+            old_line += lines
+            new_line += lines
+            continue
+        
+        old_size = sum(size for digest, size in old[i1:i2])
+        new_size = sum(size for digest, size in new[j1:j2])
+        if old_size > ALIGN_LIMIT or new_size > ALIGN_LIMIT:
+            old_count, new_count = yield from _unordered(store, old[i1:i2], new[j1:j2], old_line, new_line)
+        else:
+            left = list(_lines(store, old[i1:i2]))
+            right = list(_lines(store, new[j1:j2]))
+            yield from _hunks(left, right, old_line, new_line, context)
+            old_count, new_count = len(left), len(right)
+        old_line += old_count
+        new_line += new_count
+
+def select_runs(runs, run_a=None, run_b=None):
+    """Pick the (old, new) runs to compare from a slot's kept runs
+
+    run_b defaults to the latest run and run_a to the one before run_b.
+    Raises ValueError naming the kept runs when a number isn't kept.
+    """
+    if len(runs) < 2:
+        raise ValueError(f"Need two stored runs to compare, found {len(runs)}")
+    numbers = [run["run"] for run in runs]
+    kept = ", ".join(str(number) for number in numbers)
+    for number in (run_a, run_b):
+        if number is not None and number not in numbers:
+            raise ValueError(f"Run {number} is not stored (kept: {kept})")
+    
+    new = numbers.index(run_b) if run_b is not None else len(runs) - 1
+    if run_a is not None:
+        old = numbers.index(run_a)
+    elif new > 0:
+        old = new - 1
+    else:
+        raise ValueError(f"No stored run before run {run_b} (kept: {kept})")
+    return runs[old], runs[new]
+
+def diff_runs(store, old, new, context=CONTEXT):
+    """Headers and hunks comparing two kept runs (nothing if the outputs are identical)
+
+    Raises ValueError if a stored object is missing or damaged.
+    """
+    hunks = diff_outputs(store, old["output"], new["output"], context)
+    try:
+        first = next(hunks, None)
+        if first is None:
+            return
+        yield f"--- run {old['run']} ({old['ts']}, exit {old['returncode']})"
+        yield f"+++ run {new['run']} ({new['ts']}, exit {new['returncode']})"
+        yield first
+        yield from hunks
+    except (OSError, zlib.error) as e:
+        raise ValueError(f"Stored output is missing or damaged: {e}")
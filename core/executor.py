@@ -3,59 +3,351 @@ ECHTABLE Command Executor
 Executes shell commands
 """
 
+import os
+import signal
+import selectors
 import subprocess
 import sys
-from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+import itertools
+from itertools import repeat
+from core.scheduler import get_scheduler, INTERACTIVE, Throttle
+from core.profiling import profiler, record
+
+# Exit statuses of a stage killed by SIGPIPE: signalled directly, or as bash reports it
+BROKEN_PIPE = (-signal.SIGPIPE, 128 + signal.SIGPIPE)
+
+def _ignore_line(line):
+    """on_line callback that discards lines"""
+
+class RunContext:
+    """Shared state for one run: where output goes and which processes are live"""
+    
+    def __init__(self, output=None, isolate=False, priority=INTERACTIVE, weight=1, name="run", throttle=None,
+                 tracer=None, metrics=None, history=None, progress=None, outputs=None):
+        self.output = output
+        self.isolate = isolate
+        self.priority = priority
+        self.weight = weight
+        self.name = name
+        self.throttle = throttle or Throttle()
+        self.tracer = tracer
+        self.metrics = metrics
+        self.history = history
+        self.progress = progress
+        self.outputs = outputs
+        self.load = None
+        self.labels = {}
+        self.step_ids = itertools.count(1)
+        self.busy = 0.0
+        self.workers = set()
+        self.created = time.perf_counter()
+        self.cancelled = False
+        self.total = 0
+        self.completed = 0
+        self.processes = {}
+        self.lock = threading.Lock()
+    
+    @property
+    def stdout(self):
+        """Stream for output of this run"""
+        return self.output or sys.stdout
+    
+    @property
+    def stderr(self):
+        """Stream for errors of this run"""
+        return self.output or sys.stderr
+    
+    def log(self, message, error=False):
+        """Print a status line to this run's output"""
+        print(message, file=self.stderr if error else self.stdout, flush=True)
+    
+    def started(self, process, command, step=None):
+        """Track a spawned process"""
+        with self.lock:
+            self.processes[process.pid] = (process, command)
+        if self.progress:
+            self.progress.started(step, command)
+    
+    def finished(self, process):
+        """Stop tracking a process once it exits"""
+        with self.lock:
+            self.processes.pop(process.pid, None)
+            self.completed += 1
+    
+    def running_commands(self):
+        """Commands currently executing"""
+        with self.lock:
+            return [command for process, command in self.processes.values()]
+    
+    def flow(self, max_active=None):
+        """Open a queue on the shared scheduler for this run"""
+        return get_scheduler().flow(self.name, self.priority, self.weight, max_active, self.throttle)
+    
+    def submit(self, flow, key, fn, *args):
+        """Queue fn on flow, timing the queue wait when tracing or collecting metrics"""
+        if self.tracer is None and self.metrics is None:
+            return flow.submit_keyed(key, fn, *args)
+        return flow.submit_keyed(key, self._timed, time.perf_counter(), fn, *args)
+    
+    def _timed(self, queued_at, fn, *args):
+        """Run fn on a worker, recording its queue wait and busy time"""
+        started = time.perf_counter()
+        if self.tracer:
+            self.tracer.queued(queued_at, started)
+        try:
+            return fn(*args)
+        finally:
+            if self.metrics:
+                busy = time.perf_counter() - started
+                self.metrics.waited(self.load or "", started - queued_at)
+                self.metrics.busy(self.load or "", busy)
+                with self.lock:
+                    self.busy += busy
+                    self.workers.add(threading.get_ident())
+    
+    @property
+    def recording(self):
+        """Whether finished commands are reported anywhere"""
+        return (self.metrics is not None or self.history is not None or self.progress is not None
+                or self.outputs is not None)
+    
+    def label(self, command, slot):
+        """Note that a slot's command is about to be submitted; returns its step id
+
+        Pass the step id on to the executor so metrics, history, progress and
+        outputs know the slot even when several steps run the same command.
+        """
+        step = next(self.step_ids)
+        if self.recording:
+            self.labels[step] = slot
+        if self.progress:
+            self.progress.queued(step, slot)
+        return step
+    
+    def writer(self, step):
+        """Writer storing a slot step's output, or None if outputs aren't kept"""
+        if self.outputs is None or step not in self.labels:
+            return None
+        return self.outputs.writer()
+    
+    def measured(self, process, step, duration, output_bytes=None, output=None):
+        """Report a finished step to the metrics sink, run history and output store"""
+        if process.returncode is None:
+            return
+        if self.progress:
+            self.progress.finished(step, process.returncode)
+        slot = self.labels.pop(step, None)
+        if self.metrics:
+            self.metrics.command(slot["name"] if slot else "", self.load or "", process.returncode,
+                                 duration, output_bytes or 0)
+        if self.history and slot:
+            self.history.command(slot, self.load, process.returncode, duration, output_bytes, output)
+        if self.outputs and slot and output:
+            changed = self.outputs.add(slot, output, process.returncode, output_bytes)
+            if changed is not None:
+                self.log(f"[+] {slot['name']}: output changed since last run" if changed
+                         else f"[*] {slot['name']}: output unchanged since last run")
+    
+    def flush(self):
+        """Write the run's metrics, history and outputs"""
+        wall = time.perf_counter() - self.created
+        if self.metrics:
+            self.metrics.run_finished(self.load or "", self.busy, len(self.workers), wall)
+            try:
+                self.metrics.flush()
+            except OSError as e:
+                self.log(f"[!] Could not write metrics: {e}", error=True)
+        if self.history:
+            if self.load:
+                self.history.run_finished(self.load, wall)
+            try:
+                self.history.flush()
+            except OSError as e:
+                self.log(f"[!] Could not write run history: {e}", error=True)
+        if self.outputs:
+            try:
+                self.outputs.flush()
+            except OSError as e:
+                self.log(f"[!] Could not store outputs: {e}", error=True)
+    
+    def cancel(self, sig=signal.SIGTERM):
+        """Stop launching commands and signal the live ones"""
+        self.cancelled = True
+        with self.lock:
+            processes = [process for process, command in self.processes.values()]
+        
+        for process in processes:
+            try:
+                if self.isolate:
+                    # Isolated processes lead their own group, so shell children get the signal too
+                    os.killpg(process.pid, sig)
+                else:
+                    process.send_signal(sig)
+            except (ProcessLookupError, PermissionError):
+                pass
 
 class CommandExecutor:
     """Executes shell commands"""
     
     @staticmethod
-    def execute(command, capture_output=False):
-        """Execute a single command"""
+    def execute(command, capture_output=False, context=None, on_line=None, step=None):
+        """Execute a single command (on_line(line) sees each line of stdout; step from context.label())"""
+        context = context or RunContext()
+        if context.cancelled:
+            return {
+                "success": False,
+                "error": "cancelled",
+                "command": command
+            }
+        
+        writer = context.writer(step)
+        if on_line is None and (profiler.enabled or context.tracer or context.metrics or writer) and not capture_output:
+            # Stream through a pipe so the first byte of output can be timed, counted and stored
+            on_line = _ignore_line
+        
         try:
-            print(f"\n[→] Executing: {command}")
-            print("-" * 60)
+            context.log(f"\n[→] Executing: {command}")
+            context.log("-" * 60)
             
             if capture_output:
-                result = subprocess.run(
+                spawning = time.perf_counter()
+                process = subprocess.Popen(
                     command,
                     shell=True,
-                    capture_output=True,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
                     text=True,
-                    executable="/bin/bash"
+                    errors="replace",
+                    executable="/bin/bash",
+                    start_new_session=context.isolate
                 )
+                spawned = time.perf_counter()
+                record("spawn", spawned - spawning)
+                context.started(process, command, step)
+                try:
+                    if context.progress:
+                        stdout, stderr = CommandExecutor._communicate(process, context.progress.output)
+                    else:
+                        stdout, stderr = process.communicate()
+                finally:
+                    record("command", time.perf_counter() - spawned)
+                    CommandExecutor._trace(context, process, command, spawning, spawned)
+                    context.finished(process)
+                
+                elapsed = time.perf_counter() - spawned
+                if context.tracer and stdout:
+                    context.tracer.instant("output", category="output", bytes=len(stdout))
                 
-                print(result.stdout)
-                if result.stderr:
-                    print(f"STDERR: {result.stderr}", file=sys.stderr)
+                context.log(stdout)
+                if on_line:
+                    for line in stdout.splitlines():
+                        on_line(line)
+                if stderr:
+                    context.log(f"STDERR: {stderr}", error=True)
+                
+                # Reported after the output so the changed/unchanged note follows it
+                if context.recording:
+                    size = len(stdout.encode()) + len(stderr.encode())
+                    output = None
+                    if writer:
+                        writer.write(stdout)
+                        output = writer.close()
+                    context.measured(process, step, elapsed, size, output)
                 
                 return {
-                    "success": result.returncode == 0,
-                    "returncode": result.returncode,
-                    "stdout": result.stdout,
-                    "stderr": result.stderr,
+                    "success": process.returncode == 0,
+                    "returncode": process.returncode,
+                    "stdout": stdout,
+                    "stderr": stderr,
                     "command": command
                 }
-            else:
+            elif on_line:
+                # Tee stdout line by line so captures see output as it streams
+                spawning = time.perf_counter()
                 process = subprocess.Popen(
                     command,
                     shell=True,
-                    stdout=sys.stdout,
-                    stderr=sys.stderr,
-                    executable="/bin/bash"
+                    stdout=subprocess.PIPE,
+                    stderr=context.stderr,
+                    text=True,
+                    errors="replace",
+                    bufsize=1,
+                    executable="/bin/bash",
+                    start_new_session=context.isolate
                 )
-                
-                process.wait()
+                spawned = time.perf_counter()
+                record("spawn", spawned - spawning)
+                context.started(process, command, step)
+                try:
+                    out = context.stdout
+                    tracer = context.tracer
+                    counting = context.recording
+                    size = 0
+                    first = True
+                    for line in process.stdout:
+                        if first:
+                            record("first_output", time.perf_counter() - spawned)
+                            first = False
+                        if tracer:
+                            tracer.output(len(line))
+                        if counting:
+                            size += len(line.encode())
+                        if writer:
+                            writer.write(line)
+                        out.write(line)
+                        out.flush()
+                        on_line(line.rstrip("\n"))
+                except BaseException:
+                    # Reading stopped early (a capture raised, say): don't leave the command behind
+                    process.kill()
+                    raise
+                finally:
+                    process.wait()
+                    record("command", time.perf_counter() - spawned)
+                    if context.tracer:
+                        context.tracer.flush_output()
+                    CommandExecutor._trace(context, process, command, spawning, spawned)
+                    context.measured(process, step, time.perf_counter() - spawned,
+                                     size if counting else None, writer.close() if writer else None)
+                    process.stdout.close()
+                    context.finished(process)
                 
                 return {
                     "success": process.returncode == 0,
                     "returncode": process.returncode,
                     "command": command
                 }
+            else:
+                spawning = time.perf_counter()
+                process = subprocess.Popen(
+                    command,
+                    shell=True,
+                    stdout=context.stdout,
+                    stderr=context.stderr,
+                    executable="/bin/bash",
+                    start_new_session=context.isolate
+                )
+                spawned = time.perf_counter()
+                record("spawn", spawned - spawning)
+                context.started(process, command, step)
+                try:
+                    process.wait()
+                finally:
+                    record("command", time.perf_counter() - spawned)
+                    CommandExecutor._trace(context, process, command, spawning, spawned)
+                    context.measured(process, step, time.perf_counter() - spawned)
+                    context.finished(process)
                 
+                return {
+                    "success": process.returncode == 0,
+                    "returncode": process.returncode,
+                    "command": command
+                }
+        
         except Exception as e:
-            print(f"[!] Execution error: {e}", file=sys.stderr)
+            context.log(f"[!] Execution error: {e}", error=True)
             return {
                 "success": False,
                 "error": str(e),
@@ -63,29 +355,160 @@ class CommandExecutor:
             }
     
     @staticmethod
-    def execute_serial(commands):
-        """Execute commands sequentially"""
+    def _communicate(process, on_chunk):
+        """communicate() that reports the size of each chunk of output as it arrives"""
+        streams = (process.stdout, process.stderr)
+        chunks = {stream.fileno(): [] for stream in streams}
+        with selectors.DefaultSelector() as selector:
+            for fd in chunks:
+                selector.register(fd, selectors.EVENT_READ)
+            while selector.get_map():
+                for key, events in selector.select():
+                    data = os.read(key.fd, 65536)
+                    if not data:
+                        selector.unregister(key.fd)
+                        continue
+                    chunks[key.fd].append(data)
+                    on_chunk(len(data))
+        process.wait()
+        
+        # Decoded the way communicate() does it for text=True
+        texts = []
+        for stream in streams:
+            text = b"".join(chunks[stream.fileno()]).decode(stream.encoding, errors="replace")
+            texts.append(text.replace("\r\n", "\n").replace("\r", "\n"))
+            stream.close()
+        return texts
+    
+    @staticmethod
+    def _trace(context, process, command, spawning, spawned):
+        """Add spawn, run and exit events for a finished process"""
+        tracer = context.tracer
+        if tracer is None:
+            return
+        
+        label = command if len(command) <= 60 else command[:57] + "..."
+        tracer.span("spawn", tracer.at(spawning), tracer.at(spawned), category="spawn")
+        tracer.span(label, tracer.at(spawned), command=command, returncode=process.returncode)
+        tracer.instant("exit", returncode=process.returncode)
+    
+    @staticmethod
+    def pipeline(commands, context=None, steps=None):
+        """Run commands at once with each stdout wired to the next stdin through os.pipe"""
+        context = context or RunContext()
+        if context.cancelled or not commands:
+            return []
+        
+        context.log(f"\n[→] Piping: {' | '.join(commands)}")
+        context.log("-" * 60)
+        
+        started = time.perf_counter()
+        processes = []
+        stdin = None
+        try:
+            for index, command in enumerate(commands):
+                last = index == len(commands) - 1
+                read_fd, write_fd = (None, None) if last else os.pipe()
+                try:
+                    process = subprocess.Popen(
+                        command,
+                        shell=True,
+                        stdin=stdin,
+                        stdout=context.stdout if last else write_fd,
+                        stderr=context.stderr,
+                        executable="/bin/bash",
+                        start_new_session=context.isolate
+                    )
+                finally:
+                    # The children hold their own copies; ours would keep readers from seeing EOF
+                    if stdin is not None:
+                        os.close(stdin)
+                    if write_fd is not None:
+                        os.close(write_fd)
+                    stdin = read_fd
+                
+                context.started(process, command, steps[index] if steps else None)
+                processes.append((process, command))
+        except Exception as e:
+            if stdin is not None:
+                os.close(stdin)
+            context.log(f"[!] Execution error: {e}", error=True)
+            for process, command in processes:
+                process.kill()
+        
+        results = []
+        last = len(commands) - 1
+        for index, ((process, command), step) in enumerate(zip(processes, steps or repeat(None))):
+            try:
+                process.wait()
+            finally:
+                context.measured(process, step, time.perf_counter() - started)
+                context.finished(process)
+            # As in a shell without pipefail, a stage whose reader stopped early hasn't failed
+            broken_pipe = index < last and process.returncode in BROKEN_PIPE
+            results.append({
+                "success": process.returncode == 0 or broken_pipe,
+                "returncode": process.returncode,
+                "command": command
+            })
+        
+        if context.tracer:
+            tracer = context.tracer
+            tracer.span(f"pipe ({len(commands)} stages)", tracer.at(started), commands=commands,
+                        returncodes=[result["returncode"] for result in results])
+        
+        if len(results) < len(commands):
+            results.extend({"success": False, "error": "not started", "command": command}
+                           for command in commands[len(results):])
+        return results
+    
+    @staticmethod
+    def execute_pipe(commands, context=None, key=None, steps=None):
+        """Run a pipeline as one unit of work on the shared pool"""
+        context = context or RunContext()
+        flow = context.flow(max_active=1)
+        results = context.submit(flow, key, CommandExecutor.pipeline, commands, context, steps).result()
+        
+        for result in results:
+            if not result["success"]:
+                context.log(f"[!] Stage failed: {result['command']}")
+        return results
+    
+    @staticmethod
+    def run(command, context=None, on_line=None, step=None):
+        """Execute a single command on the shared worker pool"""
+        context = context or RunContext()
+        flow = context.flow(max_active=1)
+        return context.submit(flow, None, CommandExecutor.execute, command, False, context, on_line, step).result()
+    
+    @staticmethod
+    def execute_serial(commands, context=None, keys=None, on_lines=None, steps=None):
+        """Execute commands sequentially (commands may be a lazy iterable)"""
+        context = context or RunContext()
+        flow = context.flow(max_active=1)
         results = []
-        for cmd in commands:
-            result = CommandExecutor.execute(cmd, capture_output=False)
+        for cmd, key, on_line, step in zip(commands, keys or repeat(None), on_lines or repeat(None),
+                                           steps or repeat(None)):
+            if context.cancelled:
+                break
+            
+            result = context.submit(flow, key, CommandExecutor.execute, cmd, False, context, on_line, step).result()
             results.append(result)
             
             if not result["success"]:
-                print(f"[!] Command failed: {cmd}")
+                context.log(f"[!] Command failed: {cmd}")
         
         return results
     
     @staticmethod
-    def execute_parallel(commands, max_workers=3):
-        """Execute commands in parallel"""
-        results = []
-        
-        def run_command(cmd):
-            return CommandExecutor.execute(cmd, capture_output=True)
+    def execute_parallel(commands, max_workers=3, context=None, keys=None, on_lines=None, steps=None):
+        """Execute commands in parallel (keys group commands for per-host throttling)"""
+        context = context or RunContext()
+        flow = context.flow(max_active=max_workers)
         
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = [executor.submit(run_command, cmd) for cmd in commands]
-            for future in futures:
-                results.append(future.result())
-        
-        return results
+        futures = [
+            context.submit(flow, key, CommandExecutor.execute, cmd, True, context, on_line, step)
+            for cmd, key, on_line, step in zip(commands, keys or repeat(None), on_lines or repeat(None),
+                                               steps or repeat(None))
+        ]
+        return [future.result() for future in futures]
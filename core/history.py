@@ -0,0 +1,311 @@
+"""
+ECHTABLE Run History
+Append-only record of command runs plus rollups that keep statistics cheap
+"""
+
+import json
+import math
+import threading
+from datetime import datetime, timedelta
+from core.utils import data_path, atomic_write_json, file_lock, read_config
+
+HISTORY_FILE = "history.ndjson"
+STATS_FILE = "stats.json"
+STATS_VERSION = 1
+
+# Durations go into log-scale buckets, each 2**0.25 (~19%) wider than the last,
+# so any percentile is known to within ~10% from a few dozen counters per slot
+BUCKET_BASE = 2 ** 0.25
+MIN_DURATION = 0.001
+
+# Per-day load totals older than this are dropped from the rollups
+ROLLUP_DAYS = 366
+
+def bucket_index(seconds):
+    """Histogram bucket for a duration"""
+    return math.floor(math.log(max(seconds, MIN_DURATION), BUCKET_BASE))
+
+def bucket_value(index, position=0.5):
+    """Duration position of the way through a bucket, on the log scale the buckets use"""
+    return BUCKET_BASE ** (index + position)
+
+def quantile(buckets, fraction, low=None, high=None):
+    """Estimate a quantile from {bucket index: count}
+
+    The rank is interpolated within its bucket and the estimate clamped to
+    the observed low/high, so one slow run can't pull p95 below the mean.
+    """
+    total = sum(buckets.values())
+    if not total:
+        return None
+    
+    rank = fraction * total
+    seen = 0
+    indexes = sorted(buckets, key=int)
+    for index in indexes:
+        count = buckets[index]
+        if count and seen + count >= rank:
+            value = bucket_value(int(index), max(rank - seen, 0) / count)
+            break
+        seen += count
+    else:
+        value = bucket_value(int(indexes[-1]), 1.0)
+    
+    if low is not None:
+        value = max(value, low)
+    if high is not None:
+        value = min(value, high)
+    return value
+
+def _second(timestamp):
+    """ISO timestamp cut to the second, as history records are stamped ("" if unknown)"""
+    return timestamp[:19] if timestamp else ""
+
+def empty_stats():
+    """Rollups with nothing recorded"""
+    return {"version": STATS_VERSION, "slots": {}, "loads": {}}
+
+def apply(stats, record):
+    """Fold one history record into the rollups"""
+    day = record["ts"][:10]
+    if record["type"] == "command":
+        key = str(record["slot_id"])
+        slot = stats["slots"].get(key)
+        if slot is None or slot["last"] < _second(record.get("created")):
+            # IDs are reused: a rollup last run before this slot existed was another slot's
+            slot = stats["slots"][key] = {"runs": 0, "failures": 0, "seconds": 0.0, "buckets": {}}
+        slot["name"] = record["slot"]
+        slot["runs"] += 1
+        slot["failures"] += record["returncode"] != 0
+        slot["seconds"] += record["duration"]
+        slot["min"] = min(slot.get("min", record["duration"]), record["duration"])
+        slot["max"] = max(slot.get("max", record["duration"]), record["duration"])
+        slot["last"] = record["ts"]
+        index = str(bucket_index(record["duration"]))
+        slot["buckets"][index] = slot["buckets"].get(index, 0) + 1
+    elif record["type"] == "load":
+        days = stats["loads"].setdefault(record["load"], {})
+        total = days.setdefault(day, {"runs": 0, "seconds": 0.0, "failed": 0})
+        total["runs"] += 1
+        total["seconds"] += record["elapsed"]
+        total["failed"] += record["failed"]
+
+def _prune(stats, today):
+    """Drop per-day load totals past ROLLUP_DAYS"""
+    cutoff = (today - timedelta(days=ROLLUP_DAYS)).date().isoformat()
+    for name, days in list(stats["loads"].items()):
+        for day in [day for day in days if day < cutoff]:
+            del days[day]
+        if not days:
+            del stats["loads"][name]
+
+def read_stats(path=None):
+    """Current rollups (empty if none were written yet)"""
+    try:
+        with open(path or data_path(STATS_FILE), "r") as f:
+            stats = json.load(f)
+    except (OSError, ValueError):
+        return empty_stats()
+    return stats if stats.get("version") == STATS_VERSION else empty_stats()
+
+class RunHistory:
+    """Collects a run's records and appends them to history and rollups in one go"""
+    
+    def __init__(self, history_path=None, stats_path=None):
+        self.history_path = history_path or data_path(HISTORY_FILE)
+        self.stats_path = stats_path or data_path(STATS_FILE)
+        self.records = []
+        self.lock = threading.Lock()
+    
+    def command(self, slot, load, returncode, duration, output_bytes=None, output=None):
+        """Record one finished command of a slot (output: digest of its stored output)"""
+        with self.lock:
+            self.records.append({
+                "type": "command",
+                "ts": datetime.now().isoformat(timespec="seconds"),
+                "slot_id": slot["id"],
+                "slot": slot["name"],
+                "created": slot.get("created_at"),
+                "load": load,
+                "returncode": returncode,
+                "duration": round(duration, 6),
+                "bytes": output_bytes,
+                "output": output
+            })
+    
+    def run_finished(self, load, elapsed):
+        """Record a whole load run, counting the failures seen during it"""
+        with self.lock:
+            commands = [record for record in self.records if record["type"] == "command"]
+            self.records.append({
+                "type": "load",
+                "ts": datetime.now().isoformat(timespec="seconds"),
+                "load": load,
+                "elapsed": round(elapsed, 6),
+                "commands": len(commands),
+                "failed": sum(1 for record in commands if record["returncode"] != 0)
+            })
+    
+    def flush(self):
+        """Append pending records to the history file and fold them into the rollups"""
+        with self.lock:
+            records, self.records = self.records, []
+        if not records:
+            return
+        
+        lines = "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records)
+        with file_lock(self.history_path):
+            with open(self.history_path, "a") as f:
+                f.write(lines)
+        
+        with file_lock(self.stats_path):
+            stats = read_stats(self.stats_path)
+            for record in records:
+                apply(stats, record)
+            _prune(stats, datetime.now())
+            atomic_write_json(self.stats_path, stats, indent=None)
+
+def run_history():
+    """History recorder, unless config.json sets "history": false"""
+    if read_config().get("history", True) is False:
+        return None
+    return RunHistory()
+
+def rebuild(history_path=None, stats_path=None, slots=()):
+    """Recompute the rollups from the full history; returns the records read
+
+    Runs from before the creation of the slot now holding their ID (slots:
+    SlotManager records) are left out, for records that don't say which slot ran.
+    """
+    created = {slot["id"]: _second(slot.get("created_at")) for slot in slots}
+    history_path = history_path or data_path(HISTORY_FILE)
+    stats_path = stats_path or data_path(STATS_FILE)
+    stats = empty_stats()
+    count = 0
+    with file_lock(stats_path):
+        try:
+            with file_lock(history_path, exclusive=False), open(history_path, "r") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        if record["type"] == "command" and record["ts"] < created.get(record["slot_id"], ""):
+                            continue
+                        apply(stats, record)
+                    except (ValueError, KeyError, TypeError):
+                        continue
+                    count += 1
+        except FileNotFoundError:
+            pass
+        _prune(stats, datetime.now())
+        atomic_write_json(stats_path, stats, indent=None)
+    return count
+
+def slowest(stats, limit=10):
+    """Slots with the highest p95 duration"""
+    rows = [
+        {"id": int(slot_id), "name": slot["name"], "runs": slot["runs"],
+         "p50": quantile(slot["buckets"], 0.50, slot.get("min"), slot.get("max")),
+         "p95": quantile(slot["buckets"], 0.95, slot.get("min"), slot.get("max")),
+         "mean": slot["seconds"] / slot["runs"]}
+        for slot_id, slot in stats["slots"].items() if slot["runs"]
+    ]
+    rows.sort(key=lambda row: row["p95"], reverse=True)
+    return rows[:limit]
+
+def failure_rates(stats, limit=10):
+    """Slots that failed at least once, highest failure rate first"""
+    rows = [
+        {"id": int(slot_id), "name": slot["name"], "runs": slot["runs"], "failures": slot["failures"],
+         "rate": slot["failures"] / slot["runs"]}
+        for slot_id, slot in stats["slots"].items() if slot["failures"]
+    ]
+    rows.sort(key=lambda row: (row["rate"], row["failures"]), reverse=True)
+    return rows[:limit]
+
+def load_time(stats, days=7):
+    """Runs and total time per load over the last days days, busiest first"""
+    cutoff = (datetime.now() - timedelta(days=days - 1)).date().isoformat()
+    rows = []
+    for name, totals in stats["loads"].items():
+        recent = [total for day, total in totals.items() if day >= cutoff]
+        if recent:
+            rows.append({
+                "load": name,
+                "runs": sum(total["runs"] for total in recent),
+                "seconds": sum(total["seconds"] for total in recent),
+                "failed": sum(total["failed"] for total in recent)
+            })
+    rows.sort(key=lambda row: row["seconds"], reverse=True)
+    return rows
+
+def unused(stats, slots):
+    """Slots from slots (SlotManager.list_all records) that never ran"""
+    rows = []
+    for slot in slots:
+        rollup = stats["slots"].get(str(slot["id"]))
+        # A rollup last run before the slot was created belongs to a deleted slot with its ID
+        if not slot.get("usage") and (rollup is None or rollup["last"] < _second(slot.get("created_at"))):
+            rows.append(slot)
+    return rows
+
+def _seconds(value):
+    """Compact duration"""
+    if value is None:
+        return "-"
+    if value < 1:
+        return f"{value * 1000:.0f}ms"
+    if value < 120:
+        return f"{value:.1f}s"
+    return f"{value / 60:.1f}m"
+
+def format_report(section, rows):
+    """Table lines for one stats section"""
+    if section == "slow":
+        lines = [f"{'ID':<5} {'Name':<20} {'Runs':>6} {'p50':>8} {'p95':>8} {'Mean':>8}", "-" * 60]
+        lines.extend(
+            f"{row['id']:<5} {row['name'][:20]:<20} {row['runs']:>6} {_seconds(row['p50']):>8} "
+            f"{_seconds(row['p95']):>8} {_seconds(row['mean']):>8}"
+            for row in rows
+        )
+    elif section == "failures":
+        lines = [f"{'ID':<5} {'Name':<20} {'Runs':>6} {'Failed':>7} {'Rate':>7}", "-" * 50]
+        lines.extend(
+            f"{row['id']:<5} {row['name'][:20]:<20} {row['runs']:>6} {row['failures']:>7} {row['rate']:>7.1%}"
+            for row in rows
+        )
+    elif section == "loads":
+        lines = [f"{'Load':<20} {'Runs':>6} {'Failed':>7} {'Total':>9}", "-" * 45]
+        lines.extend(
+            f"{row['load'][:20]:<20} {row['runs']:>6} {row['failed']:>7} {_seconds(row['seconds']):>9}"
+            for row in rows
+        )
+    elif section == "unused":
+        lines = [f"{'ID':<5} {'Name':<20} Command", "-" * 50]
+        lines.extend(
+            f"{slot['id']:<5} {slot['name'][:20]:<20} {slot['command'][:40]}"
+            for slot in rows
+        )
+    else:
+        raise ValueError(f"Unknown stats section: {section}")
+    return lines
+
+SECTIONS = ("slow", "failures", "loads", "unused")
+
+def report(section, stats, slot_manager, number=None):
+    """Title and table lines for a stats section (number: rows, or days for loads)"""
+    if section == "slow":
+        title, rows = "Slowest slots by p95", slowest(stats, number or 10)
+    elif section == "failures":
+        title, rows = "Failure rates", failure_rates(stats, number or 10)
+    elif section == "loads":
+        days = number or 7
+        title, rows = f"Time per load, last {days} day{'s' if days != 1 else ''}", load_time(stats, days)
+    elif section == "unused":
+        rows = unused(stats, slot_manager.list_sorted())
+        title, rows = f"Never used slots ({len(rows)})", rows[:number] if number else rows
+    else:
+        raise ValueError(f"Unknown stats section: {section} (expected {', '.join(SECTIONS)})")
+    
+    if not rows:
+        return [title, "  (none)"]
+    return [title] + format_report(section, rows)
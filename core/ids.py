@@ -0,0 +1,64 @@
+"""
+ECHTABLE ID Allocator
+Tracks free record IDs so new slots and loads don't rescan the store
+"""
+
+import heapq
+
+class IdAllocator:
+    """Hands out the lowest free ID from a free list plus a high-water mark
+
+    Built once from the records, then kept up to date by allocate() and
+    release(), which also track the deleted records still in the store.
+    """
+    
+    def __init__(self, records):
+        live = []
+        self.free = []
+        for key, data in records.items():
+            if key.isdigit():
+                if data.get("deleted", False):
+                    self.free.append(int(key))
+                else:
+                    live.append(int(key))
+        self.dead = set(self.free)
+        
+        taken = sorted(live + self.free)
+        self.high_water = taken[-1] if taken else 0
+        
+        # Gaps left by compaction are free too
+        expected = 1
+        for record_id in taken:
+            self.free.extend(range(expected, record_id))
+            expected = record_id + 1
+        heapq.heapify(self.free)
+    
+    def allocate(self):
+        """Take the lowest free ID"""
+        if self.free:
+            record_id = heapq.heappop(self.free)
+            self.dead.discard(record_id)
+            return record_id
+        
+        self.high_water += 1
+        return self.high_water
+    
+    def release(self, record_id):
+        """Return the ID of a record that was just turned into a tombstone"""
+        heapq.heappush(self.free, record_id)
+        self.dead.add(record_id)
+    
+    def restore(self, record_id, deleted=False):
+        """Give back an ID from allocate() that the caller ended up not using"""
+        heapq.heappush(self.free, record_id)
+        if deleted:
+            self.dead.add(record_id)
+    
+    @property
+    def tombstones(self):
+        """Deleted records still in the store"""
+        return len(self.dead)
+    
+    def compacted(self):
+        """Note that the tombstones were dropped (their IDs stay free)"""
+        self.dead.clear()
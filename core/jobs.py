@@ -0,0 +1,158 @@
+"""
+ECHTABLE Job Control
+Runs loads and slots in the background of the interactive framework
+"""
+
+import os
+import time
+import shutil
+import signal
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from core.executor import RunContext
+from core.scheduler import BULK
+
+class Job:
+    """A load or slot run in the background"""
+    
+    def __init__(self, job_id, description, log_path):
+        self.id = job_id
+        self.description = description
+        self.log_path = log_path
+        self.output = open(log_path, "a", buffering=1)
+        self.context = RunContext(output=self.output, isolate=True, priority=BULK, name=description)
+        self.status = "queued"
+        self.result = None
+        self.future = None
+        self.started_at = None
+        self.finished_at = None
+    
+    @property
+    def done(self):
+        """Whether the job has finished"""
+        return self.status in ("done", "failed", "killed")
+    
+    @property
+    def elapsed(self):
+        """Seconds spent running so far"""
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.monotonic()) - self.started_at
+    
+    def progress(self):
+        """Short live status, e.g. '2/5 running: nmap ...'"""
+        context = self.context
+        text = f"{context.completed}/{context.total}" if context.total else ""
+        running = context.running_commands()
+        if running and not self.done:
+            text = f"{text} running: {running[0]}".strip()
+            if len(running) > 1:
+                text += f" (+{len(running) - 1} more)"
+        return text
+
+class JobManager:
+    """Shared background executor with bash-like job numbering"""
+    
+    def __init__(self, max_workers=8):
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="echtable-job")
+        self.jobs = {}
+        self.notices = []
+        self.lock = threading.Lock()
+        self.log_dir = tempfile.mkdtemp(prefix="echtable-jobs-")
+        self._next_id = 1
+    
+    def submit(self, description, func):
+        """Run func(context) in the background; it returns an execution result dict"""
+        with self.lock:
+            job_id = self._next_id
+            self._next_id += 1
+            job = Job(job_id, description, os.path.join(self.log_dir, f"job{job_id}.log"))
+            self.jobs[job_id] = job
+        
+        job.future = self.pool.submit(self._run, job, func)
+        return job
+    
+    def _run(self, job, func):
+        """Job body: run func and record the outcome"""
+        job.status = "running"
+        job.started_at = time.monotonic()
+        try:
+            job.result = func(job.context)
+            if job.context.cancelled:
+                job.status = "killed"
+            elif job.result.get("success"):
+                job.status = "done"
+            else:
+                job.status = "failed"
+        except Exception as e:
+            job.context.log(f"[!] Job error: {e}", error=True)
+            job.result = {"success": False, "error": str(e)}
+            job.status = "failed"
+        finally:
+            job.finished_at = time.monotonic()
+            job.output.flush()
+            with self.lock:
+                self.notices.append(job)
+    
+    def get(self, job_id):
+        """Look up a job by number"""
+        try:
+            return self.jobs.get(int(job_id))
+        except (TypeError, ValueError):
+            return None
+    
+    def list(self):
+        """All jobs in submission order"""
+        return list(self.jobs.values())
+    
+    def running(self):
+        """Jobs that have not finished"""
+        return [job for job in self.jobs.values() if not job.done]
+    
+    def kill(self, job_id, sig=signal.SIGTERM):
+        """Cancel a job and signal its processes"""
+        job = self.get(job_id)
+        if not job or job.done:
+            return False
+        
+        job.context.cancel(sig)
+        return True
+    
+    def wait(self, job_id=None):
+        """Block until one job (or every job) has finished"""
+        jobs = [self.get(job_id)] if job_id is not None else self.running()
+        for job in jobs:
+            if job and job.future:
+                job.future.result()
+    
+    def follow(self, job, out, poll_interval=0.2):
+        """Copy a job's output to out until it finishes"""
+        with open(job.log_path, "r") as log:
+            while True:
+                # Check before reading so the last read sees everything a finished job wrote
+                done = job.done
+                chunk = log.read()
+                if chunk:
+                    out.write(chunk)
+                    out.flush()
+                elif done:
+                    break
+                else:
+                    time.sleep(poll_interval)
+    
+    def drain_notices(self):
+        """Jobs that finished since the last call"""
+        with self.lock:
+            finished, self.notices = self.notices, []
+        return finished
+    
+    def shutdown(self):
+        """Kill running jobs and remove their logs"""
+        for job in self.running():
+            job.context.cancel()
+        self.pool.shutdown(wait=True)
+        
+        for job in self.jobs.values():
+            job.output.close()
+        shutil.rmtree(self.log_dir, ignore_errors=True)
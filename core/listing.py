@@ -0,0 +1,41 @@
+"""
+ECHTABLE Listing Helpers
+Filtering and pagination that only materialize the requested page
+"""
+
+import sys
+import json
+import heapq
+from itertools import islice
+
+def matches(pattern, *fields):
+    """Case-insensitive substring match against any field"""
+    if not pattern:
+        return True
+    pattern = pattern.lower()
+    return any(pattern in str(field).lower() for field in fields)
+
+def paginate(items, offset=0, limit=None, key=None, reverse=False):
+    """Return one page of an iterable (lazily when items are already in order)"""
+    offset = max(offset or 0, 0)
+    
+    if key is None:
+        stop = offset + limit if limit is not None else None
+        return islice(items, offset, stop)
+    
+    if limit is None:
+        return iter(sorted(items, key=key, reverse=reverse)[offset:])
+    
+    # Bounded heap: O(n log k) and only offset + limit records kept
+    select = heapq.nlargest if reverse else heapq.nsmallest
+    return iter(select(offset + limit, items, key=key)[offset:])
+
+def write_ndjson(records, out=None):
+    """Stream records as newline-delimited JSON"""
+    out = out or sys.stdout
+    count = 0
+    for record in records:
+        out.write(json.dumps(record) + "\n")
+        count += 1
+    out.flush()
+    return count
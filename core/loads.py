@@ -3,65 +3,187 @@ ECHTABLE Load Manager
 Manages load configurations
 """
 
-import os
-import json
 from datetime import datetime
+from itertools import repeat
+from collections import Counter
 from core.utils import data_path
-from core.executor import CommandExecutor
+from core.storage import JsonStore
+from core.ids import IdAllocator
+from core.listing import matches, paginate
+from core.executor import CommandExecutor, RunContext
+from core.captures import compile_captures, line_feeder
+from core.plan import ExecutionPlan, is_load_ref, LOAD_PREFIX
+from core.sweep import combinations, count_combinations, DEFAULT_SWEEP_WORKERS
+from core.tracing import Tracer
+from core.metrics import metrics_sink
+from core.history import run_history
+from core.objects import run_outputs
+from core.memtrace import checkpoint
+
+# loads.json layout: {"version": 2, "loads": {id: record}, "names": {name: id}}
+SCHEMA_VERSION = 2
+
+# Commands a parallel load runs at once unless told otherwise
+DEFAULT_LOAD_WORKERS = 3
+
+# Compact automatically once tombstones outnumber live loads (and there are enough to matter)
+COMPACT_MIN_TOMBSTONES = 64
+
+# Sort fields for page()
+SORT_KEYS = {
+    "id": lambda load: load["id"],
+    "name": lambda load: load["name"].lower(),
+    "mode": lambda load: load["mode"]
+}
+
+def migrate_loads(data):
+    """Convert a version 1 store (records under both id and name) to the current schema"""
+    records = {}
+    names = {}
+    for key, record in data.items():
+        if key.isdigit() and isinstance(record, dict):
+            records[key] = record
+            if not record.get("deleted", False):
+                names[record["name"]] = key
+    
+    return {"version": SCHEMA_VERSION, "loads": records, "names": names}
 
 class LoadManager:
     """Manages load configurations"""
     
-    def __init__(self):
+    def __init__(self, session=None):
         self.path = data_path("loads.json")
-        self._ensure_file()
+        self.store = JsonStore(self.path, session)
         self.active_load = None
+        self._ids = None
+        self._ids_generation = None
+        self.listeners = []
+        self._migrate()
     
-    def _ensure_file(self):
-        """Create loads file if missing"""
-        if not os.path.exists(self.path):
-            with open(self.path, "w") as f:
-                json.dump({}, f)
+    def add_listener(self, callback):
+        """Register callback(action, record) for "add", "remove" and "reset" changes"""
+        self.listeners.append(callback)
     
-    def create_load(self, name, slot_ids, mode="serial"):
-        """Create a new load"""
-        with open(self.path, "r") as f:
-            loads = json.load(f)
-        
-        new_id = 1
-        while str(new_id) in loads and not loads[str(new_id)].get("deleted", False):
-            new_id += 1
-        
+    def _notify(self, action, record=None):
+        """Tell listeners about a change"""
+        for callback in self.listeners:
+            callback(action, record)
+    
+    def _migrate(self):
+        """Upgrade loads.json to the current schema if needed"""
+        if self.store.read().get("version") == SCHEMA_VERSION:
+            return
+        
+        with self.store.update() as data:
+            if data.get("version") != SCHEMA_VERSION:
+                migrated = migrate_loads(data)
+                data.clear()
+                data.update(migrated)
+    
+    def _allocator(self, data):
+        """Free-ID allocator for the current store contents"""
+        generation = self.store.generation
+        if self._ids is None or self._ids_generation != generation:
+            self._ids = IdAllocator(data["loads"])
+            self._ids_generation = generation
+        return self._ids
+    
+    @staticmethod
+    def _check_name(data, name, load_id=None):
+        """Raise ValueError if name belongs to a live load other than load_id"""
+        owner = data["names"].get(name)
+        if owner is None or owner == load_id:
+            return
+        record = data["loads"].get(owner)
+        if record and not record.get("deleted", False):
+            raise ValueError(f"Load name already in use: {name} (load {owner})")
+    
+    @staticmethod
+    def _check_weight(weight):
+        """Scheduler weight as a float (raises ValueError unless it's a positive number)"""
+        try:
+            value = float(weight)
+        except (TypeError, ValueError):
+            value = 0
+        if not 0 < value < float("inf"):
+            raise ValueError(f"Load weight must be a positive number: {weight}")
+        return value
+    
+    @staticmethod
+    def _referenced_ids(loads):
+        """IDs that live loads include as 'load:<id>', whether or not that load exists"""
+        referenced = set()
+        for record in loads.values():
+            if not record.get("deleted", False):
+                for entry in record["slot_ids"]:
+                    if is_load_ref(entry) and entry[len(LOAD_PREFIX):].isdigit():
+                        referenced.add(int(entry[len(LOAD_PREFIX):]))
+        return referenced
+    
+    @staticmethod
+    def _referrers(loads, load):
+        """Names of the other live loads that include load by ID or name"""
+        refs = {f"{LOAD_PREFIX}{load['id']}", f"{LOAD_PREFIX}{load['name']}"}
+        return [
+            record["name"] for record in loads.values()
+            if not record.get("deleted", False) and record["id"] != load["id"]
+            and any(entry in refs for entry in record["slot_ids"])
+        ]
+    
+    def create_load(self, name, slot_ids, mode="serial", weight=None):
+        """Create a new load (raises ValueError if the name is taken or weight isn't positive)
+
+        weight is the load's share of the worker pool against other runs (default 1).
+        """
         mode_map = {"s": "serial", "p": "parallel"}
         final_mode = mode_map.get(mode.lower(), mode)
-        
-        loads[str(new_id)] = {
-            "id": new_id,
-            "name": name,
-            "slot_ids": slot_ids,
-            "mode": final_mode,
-            "created_at": datetime.now().isoformat(),
-            "deleted": False
-        }
-        
-        loads[name] = loads[str(new_id)]
-        
-        with open(self.path, "w") as f:
-            json.dump(loads, f, indent=2)
-        
+        if weight is not None:
+            weight = self._check_weight(weight)
+        
+        with self.store.update() as data:
+            self._check_name(data, name)
+            loads = data["loads"]
+            ids = self._allocator(data)
+            # A free ID that some load still refers to would silently become that reference
+            referenced = self._referenced_ids(loads)
+            skipped = []
+            new_id = ids.allocate()
+            while (str(new_id) in loads and not loads[str(new_id)].get("deleted", False)) or new_id in referenced:
+                skipped.append(new_id)
+                new_id = ids.allocate()
+            # Referenced IDs become usable again once the reference goes away
+            for record_id in skipped:
+                if record_id in referenced:
+                    ids.restore(record_id, deleted=str(record_id) in loads)
+            
+            loads[str(new_id)] = {
+                "id": new_id,
+                "name": name,
+                "slot_ids": slot_ids,
+                "mode": final_mode,
+                "created_at": datetime.now().isoformat(),
+                "deleted": False
+            }
+            if weight is not None:
+                loads[str(new_id)]["weight"] = weight
+            
+            data["names"][name] = str(new_id)
+            record = loads[str(new_id)]
+        
+        self._notify("add", record)
         return new_id
     
     def get(self, identifier):
         """Get load information"""
-        with open(self.path, "r") as f:
-            loads = json.load(f)
+        data = self.store.read()
+        loads = data["loads"]
         
         if str(identifier) in loads:
             return loads[str(identifier)]
         
-        for key, data in loads.items():
-            if isinstance(data, dict) and data.get("name") == identifier:
-                return data
+        load_id = data["names"].get(identifier)
+        if load_id is not None:
+            return loads.get(load_id)
         
         return None
     
@@ -73,43 +195,231 @@ class LoadManager:
             return load
         return None
     
-    def execute_load(self, identifier, slot_manager):
-        """Execute a load"""
+    @staticmethod
+    def _apply_captures(captures, scope, context):
+        """Store extracted values in the run's variable scope"""
+        for capture in captures:
+            if capture.value is not None:
+                scope.set(capture.var, capture.value)
+                context.log(f"[+] Captured @{capture.var} = {capture.value}")
+    
+    def execute_load(self, identifier, slot_manager, context=None, throttle=None, save_captures=False,
+                     trace=None, metrics=None, max_workers=DEFAULT_LOAD_WORKERS):
+        """Execute a load (throttle limits concurrency and rate per target key)
+        
+        Values captured from slot output are visible to later slots of the
+        run and only written to the variable store when save_captures is set.
+        With trace set, a Chrome trace-event timeline is written to that path.
+        Metrics go to the metrics textfile (or config.json "metrics_file").
+        """
         load = self.get(identifier)
         if not load:
             return {"success": False, "error": f"Load not found: {identifier}"}
         
+        context = context or RunContext(name=load["name"])
+        context.weight = load.get("weight", context.weight)
+        if throttle:
+            context.throttle = throttle
+        if trace:
+            context.tracer = Tracer(load["name"])
+        context.metrics = context.metrics or metrics_sink(metrics)
+        context.history = context.history or run_history()
+        context.outputs = context.outputs or run_outputs()
+        context.load = load["name"]
         slot_ids = load["slot_ids"]
         mode = load["mode"]
         
-        print(f"[*] Executing load [{load['id']}] {load['name']}")
-        print(f"[*] Slots: {slot_ids}")
-        print(f"[*] Mode: {mode}")
+        context.log(f"[*] Executing load [{load['id']}] {load['name']}")
+        context.log(f"[*] Slots: {slot_ids}")
+        context.log(f"[*] Mode: {mode}")
         
-        commands = []
-        for slot_id in slot_ids:
-            cmd = slot_manager.prepare_command(slot_id)
-            if cmd:
-                commands.append(cmd)
+        if mode not in ("serial", "parallel", "pipe"):
+            return {"success": False, "error": f"Unknown mode: {mode}"}
         
+        scope = slot_manager.variables.scope()
+        key_for = context.throttle.key_for
+        key = key_for(scope)
+        if key:
+            context.log(f"[*] Throttling by {context.throttle.key}: {key}")
+        
+        if any(is_load_ref(entry) for entry in slot_ids):
+            # Nested loads: one dependency graph, so idle workers take ready
+            # work from any sub-load while each keeps its own ordering
+            try:
+                plan = ExecutionPlan(self, slot_manager, load)
+            except ValueError as e:
+                return {"success": False, "error": str(e)}
+            context.total = len(plan.steps)
+            context.log(f"[*] Plan: {len(plan.steps)} steps")
+            results = plan.run(context, scope, key_for, max_workers)
+            return self._finish_run(context, scope, results, save_captures, trace)
+        
+        slots = [slot_manager.get(slot_id) for slot_id in slot_ids]
+        slots = [slot for slot in slots if slot and not slot.get("deleted", False)]
+        context.total = len(slots)
+        
+        # Usage is written once per run, as ExecutionPlan does
+        usage = Counter()
         executor = CommandExecutor()
         if mode == "serial":
-            results = executor.execute_serial(commands)
-        elif mode == "parallel":
-            results = executor.execute_parallel(commands)
+            current = {"captures": [], "key": None, "step": None}
+            
+            def prepared():
+                # Prepared just in time so each slot sees what earlier slots captured.
+                # zip() in execute_serial pulls the next command only after the
+                # previous one finished, which is when its captures are applied.
+                for slot in slots:
+                    cmd = slot_manager.render(slot, scope)
+                    if not cmd:
+                        continue
+                    usage[slot["id"]] += 1
+                    current["step"] = context.label(cmd, slot)
+                    # A captured @target regroups the commands that follow
+                    current["key"] = key_for(scope)
+                    current["captures"] = compile_captures(slot.get("captures"))
+                    yield cmd
+                    self._apply_captures(current["captures"], scope, context)
+            
+            def latest(field):
+                # zip() pulls these right after the command they belong to
+                while True:
+                    yield current[field]
+            
+            def feed(line):
+                for capture in current["captures"]:
+                    capture.feed(line)
+            
+            if not any(slot.get("captures") for slot in slots):
+                feed = None
+            results = executor.execute_serial(
+                prepared(), context=context, keys=latest("key"), on_lines=feed and repeat(feed),
+                steps=latest("step")
+            )
+        elif mode == "pipe":
+            # Stages run together and stream straight into each other, so there
+            # is nothing to capture from
+            if any(slot.get("captures") for slot in slots):
+                context.log("[!] Captures are ignored in pipe mode", error=True)
+            
+            commands, steps = [], []
+            for slot in slots:
+                cmd = slot_manager.render(slot, scope)
+                if cmd:
+                    usage[slot["id"]] += 1
+                    commands.append(cmd)
+                    steps.append(context.label(cmd, slot))
+            results = executor.execute_pipe(commands, context=context, key=key, steps=steps)
         else:
-            return {"success": False, "error": f"Unknown mode: {mode}"}
+            commands, captures, steps = [], [], []
+            for slot in slots:
+                cmd = slot_manager.render(slot, scope)
+                if cmd:
+                    usage[slot["id"]] += 1
+                    steps.append(context.label(cmd, slot))
+                    commands.append(cmd)
+                    captures.append(compile_captures(slot.get("captures")))
+            
+            results = executor.execute_parallel(
+                commands, max_workers=max_workers, context=context, keys=repeat(key),
+                on_lines=[line_feeder(c) for c in captures], steps=steps
+            )
+            for slot_captures in captures:
+                self._apply_captures(slot_captures, scope, context)
+        
+        slot_manager.record_usage(usage)
+        return self._finish_run(context, scope, results, save_captures, trace)
+    
+    @staticmethod
+    def _write_trace(context, path):
+        """Close the run's span and save its trace"""
+        tracer = context.tracer
+        tracer.span(f"load {tracer.name}", 0, category="load", completed=context.completed)
+        try:
+            tracer.write(path)
+            context.log(f"[*] Trace written to {path}")
+        except OSError as e:
+            context.log(f"[!] Could not write trace: {e}", error=True)
+    
+    def _finish_run(self, context, scope, results, save_captures, trace=None):
+        """Persist captures if asked and build the run result"""
+        if trace:
+            self._write_trace(context, trace)
+        context.flush()
+        checkpoint(f"load {context.load}", force=True)
+        if save_captures and scope.values:
+            scope.persist()
+            context.log(f"[+] Saved {len(scope.values)} captured variable(s)")
+        
+        if context.cancelled:
+            return {"success": False, "error": "Cancelled", "results": results, "captured": scope.values}
+        return {"success": True, "results": results, "captured": scope.values}
+    
+    def sweep_load(self, identifier, slot_manager, sweeps, context=None, throttle=None,
+                   max_workers=DEFAULT_SWEEP_WORKERS, trace=None, metrics=None):
+        """Run a load once per combination of sweeps ([(var, [values])]) on one pool
         
-        return {"success": True, "results": results}
+        Returns per-combination rows: {"values", "ok", "failed", "elapsed"}.
+        """
+        load = self.get(identifier)
+        if not load:
+            return {"success": False, "error": f"Load not found: {identifier}"}
+        
+        context = context or RunContext(name=load["name"])
+        context.weight = load.get("weight", context.weight)
+        if throttle:
+            context.throttle = throttle
+        
+        try:
+            plan = ExecutionPlan(self, slot_manager, load)
+        except ValueError as e:
+            return {"success": False, "error": str(e)}
+        if trace:
+            context.tracer = Tracer(load["name"])
+        context.metrics = context.metrics or metrics_sink(metrics)
+        context.history = context.history or run_history()
+        context.outputs = context.outputs or run_outputs()
+        context.load = load["name"]
+        
+        total = count_combinations(sweeps)
+        context.total = total * len(plan.steps)
+        context.log(f"[*] Sweeping load [{load['id']}] {load['name']}: {total} combinations x {len(plan.steps)} steps")
+        
+        # One snapshot of the stored variables shared by every combination
+        base = slot_manager.variables.get_all()
+        scopes = (slot_manager.variables.scope(values, base) for values in combinations(sweeps))
+        
+        rows = []
+        
+        def record(instance):
+            ok = sum(1 for result in instance.results if result["success"])
+            rows.append({
+                "values": {name: instance.scope.seed[name] for name, values in sweeps},
+                "ok": ok,
+                "failed": len(instance.results) - ok,
+                "elapsed": instance.elapsed
+            })
+        
+        plan.run_many(context, scopes, context.throttle.key_for, max_workers, on_done=record)
+        if trace:
+            self._write_trace(context, trace)
+        context.flush()
+        checkpoint(f"sweep {context.load}", force=True)
+        
+        # Rows arrive in completion order; report them in sweep order
+        positions = [(name, {value: i for i, value in enumerate(values)}) for name, values in sweeps]
+        rows.sort(key=lambda row: [position[row["values"][name]] for name, position in positions])
+        
+        if context.cancelled:
+            return {"success": False, "error": "Cancelled", "rows": rows}
+        return {"success": True, "rows": rows}
     
     def list_all(self):
         """List all loads"""
-        with open(self.path, "r") as f:
-            loads = json.load(f)
+        loads = self.store.read()["loads"]
         
         result = []
-        for key, data in loads.items():
-            if key.isdigit() and not data.get("deleted", False):
+        for data in loads.values():
+            if not data.get("deleted", False):
                 result.append({
                     "id": data["id"],
                     "name": data["name"],
@@ -123,91 +433,155 @@ class LoadManager:
         loads = self.list_all()
         return sorted(loads, key=lambda x: x["id"])
     
-    def edit_load(self, identifier, name=None, slot_ids=None, mode=None):
-        """Edit a load"""
+    def page(self, offset=0, limit=None, sort="id", pattern=None, reverse=False):
+        """Iterate one page of loads, filtered by pattern and ordered by sort"""
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Unknown sort field: {sort}")
+        
+        listed = iter(self.list_all())
+        if pattern:
+            listed = (load for load in listed if matches(pattern, load["name"], load["mode"]))
+        
+        return paginate(listed, offset, limit, SORT_KEYS[sort], reverse)
+    
+    def check_nesting(self, load_id, slot_ids):
+        """Raise ValueError if slot_ids would make load_id (indirectly) include itself"""
+        pending = [entry for entry in slot_ids if is_load_ref(entry)]
+        seen = set()
+        while pending:
+            load = self.get(pending.pop()[len(LOAD_PREFIX):])
+            if not load:
+                continue
+            if str(load["id"]) == str(load_id):
+                raise ValueError(f"Load cycle: {load['name']} would include itself")
+            if load["id"] not in seen:
+                seen.add(load["id"])
+                pending.extend(entry for entry in load["slot_ids"] if is_load_ref(entry))
+    
+    def edit_load(self, identifier, name=None, slot_ids=None, mode=None, weight=None):
+        """Edit a load (raises ValueError for a taken name, slot_ids nesting it in itself or a bad weight)"""
         load = self.get(identifier)
         if not load:
             return False
-        
-        load_id = load["id"]
-        
-        with open(self.path, "r") as f:
-            loads = json.load(f)
-        
-        old_name = loads[str(load_id)]["name"]
-        if old_name in loads:
-            del loads[old_name]
-        
-        if name:
-            loads[str(load_id)]["name"] = name
         if slot_ids:
-            loads[str(load_id)]["slot_ids"] = slot_ids
-        if mode:
-            mode_map = {"s": "serial", "p": "parallel"}
-            final_mode = mode_map.get(mode.lower(), mode)
-            loads[str(load_id)]["mode"] = final_mode
-        
-        new_name = name or old_name
-        loads[new_name] = loads[str(load_id)]
-        
-        with open(self.path, "w") as f:
-            json.dump(loads, f, indent=2)
+            self.check_nesting(load["id"], slot_ids)
+        if weight is not None:
+            weight = self._check_weight(weight)
         
+        load_id = str(load["id"])
+        old_record = dict(load)
+        
+        with self.store.update() as data:
+            record = data["loads"][load_id]
+            names = data["names"]
+            
+            if name:
+                self._check_name(data, name, load_id)
+                if names.get(record["name"]) == load_id:
+                    del names[record["name"]]
+                # Loads that include this one by name follow the rename
+                old_ref, new_ref = f"{LOAD_PREFIX}{record['name']}", f"{LOAD_PREFIX}{name}"
+                for other in data["loads"].values():
+                    if old_ref in other["slot_ids"]:
+                        other["slot_ids"] = [new_ref if entry == old_ref else entry for entry in other["slot_ids"]]
+                record["name"] = name
+                names[name] = load_id
+            if slot_ids:
+                record["slot_ids"] = slot_ids
+            if mode:
+                mode_map = {"s": "serial", "p": "parallel"}
+                final_mode = mode_map.get(mode.lower(), mode)
+                record["mode"] = final_mode
+            if weight is not None:
+                record["weight"] = weight
+        
+        self._notify("remove", old_record)
+        self._notify("add", record)
         return True
     
     def delete(self, identifier):
-        """Delete a load"""
+        """Delete a load (raises ValueError while other loads include it)"""
         load = self.get(identifier)
         if not load:
             return False
         
-        with open(self.path, "r") as f:
-            loads = json.load(f)
-        
         load_id = str(load["id"])
         load_name = load["name"]
         
-        loads[load_id] = {
-            "id": load["id"],
-            "name": f"_deleted_{load_id}",
-            "slot_ids": [],
-            "mode": "serial",
-            "created_at": load.get("created_at"),
-            "deleted": True
-        }
-        
-        if load_name in loads:
-            del loads[load_name]
+        with self.store.update() as data:
+            loads = data["loads"]
+            referrers = self._referrers(loads, load)
+            if referrers:
+                raise ValueError(f"Load {load_name} is included by: {', '.join(sorted(referrers))}")
+            loads[load_id] = {
+                "id": load["id"],
+                "name": f"_deleted_{load_id}",
+                "slot_ids": [],
+                "mode": "serial",
+                "created_at": load.get("created_at"),
+                "deleted": True
+            }
+            
+            if data["names"].get(load_name) == load_id:
+                del data["names"][load_name]
+            ids = self._allocator(data)
+            ids.release(load["id"])
+            if ids.tombstones >= COMPACT_MIN_TOMBSTONES and ids.tombstones * 2 > len(loads):
+                self._drop_tombstones(loads)
         
         if self.active_load == load["id"]:
             self.active_load = None
         
-        with open(self.path, "w") as f:
-            json.dump(loads, f, indent=2)
-        
+        self._notify("remove", load)
         return True
     
+    def _drop_tombstones(self, loads):
+        """Remove deleted records in place, keeping IDs of live loads"""
+        deleted = [key for key, record in loads.items() if record.get("deleted", False)]
+        for key in deleted:
+            del loads[key]
+        if self._ids is not None:
+            self._ids.compacted()
+        return len(deleted)
+    
+    def compact(self):
+        """Drop deleted load tombstones without renumbering"""
+        with self.store.update() as data:
+            return self._drop_tombstones(data["loads"])
+    
     def sort_ids(self):
-        """Renumber load IDs sequentially"""
-        with open(self.path, "r") as f:
-            loads = json.load(f)
-        
-        active_loads = []
-        for load_id, data in loads.items():
-            if load_id.isdigit() and not data.get("deleted", False):
-                active_loads.append((int(load_id), data))
-        
-        active_loads.sort(key=lambda x: x[0])
-        
-        new_loads = {}
-        new_id = 1
-        for old_id, data in active_loads:
-            data["id"] = new_id
-            new_loads[str(new_id)] = data
-            new_loads[data["name"]] = data
-            new_id += 1
-        
-        with open(self.path, "w") as f:
-            json.dump(new_loads, f, indent=2)
-        
-        return new_id - 1
+        """Renumber load IDs sequentially, rewriting 'load:<id>' references to match"""
+        with self.store.update() as data:
+            active_loads = []
+            for load_id, record in data["loads"].items():
+                if not record.get("deleted", False):
+                    active_loads.append((int(load_id), record))
+            
+            active_loads.sort(key=lambda x: x[0])
+            
+            # References to loads that no longer exist keep their number, so it is skipped
+            live = {old_id for old_id, record in active_loads}
+            dangling = self._referenced_ids(data["loads"]) - live
+            
+            new_loads = {}
+            new_names = {}
+            renumbered = {}
+            new_id = 1
+            for old_id, record in active_loads:
+                while new_id in dangling:
+                    new_id += 1
+                record["id"] = new_id
+                renumbered[f"{LOAD_PREFIX}{old_id}"] = f"{LOAD_PREFIX}{new_id}"
+                new_loads[str(new_id)] = record
+                new_names[record["name"]] = str(new_id)
+                new_id += 1
+            
+            for old_id, record in active_loads:
+                record["slot_ids"] = [renumbered.get(entry, entry) for entry in record["slot_ids"]]
+            
+            data["loads"] = new_loads
+            data["names"] = new_names
+            self._ids = None
+        
+        self._notify("reset")
+        return len(active_loads)
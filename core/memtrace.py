@@ -0,0 +1,133 @@
+"""
+ECHTABLE Memory Tracing
+tracemalloc snapshots at phase boundaries behind --memtrace
+"""
+
+import os
+import sys
+import time
+import threading
+from collections import deque
+
+# Allocation sites shown per section of the report
+TOP_SITES = 10
+
+# Checkpoints kept for the report; older ones are summarized away
+MAX_CHECKPOINTS = 50
+
+# Repeats of one label closer together than this are skipped (snapshots are slow)
+MIN_INTERVAL = 1.0
+
+def _format_size(size):
+    """Signed human-readable byte count"""
+    sign = "-" if size < 0 else ""
+    size = abs(size)
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{sign}{size:.0f} {unit}" if unit == "B" else f"{sign}{size:.1f} {unit}"
+        size /= 1024
+    return f"{sign}{size:.1f} GB"
+
+def _site(stat):
+    """'file:line' of a statistic, relative to the current directory when shorter"""
+    frame = stat.traceback[0]
+    filename = frame.filename
+    try:
+        relative = os.path.relpath(filename)
+        if len(relative) < len(filename):
+            filename = relative
+    except ValueError:
+        pass
+    return f"{filename}:{frame.lineno}"
+
+class Checkpoint:
+    """Traced memory at one phase boundary and what grew since the previous one"""
+    
+    def __init__(self, label, current, peak, growth):
+        self.label = label
+        self.current = current
+        self.peak = peak
+        self.growth = growth
+
+class MemTracer:
+    """Takes tracemalloc snapshots at checkpoints; costs one attribute check while disabled"""
+    
+    def __init__(self):
+        self.enabled = False
+        self.checkpoints = deque(maxlen=MAX_CHECKPOINTS)
+        self.lock = threading.Lock()
+        self._previous = None
+        self._last = {}
+    
+    def enable(self, frames=1):
+        """Start tracing allocations (frames of traceback kept per block)"""
+        import tracemalloc
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self.enabled = True
+        self.checkpoint("start", force=True)
+    
+    def _snapshot(self):
+        """Current allocations, without the tracer's own"""
+        import tracemalloc
+        # Leave out tracemalloc's and our own bookkeeping and the import machinery
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ))
+    
+    def checkpoint(self, label, force=False):
+        """Snapshot now and record growth since the previous checkpoint"""
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        with self.lock:
+            if not force and now - self._last.get(label, float("-inf")) < MIN_INTERVAL:
+                return
+            self._last[label] = now
+            
+            import tracemalloc
+            snapshot = self._snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            growth = []
+            if self._previous is not None:
+                growth = [
+                    stat for stat in snapshot.compare_to(self._previous, "lineno")[:TOP_SITES]
+                    if stat.size_diff > 0
+                ]
+            self._previous = snapshot
+            self.checkpoints.append(Checkpoint(label, current, peak, growth))
+    
+    def report(self, out=None):
+        """Print memory at each checkpoint, what grew, and the top sites overall"""
+        if not self.enabled:
+            return
+        self.checkpoint("exit", force=True)
+        out = out or sys.stderr
+        with self.lock:
+            checkpoints = list(self.checkpoints)
+            snapshot = self._previous
+        
+        print(f"\n[*] Memory trace ({len(checkpoints)} checkpoints)", file=out)
+        previous = None
+        for point in checkpoints:
+            change = "" if previous is None else f" ({_format_size(point.current - previous.current)})"
+            print(f"{point.label:<32} current {_format_size(point.current):>10}{change}, "
+                  f"peak {_format_size(point.peak)}", file=out)
+            for stat in point.growth:
+                print(f"    {_format_size(stat.size_diff):>10}  {_site(stat)}  (+{stat.count_diff} blocks)",
+                      file=out)
+            previous = point
+        
+        print("\n[*] Top allocation sites", file=out)
+        for stat in snapshot.statistics("lineno")[:TOP_SITES]:
+            print(f"    {_format_size(stat.size):>10}  {_site(stat)}  ({stat.count} blocks)", file=out)
+
+memtracer = MemTracer()
+
+def checkpoint(label, force=False):
+    """Checkpoint on the process-wide memory tracer"""
+    memtracer.checkpoint(label, force)
@@ -0,0 +1,155 @@
+"""
+ECHTABLE Metrics
+Prometheus textfile sink for node_exporter's textfile collector
+"""
+
+import re
+import time
+import threading
+from core.utils import atomic_write_text, file_lock, read_config
+
+DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 1800)
+WAIT_BUCKETS = (0.001, 0.01, 0.1, 0.5, 1, 5, 10, 60, 300)
+
+# name: (type, help)
+FAMILIES = {
+    "echtable_slot_executions_total": ("counter", "Slot executions by result"),
+    "echtable_slot_exit_codes_total": ("counter", "Slot executions by exit code"),
+    "echtable_slot_duration_seconds": ("histogram", "Slot run time from spawn to exit"),
+    "echtable_slot_output_bytes_total": ("counter", "Bytes of output produced by slots"),
+    "echtable_queue_wait_seconds": ("histogram", "Time work waited for a worker"),
+    "echtable_worker_busy_seconds_total": ("counter", "Worker time spent running commands"),
+    "echtable_worker_utilization_ratio": ("gauge", "Busy share of the workers used in the last run"),
+    "echtable_last_run_timestamp_seconds": ("gauge", "Unix time the last run finished"),
+}
+
+SAMPLE_PATTERN = re.compile(r"^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{.*\})?\s+(\S+)$")
+LABEL_PATTERN = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+def _escape(value):
+    """Escape a label value"""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _unescape(value):
+    """Undo _escape"""
+    return re.sub(r"\\(.)", lambda m: "\n" if m.group(1) == "n" else m.group(1), value)
+
+def _family(name):
+    """Metric family a sample belongs to"""
+    for suffix in ("_bucket", "_sum", "_count"):
+        if name.endswith(suffix) and name[:-len(suffix)] in FAMILIES:
+            return name[:-len(suffix)]
+    return name
+
+def parse_textfile(text):
+    """Samples {(name, labels): value} from exposition text"""
+    samples = {}
+    for line in text.splitlines():
+        match = SAMPLE_PATTERN.match(line.strip())
+        if not match or line.startswith("#"):
+            continue
+        labels = tuple(
+            (key, _unescape(value)) for key, value in LABEL_PATTERN.findall(match.group(2) or "")
+        )
+        try:
+            samples[(match.group(1), labels)] = float(match.group(3))
+        except ValueError:
+            continue
+    return samples
+
+def format_textfile(samples):
+    """Exposition text grouped by family with HELP/TYPE headers"""
+    families = {}
+    for (name, labels), value in samples.items():
+        families.setdefault(_family(name), []).append((name, labels, value))
+    
+    def bucket_order(item):
+        name, labels, value = item
+        le = dict(labels).get("le")
+        bound = float("inf") if le in (None, "+Inf") else float(le)
+        return [pair for pair in labels if pair[0] != "le"], name, bound
+    
+    lines = []
+    for family in sorted(families):
+        kind, help_text = FAMILIES.get(family, ("untyped", family))
+        lines.append(f"# HELP {family} {help_text}")
+        lines.append(f"# TYPE {family} {kind}")
+        for name, labels, value in sorted(families[family], key=bucket_order):
+            label_text = ",".join(f'{key}="{_escape(val)}"' for key, val in labels)
+            number = int(value) if float(value).is_integer() else value
+            lines.append(f"{name}{{{label_text}}} {number}" if labels else f"{name} {number}")
+    return "\n".join(lines) + "\n"
+
+class MetricsSink:
+    """Accumulates metric deltas for a run and merges them into a textfile"""
+    
+    def __init__(self, path):
+        self.path = path
+        self.counters = {}
+        self.gauges = {}
+        self.lock = threading.Lock()
+    
+    def _add(self, name, labels, amount=1):
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + amount
+    
+    def _observe(self, name, labels, value, buckets):
+        """Histogram observation as cumulative bucket counts plus _sum/_count"""
+        # Every bucket is written, even at zero, so each series has the full set of le values
+        for bound in buckets:
+            self._add(f"{name}_bucket", dict(labels, le=repr(float(bound))), 1 if value <= bound else 0)
+        self._add(f"{name}_bucket", dict(labels, le="+Inf"))
+        self._add(f"{name}_sum", labels, value)
+        self._add(f"{name}_count", labels)
+    
+    def command(self, slot, load, returncode, duration, output_bytes):
+        """Record one finished command"""
+        labels = {"slot": slot, "load": load}
+        with self.lock:
+            result = "ok" if returncode == 0 else "fail"
+            self._add("echtable_slot_executions_total", dict(labels, result=result))
+            self._add("echtable_slot_exit_codes_total", dict(labels, code=str(returncode)))
+            self._observe("echtable_slot_duration_seconds", labels, duration, DURATION_BUCKETS)
+            self._add("echtable_slot_output_bytes_total", labels, output_bytes)
+    
+    def waited(self, load, seconds):
+        """Record time a task spent queued"""
+        with self.lock:
+            self._observe("echtable_queue_wait_seconds", {"load": load}, seconds, WAIT_BUCKETS)
+    
+    def busy(self, load, seconds):
+        """Record worker time spent on a task"""
+        with self.lock:
+            self._add("echtable_worker_busy_seconds_total", {"load": load}, seconds)
+    
+    def run_finished(self, load, busy, workers, wall):
+        """Gauges for a completed run"""
+        with self.lock:
+            if workers and wall > 0:
+                self.gauges[("echtable_worker_utilization_ratio", (("load", load),))] = busy / (workers * wall)
+            self.gauges[("echtable_last_run_timestamp_seconds", (("load", load),))] = round(time.time(), 3)
+    
+    def flush(self):
+        """Merge into the textfile under a lock and replace it atomically"""
+        with self.lock:
+            counters, self.counters = self.counters, {}
+            gauges, self.gauges = self.gauges, {}
+        if not counters and not gauges:
+            return
+        
+        with file_lock(self.path):
+            try:
+                with open(self.path, "r") as f:
+                    samples = parse_textfile(f.read())
+            except FileNotFoundError:
+                samples = {}
+            
+            for key, amount in counters.items():
+                samples[key] = samples.get(key, 0) + amount
+            samples.update(gauges)
+            atomic_write_text(self.path, format_textfile(samples), mode=0o644)
+
+def metrics_sink(path=None):
+    """Sink for path, else for config.json "metrics_file", else None"""
+    path = path or read_config().get("metrics_file")
+    return MetricsSink(path) if path else None
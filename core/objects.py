@@ -0,0 +1,354 @@
+"""
+ECHTABLE Object Store
+Content-addressed, compressed storage for the output of slot runs
+"""
+
+import os
+import json
+import time
+import zlib
+import hashlib
+import tempfile
+import threading
+from datetime import datetime
+from core.utils import data_path, atomic_write_json, file_lock, read_config
+
+OBJECTS_DIR = "objects"
+INDEX_FILE = "index.json"
+INDEX_VERSION = 1
+
+# A chunk ends after a line whose checksum hits the mask (about one line in 64),
+# so an inserted or changed line only disturbs the chunk around it and repeated
+# runs with small differences still share most of their chunks
+CHUNK_MASK = 0x3F
+MIN_CHUNK = 32 * 1024
+MAX_CHUNK = 256 * 1024
+
+COMPRESS_LEVEL = 6
+
+# Outputs dropped from the index before a flush also collects garbage
+GC_THRESHOLD = 32
+
+# Files younger than this survive collection: another run may have written its
+# chunks without having recorded the output that refers to them yet
+GC_GRACE = 3600
+
+class ObjectStore:
+    """Zlib-compressed blobs named by the sha256 of their content"""
+    
+    def __init__(self, root=None):
+        self.root = root or data_path(OBJECTS_DIR)
+    
+    def path(self, digest):
+        """File of an object, fanned out by the first two hex digits"""
+        return os.path.join(self.root, digest[:2], digest[2:])
+    
+    def put(self, data):
+        """Store bytes unless already present; returns their digest"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        try:
+            # Already stored: refresh its age so a collection running now keeps it
+            os.utime(path)
+            return digest
+        except FileNotFoundError:
+            pass
+        
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+        try:
+            # No fsync: losing a chunk to a crash costs one stored output, not the data files
+            with os.fdopen(fd, "wb") as f:
+                f.write(zlib.compress(data, COMPRESS_LEVEL))
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        return digest
+    
+    def get(self, digest):
+        """Content of an object (OSError if missing, zlib.error if damaged)"""
+        with open(self.path(digest), "rb") as f:
+            return zlib.decompress(f.read())
+    
+    def manifest(self, digest):
+        """Chunk list of a stored output"""
+        return json.loads(self.get(digest).decode())
+    
+    def walk(self):
+        """(name, path) of every file under the store, temp files included"""
+        try:
+            fans = os.listdir(self.root)
+        except FileNotFoundError:
+            return
+        for fan in fans:
+            directory = os.path.join(self.root, fan)
+            if len(fan) != 2 or not os.path.isdir(directory):
+                continue
+            for name in os.listdir(directory):
+                yield (name if name.startswith(".tmp-") else fan + name), os.path.join(directory, name)
+    
+    def usage(self):
+        """(objects, bytes on disk)"""
+        count = size = 0
+        for name, path in self.walk():
+            try:
+                size += os.stat(path).st_size
+            except FileNotFoundError:
+                continue
+            count += 1
+        return count, size
+
+class OutputWriter:
+    """Splits a stream of output into chunks and stores them as it goes
+
+    Only the chunk being filled is held in memory. close() stores the
+    manifest listing the chunks; its digest names the whole output, and
+    identical outputs always get the same one.
+    """
+    
+    def __init__(self, store):
+        self.store = store
+        self.buffer = []
+        self.buffered = 0
+        self.partial = b""
+        self.chunks = []
+        self.size = 0
+        self.error = None
+    
+    def write(self, text):
+        """Add output text (any mix of whole and partial lines)"""
+        if self.error:
+            return
+        data = self.partial + text.encode("utf-8", "replace")
+        start = 0
+        try:
+            while True:
+                end = data.find(b"\n", start)
+                if end < 0:
+                    break
+                self._line(data[start:end + 1])
+                start = end + 1
+            self.partial = data[start:]
+            if len(self.partial) >= MAX_CHUNK:
+                # One endless line still has to be stored in bounded pieces
+                self._line(self.partial)
+                self.partial = b""
+        except OSError as e:
+            self.error = e
+    
+    def _line(self, data):
+        """Append a line to the current chunk, cutting it at a boundary"""
+        self.buffer.append(data)
+        self.buffered += len(data)
+        if self.buffered >= MAX_CHUNK or (self.buffered >= MIN_CHUNK and zlib.crc32(data) & CHUNK_MASK == 0):
+            self._cut()
+    
+    def _cut(self):
+        """Store the current chunk"""
+        if not self.buffer:
+            return
+        chunk = b"".join(self.buffer)
+        self.chunks.append([self.store.put(chunk), len(chunk)])
+        self.size += len(chunk)
+        self.buffer = []
+        self.buffered = 0
+    
+    def close(self):
+        """Store the rest and the manifest; returns the output's digest (None on failure)"""
+        if self.error:
+            return None
+        try:
+            if self.partial:
+                self._line(self.partial)
+                self.partial = b""
+            self._cut()
+            manifest = json.dumps({"size": self.size, "chunks": self.chunks}, separators=(",", ":"))
+            return self.store.put(manifest.encode())
+        except OSError as e:
+            self.error = e
+            return None
+
+def empty_index():
+    """Index with no outputs recorded"""
+    return {"version": INDEX_VERSION, "slots": {}, "refs": {}, "dropped": 0}
+
+def read_index(path):
+    """Output index (empty if none was written yet)"""
+    try:
+        with open(path, "r") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return empty_index()
+    return index if index.get("version") == INDEX_VERSION else empty_index()
+
+def _release(index, digest):
+    """Drop one reference to an output"""
+    refs = index["refs"]
+    refs[digest] = refs.get(digest, 1) - 1
+    if refs[digest] <= 0:
+        del refs[digest]
+        index["dropped"] += 1
+
+def _since(slot):
+    """Timestamp a slot's runs start from; earlier ones belong to a deleted slot that had its ID"""
+    created = slot.get("created_at")
+    return created[:19] if created else ""
+
+def _drop_stale(index, entry, since):
+    """Release runs of an index entry recorded before since"""
+    stale = [run for run in entry["runs"] if run["ts"] < since]
+    if not stale:
+        return
+    for run in stale:
+        _release(index, run["output"])
+    entry["runs"] = [run for run in entry["runs"] if run["ts"] >= since]
+    if not entry["runs"]:
+        entry["next"] = 1
+
+def collect(store, index):
+    """Delete objects no indexed output refers to; returns (objects removed, bytes freed)"""
+    live = set(index["refs"])
+    for digest in index["refs"]:
+        try:
+            live.update(chunk[0] for chunk in store.manifest(digest)["chunks"])
+        except (OSError, ValueError, KeyError, zlib.error):
+            continue
+    
+    cutoff = time.time() - GC_GRACE
+    removed = freed = 0
+    for name, path in store.walk():
+        if name in live:
+            continue
+        try:
+            stat = os.stat(path)
+            if stat.st_mtime > cutoff:
+                continue
+            os.unlink(path)
+        except FileNotFoundError:
+            continue
+        removed += 1
+        freed += stat.st_size
+    index["dropped"] = 0
+    return removed, freed
+
+class RunOutputs:
+    """Keeps the last keep outputs of each slot in the object store
+
+    Each kept run holds one reference to its output; outputs pushed out of
+    the window lose theirs, and their objects are collected once enough of
+    them have piled up.
+    """
+    
+    def __init__(self, keep, root=None):
+        self.keep = keep
+        self.store = ObjectStore(root)
+        self.index_path = os.path.join(self.store.root, INDEX_FILE)
+        self.records = []
+        self.latest = None
+        self.lock = threading.Lock()
+    
+    def writer(self):
+        """Writer for one command's output"""
+        return OutputWriter(self.store)
+    
+    def runs(self, slot):
+        """Kept runs of a slot record, oldest first"""
+        entry = read_index(self.index_path)["slots"].get(str(slot["id"]))
+        since = _since(slot)
+        return [run for run in entry["runs"] if run["ts"] >= since] if entry else []
+    
+    def add(self, slot, digest, returncode, size):
+        """Record the stored output of one finished run of a slot
+
+        Returns whether it differs from the slot's previous output (None for a first run).
+        """
+        key = str(slot["id"])
+        with self.lock:
+            if self.latest is None:
+                self.latest = {
+                    slot_id: entry["runs"][-1]
+                    for slot_id, entry in read_index(self.index_path)["slots"].items() if entry["runs"]
+                }
+            previous = self.latest.get(key)
+            if previous is not None and previous["ts"] < _since(slot):
+                previous = None
+            changed = None if previous is None else previous["output"] != digest
+            record = {
+                "slot_id": slot["id"],
+                "slot": slot["name"],
+                "since": _since(slot),
+                "ts": datetime.now().isoformat(timespec="seconds"),
+                "output": digest,
+                "returncode": returncode,
+                "size": size,
+                "changed": changed
+            }
+            self.latest[key] = record
+            self.records.append(record)
+        return changed
+    
+    def flush(self):
+        """Add pending runs to the index, releasing outputs past the window"""
+        with self.lock:
+            records, self.records = self.records, []
+        if not records:
+            return
+        
+        os.makedirs(self.store.root, exist_ok=True)
+        with file_lock(self.index_path):
+            index = read_index(self.index_path)
+            for record in records:
+                entry = index["slots"].setdefault(str(record.pop("slot_id")), {"next": 1, "runs": []})
+                entry["name"] = record.pop("slot")
+                _drop_stale(index, entry, record.pop("since"))
+                record["run"] = entry["next"]
+                entry["next"] += 1
+                entry["runs"].append(record)
+                index["refs"][record["output"]] = index["refs"].get(record["output"], 0) + 1
+                while len(entry["runs"]) > self.keep:
+                    _release(index, entry["runs"].pop(0)["output"])
+            if index["dropped"] >= GC_THRESHOLD:
+                collect(self.store, index)
+            atomic_write_json(self.index_path, index, indent=None)
+    
+    def compact(self, slots):
+        """Forget runs of slots not among slots (records) and past the window, then collect garbage
+
+        Runs from before a slot was created belong to a deleted slot that had its ID and go too.
+
+        Returns (objects removed, bytes freed).
+        """
+        os.makedirs(self.store.root, exist_ok=True)
+        with file_lock(self.index_path):
+            index = read_index(self.index_path)
+            live = {str(slot["id"]): _since(slot) for slot in slots}
+            for slot_id in [slot_id for slot_id in index["slots"] if slot_id not in live]:
+                for run in index["slots"].pop(slot_id)["runs"]:
+                    _release(index, run["output"])
+            for slot_id, entry in index["slots"].items():
+                _drop_stale(index, entry, live[slot_id])
+            if self.keep:
+                # The window may have shrunk since these runs were recorded
+                for entry in index["slots"].values():
+                    while len(entry["runs"]) > self.keep:
+                        _release(index, entry["runs"].pop(0)["output"])
+            result = collect(self.store, index)
+            atomic_write_json(self.index_path, index, indent=None)
+        return result
+
+def keep_outputs():
+    """Runs kept per slot from config.json "keep_outputs" (0: outputs aren't stored)"""
+    try:
+        return max(int(read_config().get("keep_outputs", 0)), 0)
+    except (TypeError, ValueError):
+        return 0
+
+def run_outputs():
+    """Output recorder, or None unless config.json sets "keep_outputs" """
+    keep = keep_outputs()
+    return RunOutputs(keep) if keep else None
@@ -0,0 +1,229 @@
+"""
+ECHTABLE Execution Plan
+Flattens nested loads into one dependency graph run on a single flow
+"""
+
+import time
+import queue
+from collections import Counter
+from core.captures import compile_captures, line_feeder
+from core.executor import CommandExecutor
+
+LOAD_PREFIX = "load:"
+
+def is_load_ref(entry):
+    """Whether a load entry references another load ('load:<id|name>')"""
+    return isinstance(entry, str) and entry.startswith(LOAD_PREFIX)
+
+def parse_entries(text):
+    """Parse '1,2,load:recon' into slot ids and load references (raises ValueError)"""
+    entries = []
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if is_load_ref(part):
+            if not part[len(LOAD_PREFIX):]:
+                raise ValueError("Missing load after 'load:'")
+            entries.append(part)
+        else:
+            entries.append(int(part))
+    return entries
+
+class PlanStep:
+    """One unit of work: a slot, or the slots of a pipe-mode load"""
+    
+    def __init__(self, slots, after, pipe=False):
+        self.slots = slots
+        self.after = after
+        self.pipe = pipe
+        self.captures = []
+
+class ExecutionPlan:
+    """Dependency graph of steps; serial loads chain, parallel loads fan out"""
+    
+    def __init__(self, load_manager, slot_manager, load):
+        self.loads = load_manager
+        self.slot_manager = slot_manager
+        self.steps = []
+        self._expand(load, set(), [])
+    
+    def _resolve(self, entry, path):
+        """The load an entry references, refusing cycles"""
+        identifier = entry[len(LOAD_PREFIX):]
+        load = self.loads.get(identifier)
+        if not load or load.get("deleted", False):
+            raise ValueError(f"Load not found: {identifier}")
+        
+        if load["id"] in (item["id"] for item in path):
+            names = [item["name"] for item in path] + [load["name"]]
+            raise ValueError(f"Load cycle: {' -> '.join(names)}")
+        return load
+    
+    def _slot(self, slot_id):
+        """A live slot record, or None"""
+        slot = self.slot_manager.get(slot_id)
+        if slot and not slot.get("deleted", False):
+            return slot
+        return None
+    
+    def _pipe_slots(self, load, path):
+        """Slots of a pipe-mode load in order, with nested loads inlined"""
+        path = path + [load]
+        slots = []
+        for entry in load["slot_ids"]:
+            if is_load_ref(entry):
+                slots.extend(self._pipe_slots(self._resolve(entry, path), path))
+            else:
+                slot = self._slot(entry)
+                if slot:
+                    slots.append(slot)
+        return slots
+    
+    def _expand(self, load, after, path):
+        """Add steps for load once the steps in after finish; return its final steps"""
+        if load["mode"] == "pipe":
+            self.steps.append(PlanStep(self._pipe_slots(load, path), after, pipe=True))
+            return {len(self.steps) - 1}
+        if load["mode"] not in ("serial", "parallel"):
+            raise ValueError(f"Unknown mode: {load['mode']} (load {load['name']})")
+        
+        path = path + [load]
+        serial = load["mode"] == "serial"
+        finals = set()
+        previous = after
+        for entry in load["slot_ids"]:
+            if is_load_ref(entry):
+                ends = self._expand(self._resolve(entry, path), previous if serial else after, path)
+            else:
+                slot = self._slot(entry)
+                if not slot:
+                    continue
+                self.steps.append(PlanStep([slot], previous if serial else after))
+                ends = {len(self.steps) - 1}
+            
+            if serial:
+                previous = ends
+            else:
+                finals |= ends
+        return previous if serial else finals
+    
+    def run(self, context, scope, key_for=None, max_workers=3):
+        """Run the plan once; returns results in plan order"""
+        done = []
+        self.run_many(context, [scope], key_for, max_workers, on_done=done.append)
+        return done[0].results if done else []
+    
+    def run_many(self, context, scopes, key_for=None, max_workers=3, window=None, on_done=None):
+        """Run the plan once per scope on one flow
+        
+        Scopes are pulled lazily with at most window instances in flight, so a
+        large sweep never materializes. key_for(scope) gives the throttle key of
+        each step as it starts. on_done(instance) sees each finished one.
+        """
+        steps = self.steps
+        dependents = [[] for step in steps]
+        for index, step in enumerate(steps):
+            for dependency in step.after:
+                dependents[dependency].append(index)
+        roots = [index for index, step in enumerate(steps) if not step.after]
+        
+        flow = context.flow(max_active=max_workers)
+        finished = queue.Queue()
+        scopes = iter(scopes)
+        window = window or max(max_workers * 2, 1)
+        usage = Counter()
+        state = {"running": 0, "active": 0}
+        
+        def start(instance, index):
+            # Commands are rendered as late as possible so they see upstream captures
+            step = steps[index]
+            commands = [self.slot_manager.render(slot, instance.scope) for slot in step.slots]
+            state["running"] += 1
+            if context.cancelled or not commands:
+                finished.put((instance, index, None))
+                return
+            
+            usage.update(slot["id"] for slot in step.slots)
+            labels = [context.label(command, slot) for slot, command in zip(step.slots, commands)]
+            # Keyed by the scope the commands were rendered with, captures included
+            key = key_for(instance.scope) if key_for else None
+            if step.pipe:
+                future = context.submit(flow, key, CommandExecutor.pipeline, commands, context, labels)
+            else:
+                instance.captures[index] = compile_captures(step.slots[0].get("captures"))
+                future = context.submit(
+                    flow, key, CommandExecutor.execute, commands[0], True, context,
+                    line_feeder(instance.captures[index]), labels[0]
+                )
+            future.add_done_callback(lambda done: finished.put((instance, index, done)))
+        
+        def complete(instance):
+            state["active"] -= 1
+            instance.finish(steps, context)
+            if on_done:
+                on_done(instance)
+        
+        def admit():
+            # Keep the window full while there are scopes left
+            while state["active"] < window and not context.cancelled:
+                scope = next(scopes, None)
+                if scope is None:
+                    return
+                instance = PlanInstance(scope, steps)
+                state["active"] += 1
+                if not steps:
+                    complete(instance)
+                for index in roots:
+                    start(instance, index)
+        
+        admit()
+        while state["running"]:
+            instance, index, future = finished.get()
+            state["running"] -= 1
+            instance.remaining -= 1
+            try:
+                instance.results[index] = future.result() if future else None
+            except Exception as e:
+                context.log(f"[!] Execution error: {e}", error=True)
+            
+            for capture in instance.captures.pop(index, ()):
+                if capture.value is not None:
+                    instance.scope.set(capture.var, capture.value)
+                    context.log(f"[+] Captured @{capture.var} = {capture.value}")
+            
+            for dependent in dependents[index]:
+                instance.waiting[dependent] -= 1
+                if not instance.waiting[dependent]:
+                    start(instance, dependent)
+            
+            if not instance.remaining:
+                complete(instance)
+                admit()
+        
+        self.slot_manager.record_usage(usage)
+
+class PlanInstance:
+    """One execution of a plan with its own variables and progress"""
+    
+    def __init__(self, scope, steps):
+        self.scope = scope
+        self.waiting = [len(step.after) for step in steps]
+        self.remaining = len(steps)
+        self.results = [None] * len(steps)
+        self.captures = {}
+        self.started = time.monotonic()
+        self.elapsed = 0.0
+    
+    def finish(self, steps, context):
+        """Flatten per-step results and report failures"""
+        self.elapsed = time.monotonic() - self.started
+        flat = []
+        for step, result in zip(steps, self.results):
+            if result is None:
+                continue
+            for item in (result if step.pipe else [result]):
+                if not item["success"]:
+                    context.log(f"[!] Command failed: {item['command']}")
+                flat.append(item)
+        self.results = flat
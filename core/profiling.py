@@ -0,0 +1,118 @@
+"""
+ECHTABLE Profiling
+Monotonic phase timers and optional cProfile capture behind --profile
+"""
+
+import sys
+import time
+import threading
+from contextlib import contextmanager
+
+class PhaseStats:
+    """Count, total and worst case for one phase"""
+    
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+    
+    def add(self, seconds):
+        """Record one occurrence"""
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+class Profiler:
+    """Accumulates phase timings; costs one attribute check while disabled"""
+    
+    def __init__(self):
+        self.enabled = False
+        self.phases = {}
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+        self._cprofile = None
+    
+    def enable(self, cprofile=False):
+        """Start collecting (and run cProfile too if asked)"""
+        self.enabled = True
+        if cprofile and self._cprofile is None:
+            import cProfile
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+    
+    def record(self, name, seconds):
+        """Add a duration measured elsewhere"""
+        if not self.enabled:
+            return
+        with self.lock:
+            stats = self.phases.get(name)
+            if stats is None:
+                stats = self.phases[name] = PhaseStats()
+            stats.add(seconds)
+    
+    @contextmanager
+    def _timed(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+    
+    def phase(self, name):
+        """Context manager timing a named phase"""
+        if not self.enabled:
+            return _NULL_PHASE
+        return self._timed(name)
+    
+    def reset(self):
+        """Forget collected timings"""
+        with self.lock:
+            self.phases = {}
+        self.started = time.perf_counter()
+    
+    def report(self, out=None):
+        """Print the phase breakdown, slowest first"""
+        out = out or sys.stderr
+        wall = time.perf_counter() - self.started
+        with self.lock:
+            phases = sorted(self.phases.items(), key=lambda item: item[1].total, reverse=True)
+        
+        print("\n[*] Profile (wall %.1f ms)" % (wall * 1000), file=out)
+        print(f"{'Phase':<20} {'Calls':>6} {'Total ms':>10} {'Avg ms':>9} {'Max ms':>9}", file=out)
+        print("-" * 58, file=out)
+        for name, stats in phases:
+            print(
+                f"{name:<20} {stats.count:>6} {stats.total * 1000:>10.2f} "
+                f"{stats.total / stats.count * 1000:>9.3f} {stats.max * 1000:>9.3f}",
+                file=out
+            )
+    
+    def dump(self, path):
+        """Stop cProfile and write its stats for pstats/snakeviz"""
+        if self._cprofile is None:
+            return False
+        self._cprofile.disable()
+        self._cprofile.dump_stats(path)
+        self._cprofile = None
+        return True
+
+class _NullPhase:
+    """Shared no-op context manager used while profiling is off"""
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        return False
+
+_NULL_PHASE = _NullPhase()
+
+profiler = Profiler()
+
+def phase(name):
+    """Time a phase on the process-wide profiler"""
+    return profiler.phase(name)
+
+def record(name, seconds):
+    """Record a duration on the process-wide profiler"""
+    profiler.record(name, seconds)
@@ -0,0 +1,255 @@
+"""
+ECHTABLE Scheduler
+Process-wide worker pool shared by every load run
+"""
+
+import itertools
+import ipaddress
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from core.utils import read_config
+
+# Priority classes: lower runs first
+INTERACTIVE = 0
+BULK = 1
+
+DEFAULT_MAX_WORKERS = 16
+
+# How far into a flow's queue to look for work whose key isn't throttled
+SCAN_DEPTH = 256
+
+def group_key(spec, variables):
+    """Derive a throttling key such as '@target' or '@target/24' from variable values"""
+    if not spec:
+        return None
+    
+    name, _, prefix = spec.lstrip("@").partition("/")
+    value = variables.get(name)
+    if value is None:
+        return None
+    
+    value = str(value).strip()
+    if prefix:
+        try:
+            return str(ipaddress.ip_network(f"{value}/{prefix}", strict=False))
+        except ValueError:
+            # Hostnames and other non-IP values are grouped as-is
+            pass
+    return value
+
+class Throttle:
+    """Per-key concurrency cap and token-bucket rate (starts per second) for one run"""
+    
+    def __init__(self, key=None, per_key=None, rate=None, burst=None):
+        self.key = key
+        self.per_key = per_key
+        self.rate = rate
+        self.burst = burst or (max(rate, 1.0) if rate else None)
+    
+    def key_for(self, variables):
+        """The key work rendered with these variable values (a dict or VariableScope) is grouped under"""
+        return group_key(self.key, variables)
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at rate tokens per second"""
+    
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+    
+    def _refill(self, now):
+        """Add tokens earned since the last update"""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def wait_time(self, now):
+        """Seconds until a token is available (0 if one is available now)"""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+    
+    def take(self, now):
+        """Consume one token"""
+        self._refill(now)
+        self.tokens -= 1
+
+class Flow:
+    """One run's queue of work, scheduled fairly against other flows"""
+    
+    def __init__(self, scheduler, name, priority=BULK, weight=1, max_active=None, throttle=None):
+        self.scheduler = scheduler
+        self.name = name
+        self.priority = priority
+        self.weight = max(weight, 0.001)
+        self.max_active = max_active
+        self.throttle = throttle or Throttle()
+        self.queue = deque()
+        self.active = 0
+        self.virtual_time = 0.0
+        self.seq = next(scheduler._seq)
+    
+    def submit(self, fn, *args, **kwargs):
+        """Queue fn(*args, **kwargs) and return a Future for its result"""
+        return self.submit_keyed(None, fn, *args, **kwargs)
+    
+    def submit_keyed(self, key, fn, *args, **kwargs):
+        """Queue work that counts against the per-key limits of key (e.g. a host)"""
+        future = Future()
+        self.scheduler._enqueue(self, (future, fn, args, kwargs, key))
+        return future
+    
+    def ready(self):
+        """Whether this flow has work and a free slot to start it"""
+        if not self.queue:
+            return False
+        return self.max_active is None or self.active < self.max_active
+
+class Scheduler:
+    """Global concurrency cap with priority classes and weighted fair sharing"""
+    
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS):
+        self.max_workers = max_workers
+        self.cond = threading.Condition()
+        self.flows = []
+        self.workers = 0
+        self.idle = 0
+        self.busy = 0
+        self.key_active = {}
+        self.buckets = {}
+        self._seq = itertools.count()
+    
+    def flow(self, name, priority=BULK, weight=1, max_active=None, throttle=None):
+        """Create a flow for one run"""
+        return Flow(self, name, priority, weight, max_active, throttle)
+    
+    def _key_wait(self, flow, key, now):
+        """Seconds until work for key may start under flow's limits (None if capped by concurrency)"""
+        if key is None:
+            return 0.0
+        
+        throttle = flow.throttle
+        if throttle.per_key and self.key_active.get(key, 0) >= throttle.per_key:
+            return None
+        
+        if throttle.rate:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = self.buckets[key] = TokenBucket(throttle.rate, throttle.burst)
+            bucket.rate, bucket.burst = throttle.rate, throttle.burst
+            return bucket.wait_time(now)
+        return 0.0
+    
+    def _prune_buckets(self, now):
+        """Drop buckets of keys with nothing running that have refilled to burst
+        
+        A full bucket is what _key_wait would create anyway, so forgetting it
+        loses no rate history; partly drained ones wait for a later prune.
+        """
+        for key, bucket in list(self.buckets.items()):
+            if key not in self.key_active and bucket.wait_time(now) == 0.0 and bucket.tokens >= bucket.burst:
+                del self.buckets[key]
+    
+    def _eligible(self, flow, now):
+        """Index of the first queued task of flow allowed to start, plus the shortest rate wait"""
+        shortest = None
+        for index, task in enumerate(itertools.islice(flow.queue, SCAN_DEPTH)):
+            wait = self._key_wait(flow, task[4], now)
+            if wait == 0.0:
+                return index, None
+            if wait is not None and (shortest is None or wait < shortest):
+                shortest = wait
+        return None, shortest
+    
+    def _enqueue(self, flow, task):
+        """Add a task and make sure a worker will pick it up"""
+        with self.cond:
+            if flow not in self.flows:
+                # A flow waking from idle starts level with the others instead of
+                # cashing in time it did not use
+                if self.flows:
+                    floor = min(other.virtual_time for other in self.flows)
+                    flow.virtual_time = max(flow.virtual_time, floor)
+                self.flows.append(flow)
+            
+            flow.queue.append(task)
+            if self.idle == 0 and self.workers < self.max_workers:
+                self.workers += 1
+                threading.Thread(target=self._worker, name=f"echtable-worker-{self.workers}", daemon=True).start()
+            self.cond.notify_all()
+    
+    def _pick(self):
+        """Choose (flow, task index): best priority class, then least share of workers per weight
+        
+        Returns (None, wait) when nothing can start; wait is the time until a
+        rate-limited key gets its next token, or None to wait for a completion.
+        """
+        now = time.monotonic()
+        flows = [flow for flow in self.flows if flow.ready()]
+        flows.sort(key=lambda flow: (flow.priority, flow.active / flow.weight, flow.virtual_time, flow.seq))
+        
+        shortest = None
+        for flow in flows:
+            index, wait = self._eligible(flow, now)
+            if index is not None:
+                return flow, index
+            if wait is not None and (shortest is None or wait < shortest):
+                shortest = wait
+        return None, shortest
+    
+    def _worker(self):
+        """Worker loop"""
+        while True:
+            with self.cond:
+                self.idle += 1
+                flow, index = self._pick()
+                while flow is None:
+                    self.cond.wait(timeout=index)
+                    flow, index = self._pick()
+                self.idle -= 1
+                self.busy += 1
+                
+                future, fn, args, kwargs, key = flow.queue[index]
+                del flow.queue[index]
+                flow.active += 1
+                if key is not None:
+                    self.key_active[key] = self.key_active.get(key, 0) + 1
+                    if flow.throttle.rate:
+                        self.buckets[key].take(time.monotonic())
+            
+            started = time.monotonic()
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(fn(*args, **kwargs))
+                    except BaseException as e:
+                        future.set_exception(e)
+            finally:
+                with self.cond:
+                    flow.active -= 1
+                    flow.virtual_time += (time.monotonic() - started) / flow.weight
+                    self.busy -= 1
+                    if key is not None:
+                        self.key_active[key] -= 1
+                        if not self.key_active[key]:
+                            del self.key_active[key]
+                    if not flow.queue and not flow.active:
+                        self.flows.remove(flow)
+                        self._prune_buckets(time.monotonic())
+                    self.cond.notify_all()
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler():
+    """The process-wide scheduler (cap from config.json "max_workers")"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            max_workers = read_config().get("max_workers", DEFAULT_MAX_WORKERS)
+            _scheduler = Scheduler(max(int(max_workers), 1))
+        return _scheduler
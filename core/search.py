@@ -0,0 +1,126 @@
+"""
+ECHTABLE Slot Search
+Inverted token index over slot names, commands and referenced variables
+"""
+
+import re
+import math
+import heapq
+from collections import Counter
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+VARIABLE_PATTERN = re.compile(r"@(\w+)")
+
+# Name matches count this many times more than command matches
+NAME_WEIGHT = 3
+
+# BM25 tuning
+K1 = 1.2
+B = 0.75
+
+def tokenize(text):
+    """Split text into lowercase word tokens plus @variable tokens"""
+    tokens = TOKEN_PATTERN.findall(text.lower())
+    tokens.extend(f"@{name.lower()}" for name in VARIABLE_PATTERN.findall(text))
+    return tokens
+
+class SlotIndex:
+    """Incrementally maintained inverted index with BM25 ranking"""
+    
+    def __init__(self, variables=None):
+        self.variables = dict(variables or {})
+        self.postings = {}
+        self.docs = {}
+        self.var_refs = {}
+        self.total_length = 0
+    
+    def _terms(self, name, command):
+        """Weighted term counts for one slot"""
+        terms = Counter()
+        for token in tokenize(name):
+            terms[token] += NAME_WEIGHT
+        for token in tokenize(command):
+            terms[token] += 1
+        
+        # Index what referenced variables currently expand to as well
+        for var_name in set(VARIABLE_PATTERN.findall(command)):
+            value = self.variables.get(var_name)
+            if value is not None:
+                for token in TOKEN_PATTERN.findall(str(value).lower()):
+                    terms[token] += 1
+        return terms
+    
+    def add(self, slot):
+        """Index a slot record (replacing any previous entry for its id)"""
+        slot_id = slot["id"]
+        if slot_id in self.docs:
+            self.remove(slot_id)
+        
+        terms = self._terms(slot["name"], slot["command"])
+        length = sum(terms.values())
+        var_names = set(VARIABLE_PATTERN.findall(slot["command"]))
+        
+        self.docs[slot_id] = (slot["name"], slot["command"], terms, length, var_names)
+        self.total_length += length
+        for token, weight in terms.items():
+            self.postings.setdefault(token, {})[slot_id] = weight
+        for var_name in var_names:
+            self.var_refs.setdefault(var_name, set()).add(slot_id)
+    
+    def remove(self, slot_id):
+        """Drop a slot from the index"""
+        doc = self.docs.pop(slot_id, None)
+        if doc is None:
+            return
+        
+        name, command, terms, length, var_names = doc
+        self.total_length -= length
+        for token in terms:
+            posting = self.postings.get(token)
+            if posting is not None:
+                posting.pop(slot_id, None)
+                if not posting:
+                    del self.postings[token]
+        for var_name in var_names:
+            refs = self.var_refs.get(var_name)
+            if refs is not None:
+                refs.discard(slot_id)
+                if not refs:
+                    del self.var_refs[var_name]
+    
+    def set_variable(self, name, value):
+        """Re-index slots whose commands reference a changed variable"""
+        if value is None:
+            self.variables.pop(name, None)
+        else:
+            self.variables[name] = value
+        
+        for slot_id in list(self.var_refs.get(name, ())):
+            slot_name, command = self.docs[slot_id][:2]
+            self.add({"id": slot_id, "name": slot_name, "command": command})
+    
+    def search(self, query, limit=20):
+        """Return [(score, slot_id)] best first; slots matching more terms rank higher"""
+        terms = set(tokenize(query))
+        if not terms or not self.docs:
+            return []
+        
+        doc_count = len(self.docs)
+        avg_length = self.total_length / doc_count
+        scores = {}
+        matched = Counter()
+        
+        for term in terms:
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            
+            idf = math.log(1 + (doc_count - len(posting) + 0.5) / (len(posting) + 0.5))
+            for slot_id, tf in posting.items():
+                length = self.docs[slot_id][3]
+                norm = tf + K1 * (1 - B + B * length / avg_length)
+                scores[slot_id] = scores.get(slot_id, 0.0) + idf * tf * (K1 + 1) / norm
+                matched[slot_id] += 1
+        
+        best = heapq.nlargest(limit, scores, key=lambda slot_id: (matched[slot_id], scores[slot_id]))
+        return [(scores[slot_id], slot_id) for slot_id in best]
@@ -0,0 +1,310 @@
+"""
+ECHTABLE Session Cache
+Write-behind in-memory state for long-running interactive sessions
+"""
+
+import os
+import json
+import atexit
+import threading
+from contextlib import contextmanager
+from core.utils import atomic_write_json, file_lock, file_signature, read_config
+from core import snapshot
+from core.profiling import phase
+from core.memtrace import checkpoint
+
+_MISSING = object()
+
+def _read_disk(path, use_snapshot=False):
+    """Read a JSON store, treating missing or unreadable files as empty"""
+    with phase("store.load"):
+        if use_snapshot:
+            data = snapshot.load(path)
+            if data is not None:
+                return data
+        
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+def _clone(value):
+    """Copy of JSON data: dicts and lists are copied, leaf values shared"""
+    if isinstance(value, dict):
+        return {key: _clone(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_clone(item) for item in value]
+    return value
+
+def merge3(base, ours, theirs, prefix=""):
+    """Three-way merge of dicts; returns (merged, conflicting key paths)"""
+    merged = {}
+    conflicts = []
+    
+    keys = list(ours)
+    keys.extend(key for key in theirs if key not in ours)
+    keys.extend(key for key in base if key not in ours and key not in theirs)
+    
+    for key in keys:
+        b = base.get(key, _MISSING)
+        o = ours.get(key, _MISSING)
+        t = theirs.get(key, _MISSING)
+        
+        if o == b:
+            value = t
+        elif t == b or o == t:
+            value = o
+        elif isinstance(b, dict) and isinstance(o, dict) and isinstance(t, dict):
+            value, nested = merge3(b, o, t, f"{prefix}{key}.")
+            conflicts.extend(nested)
+        else:
+            # Both sides changed the same value: the local edit wins
+            value = o
+            conflicts.append(f"{prefix}{key}")
+        
+        if value is not _MISSING:
+            merged[key] = value
+    
+    return merged, conflicts
+
+def _added(base, record):
+    """Whether record is a live record that one side created over base (missing or a tombstone)"""
+    if not isinstance(record, dict) or "id" not in record or record.get("deleted", False):
+        return False
+    return base is _MISSING or (isinstance(base, dict) and base.get("deleted", False))
+
+def _records(data):
+    """The {id: record} map of a store: loads.json keeps it under "loads", slots.json at the top"""
+    if isinstance(data.get("loads"), dict) and "names" in data:
+        return data["loads"]
+    return data
+
+def renumber_added(base, ours, theirs):
+    """Move records that both sides created under the same ID to fresh IDs on our side
+
+    Returns (ours with the records moved, [(old id, new id)]). ours itself is
+    left untouched, since readers may hold it.
+    """
+    base_records, our_records, their_records = _records(base), _records(ours), _records(theirs)
+    taken = [int(key) for records in (base_records, our_records, their_records) for key in records if key.isdigit()]
+    next_id = max(taken, default=0)
+    moved = []
+    for key in [key for key in our_records if key.isdigit()]:
+        record = our_records[key]
+        other = their_records.get(key, _MISSING)
+        previous = base_records.get(key, _MISSING)
+        if record == other or not (_added(previous, record) and _added(previous, other)):
+            continue
+        next_id += 1
+        moved.append((key, str(next_id)))
+    if not moved:
+        return ours, moved
+    
+    records = dict(our_records)
+    for old, new in moved:
+        records[new] = dict(records.pop(old), id=int(new))
+    if our_records is ours:
+        return records, moved
+    
+    # Our loads that include a moved load by ID follow it
+    refs = {f"load:{old}": f"load:{new}" for old, new in moved}
+    for key, record in records.items():
+        entries = record.get("slot_ids") if isinstance(record, dict) else None
+        if entries and any(entry in refs for entry in entries if isinstance(entry, str)):
+            records[key] = dict(record, slot_ids=[
+                refs.get(entry, entry) if isinstance(entry, str) else entry for entry in entries
+            ])
+    return dict(ours, loads=records), moved
+
+def follow_slots(base, ours, moved):
+    """ours with our loads pointed at the new IDs of moved slots
+
+    Only loads this side changed are touched: a moved slot was created here,
+    so nothing else can have referred to it yet.
+    """
+    moves = {int(old): int(new) for old, new in moved}
+    base_loads = base.get("loads", {})
+    records = None
+    for key, record in ours["loads"].items():
+        if record == base_loads.get(key) or not any(entry in moves for entry in record["slot_ids"]):
+            continue
+        if records is None:
+            records = dict(ours["loads"])
+        records[key] = dict(record, slot_ids=[
+            moves.get(entry, entry) if isinstance(entry, int) else entry for entry in record["slot_ids"]
+        ])
+    return ours if records is None else dict(ours, loads=records)
+
+def rebuild_names(data):
+    """names index of loads.json recomputed from its records; returns names claimed twice"""
+    names = {}
+    duplicates = []
+    for key in sorted(data["loads"], key=lambda key: int(key) if key.isdigit() else 0):
+        record = data["loads"][key]
+        if record.get("deleted", False):
+            continue
+        if record["name"] in names:
+            duplicates.append(record["name"])
+            continue
+        names[record["name"]] = key
+    data["names"] = names
+    return duplicates
+
+class _CachedStore:
+    """Cached contents of one store plus the disk state it was synced with
+
+    data is replaced, never modified, once it has been handed out, so it
+    doubles as the merge base after each sync.
+    """
+    
+    def __init__(self, path, use_snapshot=False):
+        self.path = path
+        with file_lock(path, exclusive=False):
+            self.signature = file_signature(path)
+            self.data = _read_disk(path, use_snapshot)
+        self.base = self.data
+        self.dirty = False
+        self.generation = 0
+        checkpoint(f"store.load {os.path.basename(path)}")
+
+class Session:
+    """Serves store reads from memory and flushes dirty stores in the background"""
+    
+    def __init__(self, flush_interval=2.0):
+        self.flush_interval = flush_interval
+        self.use_snapshot = bool(read_config().get("binary_snapshot", False))
+        self.lock = threading.RLock()
+        self.warnings = []
+        self._stores = {}
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def preload(self, paths):
+        """Load stores into memory up front"""
+        for path in paths:
+            self.read(path)
+    
+    def read(self, path):
+        """Get the in-memory contents of a store (treat as read-only)"""
+        with self.lock:
+            entry = self._stores.get(path)
+            if entry is None:
+                entry = _CachedStore(path, self.use_snapshot)
+                self._stores[path] = entry
+            return entry.data
+    
+    def generation(self, path):
+        """Counter bumped whenever outside changes are merged into a store"""
+        with self.lock:
+            self.read(path)
+            return self._stores[path].generation
+    
+    @contextmanager
+    def update(self, path):
+        """Modify a copy of a store and swap it in for write-behind
+
+        Readers may be iterating the current contents without the lock, so
+        they're left untouched; if the body raises, nothing changes.
+        """
+        with self.lock:
+            self.read(path)
+            entry = self._stores[path]
+            data = _clone(entry.data)
+            yield data
+            entry.data = data
+            entry.dirty = True
+    
+    def sync(self):
+        """Flush dirty stores and merge changes made by other processes"""
+        with self.lock:
+            # Slots first, so loads created alongside them can follow any that get renumbered
+            slots_moved = []
+            for entry in sorted(self._stores.values(), key=lambda entry: "names" in entry.data):
+                moved = self._sync_store(entry, slots_moved)
+                if "names" not in entry.data:
+                    slots_moved.extend(moved)
+    
+    def _sync_store(self, entry, slots_moved=()):
+        """Reconcile one store with its file on disk; returns records moved to new IDs"""
+        if not entry.dirty and file_signature(entry.path) == entry.signature:
+            return []
+        
+        with file_lock(entry.path):
+            return self._merge_and_write(entry, slots_moved)
+    
+    def _merge_and_write(self, entry, slots_moved=()):
+        """Merge outside changes and write dirty state (caller holds the lock)"""
+        moved = []
+        if slots_moved and entry.dirty and "names" in entry.data:
+            data = follow_slots(entry.base, entry.data, slots_moved)
+            if data is not entry.data:
+                entry.data = data
+                entry.generation += 1
+        
+        signature = file_signature(entry.path)
+        merged = entry.data
+        if signature != entry.signature:
+            theirs = _read_disk(entry.path, self.use_snapshot)
+            name = os.path.basename(entry.path)
+            # Records both sides created under one ID are kept apart, not merged into one
+            ours, moved = renumber_added(entry.base, entry.data, theirs)
+            merged, conflicts = merge3(entry.base, ours, theirs)
+            for old, new in moved:
+                self.warnings.append(f"ID {old} in {name} was taken concurrently; this session's record is now {new}")
+            if "names" in merged and isinstance(merged.get("loads"), dict):
+                # Each side indexed only its own loads, so the merged index is rebuilt from the records
+                for duplicate in rebuild_names(merged):
+                    self.warnings.append(f"Load name {duplicate} was created concurrently; the lower ID keeps it")
+                if merged["names"] != theirs.get("names"):
+                    entry.dirty = True
+            for key in conflicts:
+                self.warnings.append(f"Concurrent change to {name}:{key} overwritten by this session")
+        
+        if entry.dirty:
+            atomic_write_json(entry.path, merged)
+            signature = file_signature(entry.path)
+            if self.use_snapshot:
+                snapshot.save(entry.path, merged)
+        
+        if merged is not entry.data:
+            # Swapped in whole: the old dict may still be in a reader's hands
+            entry.data = merged
+            entry.generation += 1
+        
+        entry.base = entry.data
+        entry.signature = signature
+        entry.dirty = False
+        return moved
+    
+    def drain_warnings(self):
+        """Return and clear pending merge warnings"""
+        with self.lock:
+            warnings, self.warnings = self.warnings, []
+        return warnings
+    
+    def start(self):
+        """Start the background flush thread"""
+        if self._thread:
+            return
+        
+        self._thread = threading.Thread(target=self._run, name="echtable-session", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+    
+    def _run(self):
+        """Background flush loop"""
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.sync()
+            except OSError as e:
+                with self.lock:
+                    self.warnings.append(f"Background flush failed: {e}")
+    
+    def close(self):
+        """Stop the flush thread and write out remaining changes"""
+        self._stop.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+        self.sync()
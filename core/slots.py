@@ -3,61 +3,129 @@ ECHTABLE Slot Manager
 Manages command slots
 """
 
-import os
-import json
+import atexit
+import bisect
+import threading
+from collections import Counter
 from datetime import datetime
 from core.utils import data_path
+from core.storage import JsonStore
+from core.ids import IdAllocator
+from core.search import SlotIndex
+from core.listing import matches, paginate
 from core.variables import VariableManager
+from core.profiling import phase
+
+# Compact automatically once tombstones outnumber live slots (and there are enough to matter)
+COMPACT_MIN_TOMBSTONES = 64
+
+# Sort fields for page(); "id" is served from the ordered ID index instead
+SORT_KEYS = {
+    "name": lambda slot: slot["name"].lower(),
+    "usage": lambda slot: slot["usage"],
+    "last_used": lambda slot: slot["last_used"] or ""
+}
+
+# Managers holding usage counts that haven't been written yet
+_pending_usage = set()
+
+def flush_pending_usage():
+    """Write the usage every SlotManager has batched (done at exit; call earlier to time it)"""
+    while _pending_usage:
+        _pending_usage.pop().flush_usage()
+
+atexit.register(flush_pending_usage)
 
 class SlotManager:
     """Manages command slots"""
     
-    def __init__(self):
+    def __init__(self, session=None):
         self.path = data_path("slots.json")
-        self.variables = VariableManager()
-        self._ensure_file()
+        self.store = JsonStore(self.path, session)
+        self.variables = VariableManager(session)
         self.active_slot = None
+        self._ids = None
+        self._ids_generation = None
+        self._index = None
+        self._index_generation = None
+        self._order = None
+        self._order_generation = None
+        self._usage = Counter()
+        self._usage_lock = threading.Lock()
+        self.listeners = []
+        self.variables.add_listener(self._on_variable_change)
+    
+    def add_listener(self, callback):
+        """Register callback(action, record) for "add", "remove" and "reset" changes"""
+        self.listeners.append(callback)
+    
+    def _notify(self, action, record=None):
+        """Tell listeners about a change"""
+        for callback in self.listeners:
+            callback(action, record)
     
-    def _ensure_file(self):
-        """Create slots file if missing"""
-        if not os.path.exists(self.path):
-            with open(self.path, "w") as f:
-                json.dump({}, f)
+    def _allocator(self, slots):
+        """Free-ID allocator for the current store contents"""
+        generation = self.store.generation
+        if self._ids is None or self._ids_generation != generation:
+            self._ids = IdAllocator(slots)
+            self._ids_generation = generation
+        return self._ids
     
     def create(self, command, name=None):
         """Create a new slot"""
-        with open(self.path, "r") as f:
-            slots = json.load(f)
-        
-        new_id = 1
-        while str(new_id) in slots and not slots[str(new_id)].get("deleted", False):
-            new_id += 1
-        
-        slots[str(new_id)] = {
-            "id": new_id,
-            "name": name or f"slot_{new_id}",
-            "command": command,
-            "created_at": datetime.now().isoformat(),
-            "last_used": None,
-            "usage_count": 0,
-            "deleted": False
-        }
-        
-        with open(self.path, "w") as f:
-            json.dump(slots, f, indent=2)
+        with self.store.update() as slots:
+            ids = self._allocator(slots)
+            new_id = ids.allocate()
+            while str(new_id) in slots and not slots[str(new_id)].get("deleted", False):
+                new_id = ids.allocate()
+            
+            slots[str(new_id)] = {
+                "id": new_id,
+                "name": name or f"slot_{new_id}",
+                "command": command,
+                "created_at": datetime.now().isoformat(),
+                "last_used": None,
+                "usage_count": 0,
+                "deleted": False
+            }
+            record = slots[str(new_id)]
         
+        if self._index:
+            self._index.add(record)
+        if self._order is not None and self._order_generation == self.store.generation:
+            bisect.insort(self._order, new_id)
+        else:
+            self._order = None
+        self._notify("add", record)
         return new_id
     
+    def edit(self, slot_id, command=None, name=None):
+        """Change a slot's command and/or name in place, keeping its ID, captures and usage"""
+        with self.store.update() as slots:
+            record = slots.get(str(slot_id))
+            if not record or record.get("deleted", False):
+                return False
+            old_record = dict(record)
+            if command:
+                record["command"] = command
+            if name:
+                record["name"] = name
+        
+        if self._index:
+            self._index.add(record)
+        self._notify("remove", old_record)
+        self._notify("add", record)
+        return True
+    
     def get(self, slot_id):
         """Get slot information"""
-        with open(self.path, "r") as f:
-            slots = json.load(f)
+        slots = self.store.read()
         return slots.get(str(slot_id))
     
     def find_by_name(self, name):
         """Find slot by name"""
-        with open(self.path, "r") as f:
-            slots = json.load(f)
+        slots = self.store.read()
         
         for slot_id, data in slots.items():
             if data.get("name") == name and not data.get("deleted", False):
@@ -73,54 +141,141 @@ class SlotManager:
             return slot
         return None
     
-    def prepare_command(self, slot_id=None, extra_params=None):
-        """Prepare slot command for execution"""
+    def prepare_command(self, slot_id=None, extra_params=None, variables=None):
+        """Prepare slot command for execution (variables may be a run's VariableScope)"""
         if not slot_id and self.active_slot:
             slot_id = self.active_slot
         elif not slot_id:
             return None
         
-        slot = self.get(slot_id)
-        if not slot:
-            return None
-        
-        command = slot["command"]
-        command = self.variables.substitute(command)
+        with phase("prepare_command"):
+            slot = self.get(slot_id)
+            if not slot:
+                return None
+            
+            command = self.render(slot, variables, extra_params)
+        self._increment_usage(slot_id)
+        return command
+    
+    def render(self, slot, variables=None, extra_params=None):
+        """Command of a slot record with variables substituted (no usage accounting)"""
+        command = (variables or self.variables).substitute(slot["command"])
         
         if extra_params and "@target" in command:
             command = command.replace("@target", extra_params[0])
-        
-        self._increment_usage(slot_id)
         return command
     
+    def set_captures(self, slot_id, captures):
+        """Replace a slot's capture specs ([{"var", "selector"}])"""
+        with self.store.update() as slots:
+            slot = slots.get(str(slot_id))
+            if not slot or slot.get("deleted", False):
+                return False
+            slot["captures"] = list(captures)
+        return True
+    
     def _increment_usage(self, slot_id):
-        """Increment usage counter"""
-        with open(self.path, "r") as f:
-            slots = json.load(f)
+        """Count a run of a slot
+
+        A session writes it behind anyway. On disk, counts are batched until
+        flush_usage() (or exit) instead of rewriting slots.json per run.
+        """
+        if self.store.session:
+            self.record_usage({slot_id: 1})
+            return
         
-        if str(slot_id) in slots:
-            slots[str(slot_id)]["usage_count"] = slots[str(slot_id)].get("usage_count", 0) + 1
-            slots[str(slot_id)]["last_used"] = datetime.now().isoformat()
-            
-            with open(self.path, "w") as f:
-                json.dump(slots, f, indent=2)
+        with self._usage_lock:
+            self._usage[slot_id] += 1
+            _pending_usage.add(self)
+    
+    def flush_usage(self):
+        """Write usage counted since the last flush"""
+        with self._usage_lock:
+            counts, self._usage = self._usage, Counter()
+        self.record_usage(counts)
+    
+    def record_usage(self, counts):
+        """Add {slot_id: runs} to usage counters in one write"""
+        if not counts:
+            return
+        
+        now = datetime.now().isoformat()
+        with phase("usage.write"), self.store.update() as slots:
+            for slot_id, count in counts.items():
+                if str(slot_id) in slots:
+                    slots[str(slot_id)]["usage_count"] = slots[str(slot_id)].get("usage_count", 0) + count
+                    slots[str(slot_id)]["last_used"] = now
+    
+    def _on_variable_change(self, action, name):
+        """Re-index slots that reference a changed variable"""
+        if self._index:
+            self._index.set_variable(name, self.variables.get(name))
+    
+    def search(self, query, limit=20):
+        """Rank slots by how well their name, command and variables match query"""
+        slots = self.store.read()
+        generation = (self.store.generation, self.variables.store.generation)
+        
+        if self._index is None or self._index_generation != generation:
+            self._index = SlotIndex(self.variables.get_all())
+            for data in slots.values():
+                if not data.get("deleted", False):
+                    self._index.add(data)
+            self._index_generation = generation
+        
+        result = []
+        for score, slot_id in self._index.search(query, limit):
+            data = slots.get(str(slot_id))
+            if data and not data.get("deleted", False):
+                entry = self._summary(data)
+                entry["score"] = score
+                result.append(entry)
+        return result
+    
+    def _summary(self, data):
+        """Listing view of a slot record"""
+        return {
+            "id": data["id"],
+            "name": data["name"],
+            "command": data["command"],
+            "usage": data.get("usage_count", 0),
+            "last_used": data.get("last_used")
+        }
     
     def list_all(self):
         """List all slots"""
-        with open(self.path, "r") as f:
-            slots = json.load(f)
+        slots = self.store.read()
         
         result = []
         for slot_id, data in slots.items():
             if not data.get("deleted", False):
-                result.append({
-                    "id": data["id"],
-                    "name": data["name"],
-                    "command": data["command"],
-                    "usage": data.get("usage_count", 0)
-                })
+                result.append(self._summary(data))
         return result
     
+    def _ordered_ids(self, slots):
+        """Live slot IDs in ascending order, kept up to date by create/delete"""
+        generation = self.store.generation
+        if self._order is None or self._order_generation != generation:
+            self._order = sorted(data["id"] for data in slots.values() if not data.get("deleted", False))
+            self._order_generation = generation
+        return self._order
+    
+    def page(self, offset=0, limit=None, sort="id", pattern=None, reverse=False):
+        """Iterate one page of slots, filtered by pattern and ordered by sort"""
+        if sort != "id" and sort not in SORT_KEYS:
+            raise ValueError(f"Unknown sort field: {sort}")
+        
+        slots = self.store.read()
+        ids = self._ordered_ids(slots)
+        if sort == "id" and reverse:
+            ids = reversed(ids)
+        
+        listed = (self._summary(slots[str(slot_id)]) for slot_id in ids)
+        if pattern:
+            listed = (slot for slot in listed if matches(pattern, slot["name"], slot["command"]))
+        
+        return paginate(listed, offset, limit, SORT_KEYS.get(sort), reverse)
+    
     def list_sorted(self):
         """Get sorted slot list"""
         slots = self.list_all()
@@ -134,47 +289,71 @@ class SlotManager:
         
         slot_id = slot["id"]
         
-        with open(self.path, "r") as f:
-            slots = json.load(f)
-        
-        slots[str(slot_id)] = {
-            "id": slot_id,
-            "name": f"_deleted_{slot_id}",
-            "command": "",
-            "created_at": slot.get("created_at"),
-            "last_used": None,
-            "usage_count": 0,
-            "deleted": True
-        }
-        
-        with open(self.path, "w") as f:
-            json.dump(slots, f, indent=2)
+        with self.store.update() as slots:
+            slots[str(slot_id)] = {
+                "id": slot_id,
+                "name": f"_deleted_{slot_id}",
+                "command": "",
+                "created_at": slot.get("created_at"),
+                "last_used": None,
+                "usage_count": 0,
+                "deleted": True
+            }
+            ids = self._allocator(slots)
+            ids.release(slot_id)
+            if ids.tombstones >= COMPACT_MIN_TOMBSTONES and ids.tombstones * 2 > len(slots):
+                self._drop_tombstones(slots)
         
         if self.active_slot == slot_id:
             self.active_slot = None
         
+        if self._index:
+            self._index.remove(slot_id)
+        if self._order is not None and self._order_generation == self.store.generation:
+            position = bisect.bisect_left(self._order, slot_id)
+            if position < len(self._order) and self._order[position] == slot_id:
+                del self._order[position]
+        else:
+            self._order = None
+        self._notify("remove", slot)
         return True
     
+    def _drop_tombstones(self, slots):
+        """Remove deleted records in place, keeping IDs of live slots"""
+        deleted = [key for key, data in slots.items() if data.get("deleted", False)]
+        for key in deleted:
+            del slots[key]
+        if self._ids is not None:
+            self._ids.compacted()
+        return len(deleted)
+    
+    def compact(self):
+        """Drop deleted slot tombstones without renumbering"""
+        with self.store.update() as slots:
+            return self._drop_tombstones(slots)
+    
     def sort_ids(self):
         """Renumber slot IDs sequentially"""
-        with open(self.path, "r") as f:
-            slots = json.load(f)
-        
-        active_slots = []
-        for slot_id, data in slots.items():
-            if not data.get("deleted", False):
-                active_slots.append((int(slot_id), data))
-        
-        active_slots.sort(key=lambda x: x[0])
-        
-        new_slots = {}
-        new_id = 1
-        for old_id, data in active_slots:
-            data["id"] = new_id
-            new_slots[str(new_id)] = data
-            new_id += 1
-        
-        with open(self.path, "w") as f:
-            json.dump(new_slots, f, indent=2)
+        with self.store.update() as slots:
+            active_slots = []
+            for slot_id, data in slots.items():
+                if not data.get("deleted", False):
+                    active_slots.append((int(slot_id), data))
+            
+            active_slots.sort(key=lambda x: x[0])
+            
+            new_slots = {}
+            new_id = 1
+            for old_id, data in active_slots:
+                data["id"] = new_id
+                new_slots[str(new_id)] = data
+                new_id += 1
+            
+            slots.clear()
+            slots.update(new_slots)
+            self._ids = None
+            self._index = None
+            self._order = None
         
+        self._notify("reset")
         return new_id - 1
@@ -0,0 +1,48 @@
+"""
+ECHTABLE Binary Snapshots
+Compact marshal copies of the JSON stores for fast cold start
+"""
+
+import os
+import sys
+import marshal
+import tempfile
+
+# marshal output is only guaranteed readable by the interpreter version that wrote it
+MAGIC = ("echtable-snapshot", 1, sys.version_info[:2])
+
+def snapshot_path(json_path):
+    """Snapshot file kept next to a JSON store"""
+    directory, name = os.path.split(json_path)
+    return os.path.join(directory, f".{name}.snap")
+
+def json_signature(json_path):
+    """Identify the exact JSON file version a snapshot was taken from"""
+    st = os.stat(json_path)
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+def load(json_path):
+    """Return snapshot data if it matches the current JSON file, else None"""
+    try:
+        with open(snapshot_path(json_path), "rb") as f:
+            magic, signature, data = marshal.load(f)
+        if magic != MAGIC or signature != json_signature(json_path):
+            return None
+        return data
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+
+def save(json_path, data):
+    """Write a snapshot for the current JSON file (best effort)"""
+    path = snapshot_path(json_path)
+    tmp_path = None
+    try:
+        payload = marshal.dumps((MAGIC, json_signature(json_path), data))
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".snap", dir=os.path.dirname(path) or ".")
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except (OSError, ValueError):
+        # The JSON file stays authoritative; a stale or missing snapshot is just ignored
+        if tmp_path and os.path.exists(tmp_path):
+            os.unlink(tmp_path)
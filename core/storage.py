@@ -4,8 +4,14 @@ Manages persistent storage for system data
 """
 
 import os
+import sys
 import json
+from contextlib import contextmanager
 from pathlib import Path
+from core.utils import atomic_write_json, file_lock, file_signature, read_config
+from core import snapshot
+from core.profiling import phase
+from core.memtrace import checkpoint
 
 class StorageManager:
     """Manages JSON file storage for ECHTABLE"""
@@ -37,14 +43,15 @@ class StorageManager:
     
     def _write_json(self, path, data):
         """Write JSON data to file"""
-        with open(path, 'w') as f:
-            json.dump(data, f, indent=2)
+        with file_lock(str(path)):
+            atomic_write_json(str(path), data)
     
     def _read_json(self, path):
         """Read JSON data from file"""
         try:
-            with open(path, 'r') as f:
-                return json.load(f)
+            with file_lock(str(path), exclusive=False):
+                with open(path, 'r') as f:
+                    return json.load(f)
         except (FileNotFoundError, json.JSONDecodeError):
             return {}
     
@@ -71,3 +78,94 @@ class StorageManager:
     def write_loads(self, data):
         """Write loads data"""
         self._write_json(self.files["loads"], data)
+    
+    def export(self, path=None):
+        """Write slots, variables and loads as one pretty-printed JSON bundle"""
+        bundle = {
+            "slots": self.read_slots(),
+            "variables": self.read_variables(),
+            "loads": self.read_loads()
+        }
+        
+        if path is None or path == "-":
+            json.dump(bundle, sys.stdout, indent=2)
+            sys.stdout.write("\n")
+        else:
+            atomic_write_json(path, bundle)
+        
+        return bundle
+
+class JsonStore:
+    """Read-modify-write access to one JSON store, on disk or through a Session"""
+    
+    def __init__(self, path, session=None):
+        self.path = str(path)
+        self.session = session
+        self.use_snapshot = bool(read_config().get("binary_snapshot", False))
+        self._generation = 0
+        self._signature = None
+        self._ensure_file()
+    
+    def _ensure_file(self):
+        """Create store file if missing"""
+        if not os.path.exists(self.path):
+            with file_lock(self.path):
+                if not os.path.exists(self.path):
+                    atomic_write_json(self.path, {})
+    
+    def _load(self):
+        """Parse the store file (caller holds the lock)"""
+        signature = file_signature(self.path)
+        if signature != self._signature:
+            # Someone else wrote it since we last did
+            self._generation += 1
+            self._signature = signature
+        with phase("store.load"):
+            if self.use_snapshot:
+                data = snapshot.load(self.path)
+                if data is not None:
+                    return data
+            
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            
+            if self.use_snapshot:
+                snapshot.save(self.path, data)
+            return data
+    
+    @property
+    def generation(self):
+        """Changes whenever another writer changed the store, so derived caches know to rebuild
+
+        Our own updates keep it: managers update their caches as they write.
+        """
+        if self.session:
+            return self.session.generation(self.path)
+        return self._generation
+    
+    def read(self):
+        """Return store contents (shared in-memory copy in session mode)"""
+        if self.session:
+            return self.session.read(self.path)
+        
+        with file_lock(self.path, exclusive=False):
+            data = self._load()
+        checkpoint(f"store.load {os.path.basename(self.path)}")
+        return data
+    
+    @contextmanager
+    def update(self):
+        """Yield store contents for modification and save them afterwards"""
+        if self.session:
+            with self.session.update(self.path) as data:
+                yield data
+            return
+        
+        # Read-modify-write under one exclusive lock so no update is lost
+        with file_lock(self.path):
+            data = self._load()
+            yield data
+            atomic_write_json(self.path, data)
+            self._signature = file_signature(self.path)
+            if self.use_snapshot:
+                snapshot.save(self.path, data)
@@ -0,0 +1,60 @@
+"""
+ECHTABLE Parameter Sweeps
+Runs a load once per combination of variable values
+"""
+
+import os
+import itertools
+
+DEFAULT_SWEEP_WORKERS = 8
+
+def parse_sweep(spec):
+    """Parse '@var=file' or '@var=a,b,c' into (name, [values]) (raises ValueError)"""
+    name, sep, source = spec.partition("=")
+    name = name.strip().lstrip("@")
+    if not sep or not name or not source:
+        raise ValueError(f"Expected @var=file or @var=a,b,c: {spec}")
+    
+    if os.path.isfile(source):
+        with open(source, "r") as f:
+            values = [line.strip() for line in f]
+        values = [value for value in values if value and not value.startswith("#")]
+    else:
+        values = [value.strip() for value in source.split(",") if value.strip()]
+    
+    if not values:
+        raise ValueError(f"No values for @{name}")
+    return name, values
+
+def combinations(sweeps):
+    """Lazily yield {var: value} for every combination of the sweeps"""
+    names = [name for name, values in sweeps]
+    for combo in itertools.product(*(values for name, values in sweeps)):
+        yield dict(zip(names, combo))
+
+def count_combinations(sweeps):
+    """Number of combinations without generating them"""
+    total = 1
+    for name, values in sweeps:
+        total *= len(values)
+    return total
+
+def format_table(rows, names):
+    """Summary lines: one row per combination with its outcome"""
+    headers = [f"@{name}" for name in names] + ["OK", "Failed", "Time"]
+    table = [
+        [str(row["values"][name]) for name in names]
+        + [str(row["ok"]), str(row["failed"]), f"{row['elapsed']:.1f}s"]
+        for row in rows
+    ]
+    
+    widths = [len(header) for header in headers]
+    for line in table:
+        widths = [max(width, len(cell)) for width, cell in zip(widths, line)]
+    
+    def render(cells):
+        return "  ".join(cell.ljust(width) for cell, width in zip(cells, widths)).rstrip()
+    
+    lines = [render(headers), "-" * len(render(headers))]
+    lines.extend(render(line) for line in table)
+    return lines
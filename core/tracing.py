@@ -0,0 +1,100 @@
+"""
+ECHTABLE Tracing
+Chrome/Perfetto trace-event export of load runs
+"""
+
+import os
+import time
+import itertools
+import threading
+from core.utils import atomic_write_json
+
+# Output lines closer together than this are drawn as one burst marker
+BURST_GAP = 0.05
+
+class Tracer:
+    """Collects trace events with one track per worker thread"""
+    
+    def __init__(self, name="run"):
+        self.name = name
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        self.events = []
+        self.tracks = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self._ids = itertools.count(1)
+    
+    def now(self):
+        """Microseconds since the trace started"""
+        return self.at(time.perf_counter())
+    
+    def at(self, counter):
+        """Trace timestamp for a perf_counter() reading"""
+        return (counter - self.origin) * 1e6
+    
+    def _tid(self):
+        """Track for the calling thread, named after it on first use"""
+        ident = threading.get_ident()
+        tid = self.tracks.get(ident)
+        if tid is None:
+            with self.lock:
+                tid = self.tracks.setdefault(ident, len(self.tracks) + 1)
+                self.events.append({
+                    "name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid,
+                    "args": {"name": threading.current_thread().name}
+                })
+        return tid
+    
+    def span(self, name, start, end=None, category="slot", **args):
+        """Complete event from start to end (microseconds) on the caller's track"""
+        end = self.now() if end is None else end
+        self.events.append({
+            "name": name, "cat": category, "ph": "X", "ts": start, "dur": max(end - start, 0),
+            "pid": self.pid, "tid": self._tid(), "args": args
+        })
+    
+    def instant(self, name, category="slot", **args):
+        """Marker at the current time on the caller's track"""
+        self.events.append({
+            "name": name, "cat": category, "ph": "i", "s": "t", "ts": self.now(),
+            "pid": self.pid, "tid": self._tid(), "args": args
+        })
+    
+    def queued(self, queued_at, started):
+        """Record how long a task sat in the queue (perf_counter() readings)"""
+        # Queue waits overlap freely, so they go on async tracks rather than a worker's
+        wait_id = next(self._ids)
+        for phase, ts in (("b", queued_at), ("e", started)):
+            self.events.append({
+                "name": "queued", "cat": "queue", "ph": phase, "id": wait_id, "ts": self.at(ts),
+                "pid": self.pid, "tid": self._tid()
+            })
+    
+    def output(self, size):
+        """Note output arriving; nearby lines are merged into one burst"""
+        now = self.now()
+        burst = getattr(self.local, "burst", None)
+        if burst and now - burst["end"] <= BURST_GAP * 1e6:
+            burst["end"] = now
+            burst["lines"] += 1
+            burst["bytes"] += size
+            return
+        self.flush_output()
+        self.local.burst = {"start": now, "end": now, "lines": 1, "bytes": size}
+    
+    def flush_output(self):
+        """Emit the caller's pending output burst"""
+        burst = getattr(self.local, "burst", None)
+        if burst:
+            self.span("output", burst["start"], burst["end"], category="output",
+                      lines=burst["lines"], bytes=burst["bytes"])
+            self.local.burst = None
+    
+    def write(self, path):
+        """Save as trace-event JSON (open in ui.perfetto.dev or chrome://tracing)"""
+        process = {
+            "name": "process_name", "ph": "M", "pid": self.pid, "tid": 0,
+            "args": {"name": f"echtable {self.name}"}
+        }
+        atomic_write_json(path, {"traceEvents": [process] + self.events, "displayTimeUnit": "ms"}, indent=None)
@@ -4,10 +4,89 @@ Utility functions for file path management
 """
 
 import os
+import json
+import stat
+import tempfile
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
 BASE_DIR = os.path.expanduser("~/.echtable")
 
+# Read once: os.umask() can only be queried by setting it
+UMASK = os.umask(0)
+os.umask(UMASK)
+
 def data_path(filename):
     """Get absolute path for data files in ECHTABLE directory"""
     os.makedirs(BASE_DIR, exist_ok=True)
     return os.path.join(BASE_DIR, filename)
+
+def file_signature(path):
+    """Identify the on-disk version of a file (None if missing)"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+def read_config():
+    """Read user settings from config.json (empty if missing or invalid)"""
+    try:
+        with open(data_path("config.json"), "r") as f:
+            config = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return config if isinstance(config, dict) else {}
+
+@contextmanager
+def file_lock(path, exclusive=True):
+    """Hold an advisory lock for path (shared for readers, exclusive for writers)"""
+    if fcntl is None:
+        yield
+        return
+    
+    # Lock a sidecar file: the data file itself is replaced on every write
+    fd = os.open(f"{path}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+    finally:
+        os.close(fd)
+
+def atomic_write_json(path, data, indent=2):
+    """Write JSON to a temp file next to path and rename it into place"""
+    _atomic_write(path, lambda f: json.dump(data, f, indent=indent), ".json")
+
+def atomic_write_text(path, text, mode=None):
+    """Write text to a temp file next to path and rename it into place"""
+    _atomic_write(path, lambda f: f.write(text), ".tmp", mode)
+
+def file_mode(path):
+    """Permissions for a rewrite of path: the current file's, or what open() would give a new one"""
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~UMASK
+
+def _atomic_write(path, write, suffix, mode=None):
+    """Run write(f) on a temp file, fsync it and rename it over path (mode defaults to file_mode)"""
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=suffix, dir=directory)
+    try:
+        # mkstemp files are private (0600); keep the permissions the file had
+        os.fchmod(fd, file_mode(path) if mode is None else mode)
+        with os.fdopen(fd, "w") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -3,75 +3,97 @@ ECHTABLE Variable Manager
 Manages dynamic variables with @ prefix
 """
 
-import os
 import re
-import json
+from collections import ChainMap
 from core.utils import data_path
+from core.storage import JsonStore
+from core.listing import matches, paginate
+from core.profiling import phase
 from datetime import datetime
 
+VARIABLE_PATTERN = re.compile(r'@(\w+)')
+
+# Compiled templates kept per VariableManager before the cache is reset
+TEMPLATE_CACHE_SIZE = 4096
+
+# Sort fields for page(); without one, variables keep their stored order
+SORT_KEYS = {
+    "name": lambda var: var["name"].lower(),
+    "value": lambda var: str(var["value"]),
+    "created": lambda var: var["created"]
+}
+
 class VariableManager:
     """Manages dynamic variables for command substitution"""
     
-    def __init__(self):
+    def __init__(self, session=None):
         self.path = data_path("variables.json")
+        self.store = JsonStore(self.path, session)
         self.prefix = "@"
-        self._ensure_file()
+        self.listeners = []
+        self._templates = {}
+    
+    def add_listener(self, callback):
+        """Register callback(action, name) for "add", "update" and "remove" changes"""
+        self.listeners.append(callback)
     
-    def _ensure_file(self):
-        """Create variables file if missing"""
-        if not os.path.exists(self.path):
-            with open(self.path, "w") as f:
-                json.dump({}, f)
+    def _notify(self, action, record=None):
+        """Tell listeners about a change"""
+        for callback in self.listeners:
+            callback(action, record)
     
     def set(self, name, value):
         """Set a variable value"""
         clean_name = name.lstrip(self.prefix)
         
-        with open(self.path, "r") as f:
-            vars = json.load(f)
-        
-        vars[clean_name] = {
-            "value": value,
-            "created_at": datetime.now().isoformat()
-        }
-        
-        with open(self.path, "w") as f:
-            json.dump(vars, f, indent=2)
+        with self.store.update() as vars:
+            is_new = clean_name not in vars
+            vars[clean_name] = {
+                "value": value,
+                "created_at": datetime.now().isoformat()
+            }
         
+        self._notify("add" if is_new else "update", clean_name)
         return True
     
     def get(self, name, default=None):
         """Get variable value"""
         clean_name = name.lstrip(self.prefix)
         
-        with open(self.path, "r") as f:
-            vars = json.load(f)
+        vars = self.store.read()
         
         var_data = vars.get(clean_name)
         return var_data["value"] if var_data else default
     
     def get_all(self):
         """Get all variables"""
-        with open(self.path, "r") as f:
-            vars = json.load(f)
+        vars = self.store.read()
         
         return {name: data["value"] for name, data in vars.items()}
     
-    def substitute(self, text):
+    def template(self, text):
+        """Compiled template for text, parsed once and reused"""
+        template = self._templates.get(text)
+        if template is None:
+            if len(self._templates) >= TEMPLATE_CACHE_SIZE:
+                self._templates.clear()
+            template = self._templates[text] = Template(text)
+        return template
+    
+    def substitute(self, text, variables=None):
         """Substitute @variables in text with values"""
-        variables = self.get_all()
-        
-        def replace_match(match):
-            var_name = match.group(1)
-            return str(variables.get(var_name, f"@{var_name}"))
-        
-        pattern = r'@(\w+)'
-        return re.sub(pattern, replace_match, text)
+        with phase("substitute"):
+            if variables is None:
+                variables = self.get_all()
+            return self.template(text).render(variables)
+    
+    def scope(self, values=None, base=None):
+        """In-memory overlay for one run (base: a variables snapshot to reuse)"""
+        return VariableScope(self, values, base)
     
     def list_all(self):
         """List all variables"""
-        with open(self.path, "r") as f:
-            vars = json.load(f)
+        vars = self.store.read()
         
         result = []
         for name, data in vars.items():
@@ -82,18 +104,84 @@ class VariableManager:
             })
         return result
     
+    def page(self, offset=0, limit=None, sort=None, pattern=None, reverse=False):
+        """Iterate one page of variables, filtered by pattern and ordered by sort"""
+        if sort is not None and sort not in SORT_KEYS:
+            raise ValueError(f"Unknown sort field: {sort}")
+        
+        vars = self.store.read()
+        names = reversed(list(vars)) if reverse and sort is None else vars
+        
+        listed = ({
+            "name": f"@{name}",
+            "value": vars[name]["value"],
+            "created": vars[name].get("created_at", "unknown")
+        } for name in names)
+        if pattern:
+            listed = (var for var in listed if matches(pattern, var["name"], var["value"]))
+        
+        return paginate(listed, offset, limit, SORT_KEYS.get(sort), reverse)
+    
     def delete(self, name):
         """Delete a variable"""
         clean_name = name.lstrip(self.prefix)
         
-        with open(self.path, "r") as f:
-            vars = json.load(f)
+        if clean_name not in self.store.read():
+            return False
         
-        if clean_name in vars:
-            del vars[clean_name]
-            
-            with open(self.path, "w") as f:
-                json.dump(vars, f, indent=2)
-            return True
+        with self.store.update() as vars:
+            vars.pop(clean_name, None)
         
-        return False
+        self._notify("remove", clean_name)
+        return True
+
+class Template:
+    """Text split once into literal parts and @variable names"""
+    
+    def __init__(self, text):
+        # re.split with a group alternates literal, name, literal, ...
+        self.parts = VARIABLE_PATTERN.split(text)
+    
+    def render(self, variables):
+        """Text with known variables replaced; unknown ones are left as @name"""
+        parts = self.parts[:]
+        for i in range(1, len(parts), 2):
+            value = variables.get(parts[i])
+            parts[i] = f"@{parts[i]}" if value is None else str(value)
+        return "".join(parts)
+
+class VariableScope:
+    """Run-local variables layered over the stored ones; persisted only on request"""
+    
+    def __init__(self, manager, values=None, base=None):
+        self.manager = manager
+        self.values = dict(values or {})
+        self.seed = dict(self.values)
+        self.base = base
+    
+    def set(self, name, value):
+        """Set a value for the rest of this run"""
+        self.values[name.lstrip(self.manager.prefix)] = value
+    
+    def get(self, name, default=None):
+        """Run-local value, falling back to the stored variable"""
+        return self._layers().get(name.lstrip(self.manager.prefix), default)
+    
+    def get_all(self):
+        """Stored variables with run-local values on top"""
+        return dict(self._layers())
+    
+    def _layers(self):
+        """Run-local values over the base snapshot (or the store)"""
+        base = self.base if self.base is not None else self.manager.get_all()
+        return ChainMap(self.values, base)
+    
+    def substitute(self, text):
+        """Substitute @variables using run-local values first"""
+        return self.manager.substitute(text, self._layers())
+    
+    def persist(self):
+        """Write the run-local values to the variable store"""
+        for name, value in self.values.items():
+            self.manager.set(name, value)
+        return len(self.values)
@@ -6,6 +6,10 @@ Command-line interface for fast operations
 
 import sys
 import os
+import time
+
+# Taken before the imports below so --profile can report them
+started = time.perf_counter()
 
 # Add current directory to path for local development
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -14,4 +18,4 @@ sys.path.insert(0, current_dir)
 from cli.non_interactive import main
 
 if __name__ == "__main__":
-    sys.exit(main())
+    sys.exit(main(started))
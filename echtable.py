@@ -4,7 +4,12 @@ ECHTABLE Framework - Command Execution Memory System
 Main interactive interface
 """
 
+import time
+
+# Taken before the imports below so --profile can report them
+started = time.perf_counter()
+
 from cli.framework import start_framework
 
 if __name__ == "__main__":
-    start_framework()
+    start_framework(started)
@@ -22,24 +22,28 @@ sudo cp "$BASE_DIR/echtable.py" "$INSTALL_DIR/"
 sudo tee "$BIN_ECHTABLE" > /dev/null <<'BINARY_EOF'
 #!/usr/bin/env python3
 import sys
+import time
+started = time.perf_counter()
 sys.path.insert(0, '/usr/share/echtable')
 
 from echtable import start_framework
 
 if __name__ == "__main__":
-    start_framework()
+    start_framework(started)
 BINARY_EOF
 
 # Create echt binary (Fast CLI)
 sudo tee "$BIN_ECHT" > /dev/null <<'BINARY_EOF'
 #!/usr/bin/env python3
 import sys
+import time
+started = time.perf_counter()
 sys.path.insert(0, '/usr/share/echtable')
 
 from cli.non_interactive import main
 
 if __name__ == "__main__":
-    sys.exit(main())
+    sys.exit(main(started))
 BINARY_EOF
 
 sudo chmod +x "$BIN_ECHTABLE"
@@ -0,0 +1,30 @@
+"""
+ECHTABLE Test Fixtures
+Every test gets its own empty ~/.echtable
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import utils
+
+@pytest.fixture(autouse=True)
+def home(tmp_path, monkeypatch):
+    """Point HOME and the data directory at a temporary directory"""
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setattr(utils, "BASE_DIR", str(tmp_path / ".echtable"))
+    return tmp_path
+
+@pytest.fixture
+def write_config(home):
+    """Write config.json for the test"""
+    def write(**settings):
+        import json
+        os.makedirs(utils.BASE_DIR, exist_ok=True)
+        with open(os.path.join(utils.BASE_DIR, "config.json"), "w") as f:
+            json.dump(settings, f)
+    return write
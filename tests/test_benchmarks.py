@@ -0,0 +1,51 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from library import generate, LOAD_SIZE, NOOP_COMMAND
+from bench import summarize, compare, key, parse_list
+from core import utils
+from core.slots import SlotManager
+from core.loads import LoadManager
+
+def test_generated_library_is_readable():
+    generate(utils.BASE_DIR, 25, noop=3)
+    slots, loads = SlotManager(), LoadManager()
+    assert len(slots.list_all()) == 28
+    assert slots.find_by_name("slot_7")["id"] == 7
+    assert slots.variables.substitute(slots.get(1)["command"]).startswith("nmap -p 10.0.0.")
+    assert [load["name"] for load in loads.list_all()] == ["load_1", "load_2", "load_3", "noop"]
+    assert len(loads.get("load_1")["slot_ids"]) == LOAD_SIZE
+    assert loads.get("load_3")["slot_ids"] == list(range(21, 26))
+    noop = loads.get("noop")
+    assert {slots.get(slot_id)["command"] for slot_id in noop["slot_ids"]} == {NOOP_COMMAND}
+    assert noop["slot_ids"] == [26, 27, 28]
+
+def test_summarize():
+    stats = summarize([0.004, 0.001, 0.002, 0.003])
+    assert stats == {"calls": 4, "mean_us": 2500.0, "p50_us": 3000.0, "p95_us": 4000.0, "min_us": 1000.0}
+
+def record(name, p50, **params):
+    return {"name": name, "params": params, "p50_us": p50}
+
+def test_compare_counts_regressions_past_threshold(capsys):
+    baseline = {"results": [record("slots.get", 10.0, slots=1000), record("slots.get", 10.0, slots=10),
+                            record("zero", 0.0)]}
+    results = [record("slots.get", 12.0, slots=1000), record("slots.get", 10.5, slots=10),
+               record("zero", 5.0), record("new", 1.0)]
+    assert compare(baseline, results, 0.1) == 1
+    lines = capsys.readouterr().out.splitlines()[2:]
+    assert len(lines) == 2
+    assert lines[0].endswith("+20.0%  [!]")
+    assert lines[1].endswith("+5.0%")
+
+def test_key_ignores_param_order():
+    assert key(record("x", 1, a=1, b=2)) == key({"name": "x", "params": {"b": 2, "a": 1}})
+
+def test_parse_list():
+    assert parse_list("1, 2,4,") == [1, 2, 4]
+    with pytest.raises(ValueError):
+        parse_list("1,x")
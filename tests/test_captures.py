@@ -0,0 +1,124 @@
+import sys
+
+import pytest
+
+from core.captures import Capture, parse_capture, compile_captures, line_feeder
+from core.slots import SlotManager
+from core.variables import VariableManager
+from cli.parser import parse_echt_args
+from cli.non_interactive import run_command
+from core.executor import CommandExecutor, RunContext
+
+def captured(selector, lines):
+    capture = Capture({"var": "x", "selector": selector})
+    for line in lines:
+        capture.feed(line)
+    return capture.value
+
+OUTPUT = ["open 22/tcp ssh", "", "open 80/tcp http", "open 443/tcp https", "done"]
+
+@pytest.mark.parametrize("selector, value", [
+    (r"/(\d+)\/tcp/", "22"),
+    (r"/(\d+)\/tcp/g", "22,80,443"),
+    (r"/https?/", "http"),
+    ("line:3", "open 80/tcp http"),
+    ("line:-2", "open 443/tcp https"),
+    ("last", "done"),
+    ("/nothing/", None),
+    ("line:9", None)
+])
+def test_selectors(selector, value):
+    assert captured(selector, OUTPUT) == value
+
+def test_first_match_stops_consuming():
+    capture = Capture({"var": "x", "selector": "/open/"})
+    for line in OUTPUT:
+        capture.feed(line)
+    assert capture.seen == 1
+
+@pytest.mark.parametrize("text", ["x", "@x = line:0", "@x = line:a", "@x = /(/", "@x = first"])
+def test_bad_specs_are_rejected(text):
+    with pytest.raises(ValueError):
+        parse_capture(text)
+
+def test_parse_capture():
+    assert parse_capture(" @port = /(\\d+)/ ") == {"var": "port", "selector": "/(\\d+)/"}
+
+def test_line_feeder_feeds_every_capture():
+    captures = compile_captures([{"var": "a", "selector": "last"}, {"var": "b", "selector": "line:1"}])
+    feed = line_feeder(captures)
+    for line in ["one", "two"]:
+        feed(line)
+    assert [capture.value for capture in captures] == ["two", "one"]
+    assert line_feeder([]) is None
+
+def test_variable_scope_overlays_without_persisting():
+    variables = VariableManager()
+    variables.set("target", "stored")
+    variables.set("port", "80")
+    scope = variables.scope()
+    scope.set("@target", "captured")
+    assert scope.get("target") == "captured"
+    assert scope.substitute("@target:@port") == "captured:80"
+    assert variables.get("target") == "stored"
+    scope.persist()
+    assert variables.get("target") == "captured"
+
+def test_variable_scope_seed_and_base():
+    variables = VariableManager()
+    variables.set("port", "80")
+    scope = variables.scope({"port": "8080"}, base=variables.get_all())
+    variables.set("port", "443")
+    assert scope.get("port") == "8080"
+    assert scope.seed == {"port": "8080"}
+    assert variables.scope(base={"other": "1"}).get("port") is None
+
+def test_edit_keeps_id_captures_and_usage():
+    slots = SlotManager()
+    slot_id = slots.create("echo one", "first")
+    slots.set_captures(slot_id, [{"var": "x", "selector": "last"}])
+    slots.record_usage({slot_id: 3})
+    assert slots.edit(slot_id, command="echo two", name="second")
+    slot = slots.get(slot_id)
+    assert (slot["command"], slot["name"]) == ("echo two", "second")
+    assert slot["captures"] == [{"var": "x", "selector": "last"}]
+    assert slot["usage_count"] == 3
+    assert [s["id"] for s in slots.list_all()] == [slot_id]
+    assert [entry["id"] for entry in slots.search("second")] == [slot_id]
+    slots.delete(slot_id)
+    assert not slots.edit(slot_id, name="gone")
+
+@pytest.mark.parametrize("argv", [["run", "find"], ["slot", "run", "find"]])
+def test_run_honours_captures(monkeypatch, capfd, argv):
+    slots = SlotManager()
+    slot_id = slots.create("echo found.example", "find")
+    slots.set_captures(slot_id, [{"var": "target", "selector": "last"}])
+    
+    monkeypatch.setattr(sys, "argv", ["echt"] + argv)
+    assert run_command(parse_echt_args()) == 0
+    assert "Captured @target = found.example" in capfd.readouterr().out
+    assert VariableManager().get("target") is None
+    
+    monkeypatch.setattr(sys, "argv", ["echt"] + argv + ["--save-captures"])
+    assert run_command(parse_echt_args()) == 0
+    assert VariableManager().get("target") == "found.example"
+
+def test_streamed_output_survives_bytes_that_are_not_utf8(tmp_path):
+    lines = []
+    with open(tmp_path / "run.log", "w") as out:
+        result = CommandExecutor.execute(r"printf 'ok\n\xff\xfe\n'", context=RunContext(output=out),
+                                         on_line=lines.append)
+    assert result["success"]
+    assert lines == ["ok", "��"]
+
+def test_streamed_command_is_killed_when_reading_fails(tmp_path):
+    def fail(line):
+        raise RuntimeError("capture broke")
+    
+    started = []
+    context = RunContext(output=open(tmp_path / "run.log", "w"))
+    context.started = lambda process, command, step=None: started.append(process)
+    result = CommandExecutor.execute("echo first; sleep 30", context=context, on_line=fail)
+    context.output.close()
+    assert result == {"success": False, "error": "capture broke", "command": "echo first; sleep 30"}
+    assert started[0].returncode is not None
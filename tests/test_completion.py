@@ -0,0 +1,53 @@
+from cli.completion import PrefixTrie, FrameworkCompleter
+from core.slots import SlotManager
+from core.loads import LoadManager
+from core.variables import VariableManager
+
+def test_trie_completes_prefix_in_sorted_order():
+    trie = PrefixTrie(["scan", "show", "set", "sort", "stats"])
+    assert trie.complete("s") == ["scan", "set", "show", "sort", "stats"]
+    assert trie.complete("sh") == ["show"]
+    assert trie.complete("x") == []
+    assert trie.complete("s", limit=2) == ["scan", "set"]
+
+def test_trie_counts_duplicates():
+    trie = PrefixTrie(["web", "web"])
+    trie.remove("web")
+    assert trie.complete("w") == ["web"]
+    trie.remove("web")
+    assert trie.complete("w") == []
+    assert trie.root.children == {}
+
+def test_trie_remove_keeps_longer_and_shorter_words():
+    trie = PrefixTrie(["we", "web", "webs"])
+    trie.remove("web")
+    assert trie.complete("w") == ["we", "webs"]
+    trie.remove("missing")
+    trie.remove("w")
+    assert trie.complete("w") == ["we", "webs"]
+
+def completer():
+    slots, loads, variables = SlotManager(), LoadManager(), VariableManager()
+    return FrameworkCompleter(["show", "runs", "runl"], slots, loads, variables), slots, loads, variables
+
+def test_completer_follows_manager_changes():
+    comp, slots, loads, variables = completer()
+    slots.create("echo", "ping")
+    loads.create_load("probe", [1], "s")
+    variables.set("target", "x")
+    assert comp.candidates(["runs"], "p") == ["ping"]
+    assert comp.candidates(["runl"], "p") == ["probe"]
+    assert comp.candidates(["show", "var"], "") == ["@target"]
+
+    slots.delete("ping")
+    loads.edit_load("probe", name="pulse")
+    variables.delete("target")
+    assert comp.candidates(["runs"], "p") == []
+    assert comp.candidates(["runl"], "p") == ["pulse"]
+    assert comp.candidates([], "@") == []
+
+def test_completer_commands_and_subcommands():
+    comp = completer()[0]
+    assert comp.candidates([], "ru") == ["runl", "runs"]
+    assert comp.candidates(["show"], "s") == ["slots", "slot"]
+    assert comp.candidates(["sort", "id"], "l") == ["loads"]
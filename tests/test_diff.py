@@ -0,0 +1,94 @@
+import difflib
+
+import pytest
+
+from core import diff
+from core.diff import diff_outputs, select_runs, diff_runs, _range
+from core.objects import ObjectStore, OutputWriter
+
+@pytest.fixture
+def store(tmp_path):
+    return ObjectStore(str(tmp_path / "objects"))
+
+def put(store, lines):
+    writer = OutputWriter(store)
+    writer.write("".join(line + "\n" for line in lines))
+    return writer.close()
+
+def check_hunks(hunks, old, new):
+    """Every hunk's lines sit where its header says, on both sides"""
+    hunk = None
+    for line in hunks + ["@@ -0 +0 @@"]:
+        if line.startswith("@@"):
+            if hunk:
+                (old_start, old_lines), (new_start, new_lines) = hunk
+                assert old[old_start:old_start + len(old_lines)] == old_lines
+                assert new[new_start:new_start + len(new_lines)] == new_lines
+            ranges = line.split()[1:3]
+            starts = [max(int(part[1:].split(",")[0]) - 1, 0) for part in ranges]
+            hunk = [(starts[0], []), (starts[1], [])]
+            continue
+        if line[0] in " -":
+            hunk[0][1].append(line[1:])
+        if line[0] in " +":
+            hunk[1][1].append(line[1:])
+
+def test_range_matches_unified_diff():
+    assert _range(0, 1) == "1"
+    assert _range(4, 3) == "5,3"
+    assert _range(4, 0) == "4,0"
+
+def test_small_outputs_match_difflib(store):
+    old = ["alpha", "beta", "gamma", "delta", "epsilon"]
+    new = ["alpha", "beta", "GAMMA", "delta", "epsilon", "zeta"]
+    expected = list(difflib.unified_diff(old, new, lineterm="", n=1))[2:]
+    assert list(diff_outputs(store, put(store, old), put(store, new), context=1)) == expected
+    assert list(diff_outputs(store, put(store, old), put(store, old))) == []
+
+def test_only_changed_chunks_are_read(store, monkeypatch):
+    old = [f"host {i} port {i % 1000} open" for i in range(60000)]
+    new = list(old)
+    new[100] = "host changed"
+    new.insert(45000, "host added")
+    old_digest, new_digest = put(store, old), put(store, new)
+    reads = []
+    get = store.get
+    monkeypatch.setattr(store, "get", lambda digest: reads.append(digest) or get(digest))
+    hunks = list(diff_outputs(store, old_digest, new_digest))
+    assert [line for line in hunks if line[0] in "+-"] == ["-host 100 port 100 open", "+host changed", "+host added"]
+    check_hunks(hunks, old, new)
+    chunks = len(store.manifest(new_digest)["chunks"])
+    # Shared chunks are read once to count their lines, differing ones once more to diff them
+    assert len(reads) < chunks + 10
+
+def test_large_regions_are_compared_without_order(store, monkeypatch):
+    monkeypatch.setattr(diff, "ALIGN_LIMIT", 4)
+    old = ["a", "b", "c"]
+    new = ["c", "b", "d"]
+    hunks = list(diff_outputs(store, put(store, old), put(store, new)))
+    assert hunks == ["@@ -1 +1 @@ large change, lines compared without order", "-a", "+d"]
+
+def runs(*numbers):
+    return [{"run": number} for number in numbers]
+
+def test_select_runs():
+    kept = runs(3, 4, 5)
+    assert select_runs(kept) == (kept[1], kept[2])
+    assert select_runs(kept, run_b=4) == (kept[0], kept[1])
+    assert select_runs(kept, run_a=3, run_b=5) == (kept[0], kept[2])
+    with pytest.raises(ValueError, match="Need two stored runs"):
+        select_runs(runs(1))
+    with pytest.raises(ValueError, match=r"Run 9 is not stored \(kept: 3, 4, 5\)"):
+        select_runs(kept, run_a=9)
+    with pytest.raises(ValueError, match="No stored run before run 3"):
+        select_runs(kept, run_b=3)
+
+def test_diff_runs_headers_and_missing_objects(store):
+    old = {"run": 1, "ts": "2026-01-01T10:00:00", "returncode": 0, "output": put(store, ["a"])}
+    new = {"run": 2, "ts": "2026-01-02T10:00:00", "returncode": 1, "output": put(store, ["b"])}
+    lines = list(diff_runs(store, old, new))
+    assert lines[:2] == ["--- run 1 (2026-01-01T10:00:00, exit 0)", "+++ run 2 (2026-01-02T10:00:00, exit 1)"]
+    assert lines[2:] == ["@@ -1 +1 @@", "-a", "+b"]
+    assert list(diff_runs(store, old, dict(new, output=old["output"]))) == []
+    with pytest.raises(ValueError, match="missing or damaged"):
+        list(diff_runs(store, old, dict(new, output="0" * 64)))
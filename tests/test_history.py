@@ -0,0 +1,106 @@
+import json
+
+import pytest
+
+from core.history import (RunHistory, quantile, bucket_index, bucket_value, read_stats, rebuild, slowest, unused,
+                          failure_rates, format_report, BUCKET_BASE)
+
+def buckets_for(durations):
+    buckets = {}
+    for seconds in durations:
+        index = str(bucket_index(seconds))
+        buckets[index] = buckets.get(index, 0) + 1
+    return buckets
+
+def test_bucket_index_and_value_agree():
+    for seconds in (0.002, 0.5, 3.0, 400.0):
+        index = bucket_index(seconds)
+        assert bucket_value(index, 0) <= seconds < bucket_value(index, 1)
+
+def test_quantile_interpolates_within_the_bucket():
+    buckets = buckets_for([1.0] * 100)
+    index = bucket_index(1.0)
+    assert quantile(buckets, 0.0) == pytest.approx(bucket_value(index, 0))
+    assert quantile(buckets, 0.5) == pytest.approx(bucket_value(index, 0.5))
+    assert quantile(buckets, 1.0) == pytest.approx(bucket_value(index, 1))
+    assert quantile({}, 0.5) is None
+
+def test_quantile_is_within_bucket_width_of_exact():
+    durations = [0.01 * 1.07 ** i for i in range(200)]
+    buckets = buckets_for(durations)
+    for fraction in (0.5, 0.9, 0.95, 0.99):
+        exact = durations[int(fraction * len(durations)) - 1]
+        assert exact / BUCKET_BASE <= quantile(buckets, fraction) <= exact * BUCKET_BASE
+
+def test_quantile_is_clamped_to_observed_range():
+    buckets = buckets_for([0.9, 1.0])
+    assert quantile(buckets, 0.95, 0.9, 1.0) <= 1.0
+    assert quantile(buckets_for([0.0001]), 0.5, 0.0001, 0.0001) == 0.0001
+
+def test_p95_is_not_below_the_mean_of_equal_runs(tmp_path):
+    history = RunHistory(str(tmp_path / "history.ndjson"), str(tmp_path / "stats.json"))
+    # Near the top of its bucket, where the bucket middle alone undershoots
+    for i in range(20):
+        history.command({"id": 1, "name": "scan"}, None, 0, 1.18)
+    history.flush()
+    row = slowest(read_stats(str(tmp_path / "stats.json")))[0]
+    assert bucket_value(bucket_index(1.18)) < 1.18
+    assert row["p50"] == row["p95"] == pytest.approx(row["mean"])
+
+def test_rebuild_matches_incremental_rollups(tmp_path):
+    history_path, stats_path = str(tmp_path / "history.ndjson"), str(tmp_path / "stats.json")
+    history = RunHistory(history_path, stats_path)
+    for returncode, duration in [(0, 0.2), (1, 0.4), (0, 1.5)]:
+        history.command({"id": 3, "name": "probe"}, "web", returncode, duration)
+    history.run_finished("web", 2.1)
+    history.flush()
+    incremental = read_stats(stats_path)
+    with open(history_path, "a") as f:
+        f.write("not json\n")
+    assert rebuild(history_path, stats_path) == 4
+    assert read_stats(stats_path) == incremental
+    slot = incremental["slots"]["3"]
+    assert (slot["runs"], slot["failures"], slot["min"], slot["max"]) == (3, 1, 0.2, 1.5)
+
+def test_rollups_written_without_min_max_still_report(tmp_path):
+    path = tmp_path / "stats.json"
+    path.write_text(json.dumps({"version": 1, "loads": {}, "slots": {
+        "1": {"name": "old", "runs": 2, "failures": 0, "seconds": 2.0, "buckets": buckets_for([1.0, 1.0])}
+    }}))
+    row = slowest(read_stats(str(path)))[0]
+    assert row["p50"] == pytest.approx(1.0, rel=0.2)
+    lines = format_report("slow", [row])
+    assert lines[2].split()[:3] == ["1", "old", "2"]
+
+def test_reused_slot_id_does_not_inherit_rollups(tmp_path):
+    history_path, stats_path = str(tmp_path / "history.ndjson"), str(tmp_path / "stats.json")
+    old = {"id": 1, "name": "old"}
+    history = RunHistory(history_path, stats_path)
+    history.command(old, None, 1, 5.0)
+    history.flush()
+    # Stamped as if the old slot ran before the new one was created
+    with open(history_path) as f:
+        record = json.loads(f.read())
+    record["ts"] = "2026-01-01T00:00:00"
+    with open(history_path, "w") as f:
+        f.write(json.dumps(record) + "\n")
+    rebuild(history_path, stats_path)
+    
+    new = {"id": 1, "name": "new", "created_at": "2026-02-01T00:00:00.5", "command": "ls"}
+    assert unused(read_stats(stats_path), [new]) == [new]
+    history.command(new, None, 0, 0.5)
+    history.flush()
+    stats = read_stats(stats_path)
+    assert unused(stats, [new]) == []
+    assert (stats["slots"]["1"]["name"], stats["slots"]["1"]["runs"], stats["slots"]["1"]["failures"]) == ("new", 1, 0)
+    
+    # Old records without a creation time are left out by the slot list instead
+    with open(history_path) as f:
+        records = [json.loads(line) for line in f]
+    with open(history_path, "w") as f:
+        for record in records:
+            record.pop("created", None)
+            f.write(json.dumps(record) + "\n")
+    assert rebuild(history_path, stats_path, slots=[new]) == 1
+    assert read_stats(stats_path)["slots"]["1"]["runs"] == 1
+    assert failure_rates(read_stats(stats_path)) == []
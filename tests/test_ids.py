@@ -0,0 +1,84 @@
+from core.ids import IdAllocator
+from core.slots import SlotManager
+from core.loads import LoadManager
+
+def records(live=(), deleted=()):
+    data = {str(i): {"id": i, "deleted": False} for i in live}
+    data.update({str(i): {"id": i, "deleted": True} for i in deleted})
+    return data
+
+def test_allocates_lowest_free_id_then_high_water():
+    ids = IdAllocator(records(live=[1, 2, 5], deleted=[4]))
+    assert ids.tombstones == 1
+    assert [ids.allocate() for _ in range(4)] == [3, 4, 6, 7]
+    assert ids.tombstones == 0
+
+def test_gaps_left_by_compaction_are_free():
+    ids = IdAllocator(records(live=[2, 6]))
+    assert [ids.allocate() for _ in range(5)] == [1, 3, 4, 5, 7]
+
+def test_release_tracks_tombstones_until_compacted():
+    ids = IdAllocator(records(live=[1, 2, 3]))
+    ids.release(2)
+    assert ids.tombstones == 1
+    ids.compacted()
+    assert ids.tombstones == 0
+    assert ids.allocate() == 2
+
+def test_restored_ids_are_allocated_again():
+    ids = IdAllocator(records(live=[1], deleted=[2]))
+    assert ids.allocate() == 2
+    ids.restore(2, deleted=True)
+    assert ids.tombstones == 1
+    assert ids.allocate() == 2
+    assert ids.allocate() == 3
+    ids.restore(3)
+    assert ids.tombstones == 0 and ids.allocate() == 3
+
+def test_empty_store():
+    ids = IdAllocator({})
+    assert ids.allocate() == 1
+    assert ids.allocate() == 2
+
+def test_slot_ids_are_reused_after_delete_and_compact():
+    slots = SlotManager()
+    for name in "abcd":
+        slots.create(f"echo {name}", name)
+    slots.delete("b")
+    slots.delete("c")
+    assert slots.compact() == 2
+    assert slots.create("echo e", "e") == 2
+    assert slots.create("echo f", "f") == 3
+    assert slots.create("echo g", "g") == 5
+    assert [slot["name"] for slot in slots.list_sorted()] == ["a", "e", "f", "d", "g"]
+
+def test_allocator_survives_rereads_but_not_outside_writes():
+    slots = SlotManager()
+    slots.create("echo a", "a")
+    ids = slots._ids
+    slots.list_all()
+    slots.create("echo b", "b")
+    assert slots._ids is ids
+    
+    SlotManager().create("echo c", "c")
+    assert slots.create("echo d", "d") == 4
+    assert slots._ids is not ids
+
+def test_auto_compaction_uses_tracked_tombstones(monkeypatch):
+    import core.slots
+    monkeypatch.setattr(core.slots, "COMPACT_MIN_TOMBSTONES", 2)
+    slots = SlotManager()
+    for i in range(3):
+        slots.create(f"echo {i}")
+    slots.delete(1)
+    assert "1" in slots.store.read()
+    slots.delete(2)
+    assert set(slots.store.read()) == {"3"}
+    assert slots._ids.tombstones == 0
+
+def test_load_ids_are_reused():
+    loads = LoadManager()
+    loads.create_load("one", [1])
+    loads.create_load("two", [1])
+    loads.delete("one")
+    assert loads.create_load("three", [1]) == 1
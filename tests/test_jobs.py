@@ -0,0 +1,66 @@
+import io
+import os
+import time
+
+import pytest
+
+from core.jobs import JobManager
+from core.executor import CommandExecutor
+
+@pytest.fixture
+def jobs():
+    manager = JobManager(max_workers=2)
+    yield manager
+    manager.shutdown()
+
+def running(command):
+    return lambda context: CommandExecutor.execute(command, context=context)
+
+def test_job_output_goes_to_its_log(jobs):
+    job = jobs.submit("echo", running("echo hello from job"))
+    jobs.wait(job.id)
+    assert job.status == "done"
+    out = io.StringIO()
+    jobs.follow(job, out)
+    assert "hello from job" in out.getvalue()
+    assert jobs.drain_notices() == [job]
+    assert jobs.drain_notices() == []
+
+def test_failed_and_crashing_jobs(jobs):
+    failed = jobs.submit("false", running("exit 3"))
+    def crash(context):
+        raise RuntimeError("boom")
+    crashed = jobs.submit("crash", crash)
+    jobs.wait()
+    assert failed.status == "failed"
+    assert crashed.status == "failed"
+    assert crashed.result == {"success": False, "error": "boom"}
+
+def test_kill_stops_a_running_job(jobs):
+    job = jobs.submit("sleep", running("sleep 30"))
+    deadline = time.monotonic() + 5
+    while not job.context.running_commands() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert job.progress() == "running: sleep 30"
+    assert jobs.kill(job.id)
+    jobs.wait(job.id)
+    assert job.status == "killed"
+    assert job.elapsed < 5
+    assert not jobs.kill(job.id)
+
+def test_jobs_are_numbered_and_looked_up(jobs):
+    first = jobs.submit("a", running("true"))
+    second = jobs.submit("b", running("true"))
+    jobs.wait()
+    assert (first.id, second.id) == (1, 2)
+    assert jobs.get("2") is second
+    assert jobs.get("x") is None
+    assert jobs.list() == [first, second]
+    assert jobs.running() == []
+
+def test_shutdown_removes_logs():
+    jobs = JobManager(max_workers=1)
+    job = jobs.submit("echo", running("echo x"))
+    jobs.wait()
+    jobs.shutdown()
+    assert not os.path.exists(job.log_path)
@@ -0,0 +1,50 @@
+import io
+import json
+
+import pytest
+
+from core.listing import matches, paginate, write_ndjson
+from core.slots import SlotManager
+
+def test_matches_any_field_case_insensitively():
+    assert matches("WEB", "web-scan", "curl")
+    assert matches("curl", "web-scan", "curl -s")
+    assert not matches("dns", "web-scan", "curl")
+    assert matches(None, "anything")
+
+def test_paginate_without_key_is_lazy():
+    consumed = []
+    def items():
+        for i in range(100):
+            consumed.append(i)
+            yield i
+    assert list(paginate(items(), 10, 5)) == [10, 11, 12, 13, 14]
+    assert len(consumed) == 15
+
+def test_paginate_with_key_matches_full_sort():
+    items = [7, 3, 9, 1, 5, 3, 8]
+    for reverse in (False, True):
+        full = sorted(items, reverse=reverse)
+        assert list(paginate(iter(items), 2, 3, key=lambda x: x, reverse=reverse)) == full[2:5]
+        assert list(paginate(iter(items), 4, None, key=lambda x: x, reverse=reverse)) == full[4:]
+
+def test_paginate_clamps_negative_offset_and_runs_off_the_end():
+    assert list(paginate(iter(range(5)), -3, 2)) == [0, 1]
+    assert list(paginate(iter(range(5)), 10, 2, key=lambda x: x)) == []
+
+def test_write_ndjson_streams_one_record_per_line():
+    out = io.StringIO()
+    assert write_ndjson(iter([{"id": 1}, {"id": 2}]), out) == 2
+    assert [json.loads(line) for line in out.getvalue().splitlines()] == [{"id": 1}, {"id": 2}]
+
+def test_slot_pages_by_id_name_and_pattern():
+    slots = SlotManager()
+    for name in ["delta", "alpha", "charlie", "bravo"]:
+        slots.create(f"echo {name}", name)
+    slots.delete("charlie")
+    assert [slot["id"] for slot in slots.page()] == [1, 2, 4]
+    assert [slot["id"] for slot in slots.page(reverse=True, limit=2)] == [4, 2]
+    assert [slot["name"] for slot in slots.page(sort="name", offset=1)] == ["bravo", "delta"]
+    assert [slot["name"] for slot in slots.page(pattern="LT")] == ["delta"]
+    with pytest.raises(ValueError):
+        slots.page(sort="size")
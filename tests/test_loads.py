@@ -0,0 +1,158 @@
+import sys
+import json
+
+import pytest
+
+from core.utils import data_path
+from core.loads import LoadManager, migrate_loads, SCHEMA_VERSION
+from core.slots import SlotManager
+from core.executor import RunContext
+from core.scheduler import Throttle
+
+def test_migrate_loads_indexes_live_names():
+    v1 = {
+        "1": {"id": 1, "name": "web", "slot_ids": [1], "mode": "serial", "deleted": False},
+        "2": {"id": 2, "name": "_deleted_2", "slot_ids": [], "mode": "serial", "deleted": True},
+        "web": {"id": 1, "name": "web", "slot_ids": [1], "mode": "serial", "deleted": False}
+    }
+    data = migrate_loads(v1)
+    assert data["version"] == SCHEMA_VERSION
+    assert sorted(data["loads"]) == ["1", "2"]
+    assert data["names"] == {"web": "1"}
+
+def test_version_1_store_is_migrated_on_open():
+    record = {"id": 1, "name": "web", "slot_ids": [1, 2], "mode": "parallel", "deleted": False}
+    with open(data_path("loads.json"), "w") as f:
+        json.dump({"1": record, "web": record}, f)
+    
+    loads = LoadManager()
+    assert loads.get("web")["slot_ids"] == [1, 2]
+    assert loads.get(1)["name"] == "web"
+    with open(data_path("loads.json")) as f:
+        assert json.load(f)["version"] == SCHEMA_VERSION
+
+def test_create_rejects_name_of_live_load():
+    loads = LoadManager()
+    loads.create_load("web", [1], "s")
+    with pytest.raises(ValueError, match="already in use"):
+        loads.create_load("web", [2], "p")
+    assert [load["name"] for load in loads.list_all()] == ["web"]
+    assert loads.get("web")["slot_ids"] == [1]
+
+def test_name_of_deleted_load_can_be_taken():
+    loads = LoadManager()
+    loads.create_load("web", [1], "s")
+    loads.delete("web")
+    new_id = loads.create_load("web", [2], "s")
+    assert loads.get("web")["id"] == new_id
+
+def test_rename_rejects_name_of_other_load():
+    loads = LoadManager()
+    loads.create_load("web", [1], "s")
+    loads.create_load("db", [2], "s")
+    with pytest.raises(ValueError, match="already in use"):
+        loads.edit_load("db", name="web")
+    assert loads.get("web")["slot_ids"] == [1]
+    assert loads.get("db")["slot_ids"] == [2]
+
+def test_rename_to_own_name_is_allowed():
+    loads = LoadManager()
+    loads.create_load("web", [1], "s")
+    assert loads.edit_load("web", name="web", mode="p")
+    assert loads.get("web")["mode"] == "parallel"
+
+def test_rename_frees_old_name():
+    loads = LoadManager()
+    loads.create_load("web", [1], "s")
+    loads.edit_load("web", name="site")
+    assert loads.get("web") is None
+    loads.create_load("web", [2], "s")
+    assert loads.get("site")["slot_ids"] == [1]
+
+class KeyRecorder(RunContext):
+    """Run context remembering the throttle key of every submitted command"""
+    
+    def __init__(self, output):
+        super().__init__(output=output, throttle=Throttle("@target", per_key=1))
+        self.keys = []
+    
+    def submit(self, flow, key, fn, *args):
+        self.keys.append(key)
+        return super().submit(flow, key, fn, *args)
+
+def throttled_load(mode, nested=False):
+    slots = SlotManager()
+    slots.variables.set("target", "first.example")
+    slots.create("echo next.example", "find")
+    slots.create("echo @target", "probe")
+    slots.set_captures(1, [{"var": "target", "selector": "last"}])
+    loads = LoadManager()
+    loads.create_load("inner", [1, 2], mode)
+    loads.create_load("outer", ["load:inner"], mode)
+    return slots, loads, "outer" if nested else "inner"
+
+@pytest.mark.parametrize("nested", [False, True])
+def test_serial_throttle_key_follows_captures(tmp_path, nested):
+    slots, loads, name = throttled_load("s", nested)
+    with open(tmp_path / "run.log", "w") as out:
+        context = KeyRecorder(out)
+        result = loads.execute_load(name, slots, context=context)
+    assert result["success"]
+    assert context.keys == ["first.example", "next.example"]
+
+@pytest.fixture
+def worker_counts(monkeypatch):
+    counts = []
+    monkeypatch.setattr(LoadManager, "execute_load",
+                        lambda self, *args, **kwargs: counts.append(kwargs["max_workers"]) or
+                        {"success": True, "results": []})
+    SlotManager().create("true", "quick")
+    LoadManager().create_load("fan", [1], "p")
+    return counts
+
+def test_echt_load_run_passes_workers(worker_counts, monkeypatch):
+    from cli.parser import parse_echt_args
+    from cli.non_interactive import run_command
+    for extra in ([], ["--workers", "5"]):
+        monkeypatch.setattr(sys, "argv", ["echt", "load", "run", "fan", "--no-progress"] + extra)
+        assert run_command(parse_echt_args()) == 0
+    monkeypatch.setattr(sys, "argv", ["echt", "load", "run", "fan", "--workers", "0"])
+    assert run_command(parse_echt_args()) == 1
+    assert worker_counts == [3, 5]
+
+def test_framework_runl_passes_workers(worker_counts, capsys):
+    from cli.framework import ECHTableFramework
+    framework = ECHTableFramework(session=False)
+    framework._cmd_runl(["fan", "--no-progress", "--workers", "6"])
+    framework._cmd_runl(["fan", "--no-progress"])
+    framework._cmd_runl(["fan", "--workers", "-1"])
+    assert worker_counts == [6, 3]
+    assert "--workers must be at least 1: -1" in capsys.readouterr().out
+
+def test_weight_is_validated_and_reaches_the_run(tmp_path):
+    SlotManager().create("true", "quick")
+    loads = LoadManager()
+    loads.create_load("heavy", [1], "p", weight="2.5")
+    assert loads.get("heavy")["weight"] == 2.5
+    assert "weight" not in loads.get(loads.create_load("plain", [1], "p"))
+    for bad in (0, -1, "lots", float("nan"), float("inf")):
+        with pytest.raises(ValueError, match="Load weight must be a positive number"):
+            loads.create_load(f"bad_{bad}", [1], "p", weight=bad)
+    with pytest.raises(ValueError):
+        loads.edit_load("heavy", weight=0)
+    loads.edit_load("heavy", weight=4)
+    
+    with open(tmp_path / "run.log", "w") as out:
+        context = RunContext(output=out)
+        assert loads.execute_load("heavy", SlotManager(), context=context)["success"]
+    assert context.weight == 4.0
+
+def test_echt_load_create_takes_a_weight(monkeypatch):
+    from cli.parser import parse_echt_args
+    from cli.non_interactive import run_command
+    SlotManager().create("true", "quick")
+    monkeypatch.setattr(sys, "argv", ["echt", "load", "create", "1", "--name", "bulk", "--weight", "0.5"])
+    assert run_command(parse_echt_args()) == 0
+    assert LoadManager().get("bulk")["weight"] == 0.5
+    monkeypatch.setattr(sys, "argv", ["echt", "load", "create", "1", "--name", "none", "--weight", "0"])
+    assert run_command(parse_echt_args()) == 1
@@ -0,0 +1,54 @@
+import io
+import tracemalloc
+
+import pytest
+
+from core import memtrace
+from core.memtrace import MemTracer, _format_size
+
+@pytest.fixture
+def tracer():
+    tracer = MemTracer()
+    yield tracer
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+def test_format_size():
+    assert _format_size(512) == "512 B"
+    assert _format_size(1536) == "1.5 KB"
+    assert _format_size(-3 * 1024 * 1024) == "-3.0 MB"
+    assert _format_size(5 * 1024 ** 3) == "5.0 GB"
+
+def test_disabled_tracer_records_nothing(tracer):
+    tracer.checkpoint("load")
+    out = io.StringIO()
+    tracer.report(out)
+    assert not tracer.checkpoints and out.getvalue() == ""
+
+def test_growth_is_attributed_to_the_allocating_line(tracer):
+    tracer.enable()
+    kept = [bytearray(1024) for i in range(200)]
+    tracer.checkpoint("allocated")
+    point = tracer.checkpoints[-1]
+    assert point.label == "allocated"
+    assert point.growth and point.growth[0].size_diff >= 200 * 1024
+    assert point.growth[0].traceback[0].filename == __file__
+    assert len(kept) == 200
+
+def test_repeated_labels_are_rate_limited(tracer, monkeypatch):
+    tracer.enable()
+    for i in range(3):
+        tracer.checkpoint("command")
+    assert [point.label for point in tracer.checkpoints] == ["start", "command"]
+    monkeypatch.setattr(memtrace, "MIN_INTERVAL", 0)
+    tracer.checkpoint("command")
+    assert len(tracer.checkpoints) == 3
+
+def test_report_ends_with_exit_and_top_sites(tracer):
+    tracer.enable()
+    out = io.StringIO()
+    tracer.report(out)
+    text = out.getvalue()
+    assert "[*] Memory trace (2 checkpoints)" in text
+    assert [line.split()[0] for line in text.splitlines() if "current" in line] == ["start", "exit"]
+    assert "[*] Top allocation sites" in text
@@ -0,0 +1,57 @@
+from core.metrics import MetricsSink, metrics_sink, parse_textfile, format_textfile, _escape, _unescape
+
+def test_label_values_are_escaped_and_restored():
+    value = 'say "hi"\\n\nnext'
+    assert _unescape(_escape(value)) == value
+    assert "\n" not in _escape(value)
+
+def test_format_and_parse_round_trip():
+    samples = {
+        ("echtable_slot_executions_total", (("load", ""), ("result", "ok"), ("slot", 'a "b"'))): 3.0,
+        ("echtable_slot_duration_seconds_sum", (("load", "x"), ("slot", "a"))): 1.5,
+        ("echtable_custom", ()): 7.0
+    }
+    text = format_textfile(samples)
+    assert parse_textfile(text) == samples
+    assert "# TYPE echtable_slot_executions_total counter" in text
+    assert "# TYPE echtable_custom untyped" in text
+    assert 'echtable_slot_executions_total{load="",result="ok",slot="a \\"b\\""} 3\n' in text
+    assert "} 1.5\n" in text
+
+def test_histogram_buckets_are_cumulative_and_ordered():
+    sink = MetricsSink(None)
+    sink.command("scan", "web", 0, 0.3, 10)
+    text = format_textfile(sink.counters)
+    buckets = [line for line in text.splitlines() if line.startswith("echtable_slot_duration_seconds_bucket")]
+    bounds = [line.split('le="')[1].split('"')[0] for line in buckets]
+    assert bounds[-1] == "+Inf"
+    assert [float(bound) for bound in bounds[:-1]] == sorted(float(bound) for bound in bounds[:-1])
+    counts = {bound: line.rsplit(" ", 1)[1] for bound, line in zip(bounds, buckets)}
+    assert len(counts) == 12
+    assert (counts["0.1"], counts["0.5"], counts["+Inf"]) == ("0", "1", "1")
+
+def test_flush_adds_counters_and_replaces_gauges(tmp_path):
+    path = str(tmp_path / "echtable.prom")
+    for returncode in (0, 2):
+        sink = MetricsSink(path)
+        sink.command("scan", "web", returncode, 0.2, 100)
+        sink.run_finished("web", busy=1.0, workers=2, wall=1.0)
+        sink.flush()
+    with open(path) as f:
+        samples = parse_textfile(f.read())
+    labels = (("load", "web"), ("slot", "scan"))
+    assert samples[("echtable_slot_output_bytes_total", labels)] == 200
+    assert samples[("echtable_slot_duration_seconds_count", labels)] == 2
+    assert samples[("echtable_slot_exit_codes_total", (("code", "2"),) + labels)] == 1
+    assert samples[("echtable_worker_utilization_ratio", (("load", "web"),))] == 0.5
+
+def test_flush_without_samples_writes_nothing(tmp_path):
+    path = tmp_path / "echtable.prom"
+    MetricsSink(str(path)).flush()
+    assert not path.exists()
+
+def test_sink_from_config(write_config, tmp_path):
+    assert metrics_sink() is None
+    write_config(metrics_file=str(tmp_path / "m.prom"))
+    assert metrics_sink().path == str(tmp_path / "m.prom")
+    assert metrics_sink("other.prom").path == "other.prom"
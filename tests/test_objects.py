@@ -0,0 +1,148 @@
+import os
+import json
+import time
+from datetime import datetime
+
+import pytest
+
+from core import objects
+from core.objects import ObjectStore, OutputWriter, RunOutputs, read_index, keep_outputs, run_outputs
+
+def stored(store, text, pieces=1):
+    writer = OutputWriter(store)
+    step = len(text) // pieces + 1
+    for start in range(0, len(text), step):
+        writer.write(text[start:start + step])
+    return writer.close(), writer
+
+def content(store, digest):
+    return b"".join(store.get(chunk) for chunk, size in store.manifest(digest)["chunks"])
+
+def test_put_and_get_round_trip(tmp_path):
+    store = ObjectStore(str(tmp_path / "objects"))
+    digest = store.put(b"hello\n")
+    assert store.put(b"hello\n") == digest
+    assert store.get(digest) == b"hello\n"
+    assert store.path(digest).endswith(os.path.join(digest[:2], digest[2:]))
+    assert store.usage()[0] == 1
+    with pytest.raises(OSError):
+        store.get("0" * 64)
+
+def test_output_round_trips_however_it_is_written(tmp_path):
+    store = ObjectStore(str(tmp_path / "objects"))
+    text = "".join(f"line {i} of the scan\n" for i in range(40000)) + "no newline"
+    whole, writer = stored(store, text)
+    pieces, other = stored(store, text, pieces=7)
+    assert whole == pieces
+    assert content(store, whole) == text.encode()
+    assert store.manifest(whole)["size"] == writer.size == len(text)
+    sizes = [size for chunk, size in writer.chunks]
+    assert len(sizes) > 1 and max(sizes) <= objects.MAX_CHUNK
+
+def test_changed_line_keeps_most_chunks(tmp_path):
+    store = ObjectStore(str(tmp_path / "objects"))
+    lines = [f"host {i} port {i % 1000} open\n" for i in range(60000)]
+    old, old_writer = stored(store, "".join(lines))
+    lines[30000] = "host changed\n"
+    new, new_writer = stored(store, "".join(lines))
+    assert old != new
+    old_chunks = [chunk for chunk, size in old_writer.chunks]
+    new_chunks = [chunk for chunk, size in new_writer.chunks]
+    assert len(set(old_chunks) - set(new_chunks)) == 1
+    assert len(new_chunks) > 4
+
+def test_endless_line_is_stored_in_bounded_chunks(tmp_path):
+    store = ObjectStore(str(tmp_path / "objects"))
+    digest, writer = stored(store, "x" * (objects.MAX_CHUNK * 2 + 5), pieces=64)
+    sizes = [size for chunk, size in writer.chunks]
+    # Cut once the partial line reaches MAX_CHUNK, so at most one write over it
+    assert len(sizes) == 2 and max(sizes) < objects.MAX_CHUNK + objects.MAX_CHUNK * 2 // 64 + 1
+    assert len(content(store, digest)) == objects.MAX_CHUNK * 2 + 5
+
+def test_empty_output_has_a_manifest(tmp_path):
+    store = ObjectStore(str(tmp_path / "objects"))
+    digest, writer = stored(store, "")
+    assert store.manifest(digest) == {"size": 0, "chunks": []}
+
+def record(outputs, slot, text):
+    digest, writer = stored(outputs.store, text)
+    return outputs.add(slot, digest, 0, writer.size)
+
+def test_run_window_and_changed_flag(tmp_path):
+    outputs = RunOutputs(2, str(tmp_path / "objects"))
+    slot = {"id": 4, "name": "scan"}
+    assert [record(outputs, slot, text) for text in ("a\n", "a\n", "b\n")] == [None, False, True]
+    outputs.flush()
+    runs = outputs.runs(slot)
+    assert [run["run"] for run in runs] == [2, 3]
+    assert content(outputs.store, runs[-1]["output"]) == b"b\n"
+    index = read_index(outputs.index_path)
+    assert index["refs"] == {runs[0]["output"]: 1, runs[1]["output"]: 1}
+    assert index["dropped"] == 0
+    
+    # A new recorder picks up the latest output from the index
+    assert record(RunOutputs(2, str(tmp_path / "objects")), slot, "b\n") is False
+
+def age(store, seconds):
+    for name, path in store.walk():
+        stamp = time.time() - seconds
+        os.utime(path, (stamp, stamp))
+
+def test_compact_collects_unreferenced_objects(tmp_path):
+    outputs = RunOutputs(1, str(tmp_path / "objects"))
+    kept, gone = {"id": 1, "name": "kept"}, {"id": 2, "name": "gone"}
+    record(outputs, kept, "old\n")
+    record(outputs, kept, "new\n")
+    record(outputs, gone, "deleted slot\n")
+    outputs.flush()
+    
+    # Fresh objects survive: another run may not have indexed them yet
+    assert outputs.compact([kept]) == (0, 0)
+    age(outputs.store, objects.GC_GRACE + 60)
+    removed, freed = outputs.compact([kept])
+    assert removed == 4 and freed > 0
+    index = read_index(outputs.index_path)
+    assert list(index["slots"]) == ["1"]
+    assert content(outputs.store, outputs.runs(kept)[0]["output"]) == b"new\n"
+    assert outputs.store.usage()[0] == 2
+
+def test_flush_collects_once_enough_outputs_were_dropped(tmp_path, monkeypatch):
+    monkeypatch.setattr(objects, "GC_THRESHOLD", 2)
+    outputs = RunOutputs(1, str(tmp_path / "objects"))
+    slot = {"id": 1, "name": "scan"}
+    for text in ("a\n", "b\n"):
+        record(outputs, slot, text)
+    outputs.flush()
+    age(outputs.store, objects.GC_GRACE + 60)
+    record(outputs, slot, "c\n")
+    outputs.flush()
+    assert read_index(outputs.index_path)["dropped"] == 0
+    assert outputs.store.usage()[0] == 2
+
+def test_reused_slot_id_starts_a_fresh_history(tmp_path):
+    outputs = RunOutputs(3, str(tmp_path / "objects"))
+    old = {"id": 1, "name": "old", "created_at": "2026-01-01T00:00:00.000001"}
+    record(outputs, old, "old output\n")
+    record(outputs, old, "old output\n")
+    outputs.flush()
+    with open(outputs.index_path) as f:
+        index = json.load(f)
+    for run in index["slots"]["1"]["runs"]:
+        run["ts"] = "2026-01-01T00:00:05"
+    with open(outputs.index_path, "w") as f:
+        json.dump(index, f)
+    
+    new = {"id": 1, "name": "new", "created_at": datetime.now().isoformat()}
+    outputs = RunOutputs(3, str(tmp_path / "objects"))
+    assert outputs.runs(new) == []
+    assert record(outputs, new, "new output\n") is None
+    outputs.flush()
+    assert [(run["run"], run["changed"]) for run in outputs.runs(new)] == [(1, None)]
+    assert list(read_index(outputs.index_path)["refs"]) == [outputs.runs(new)[0]["output"]]
+
+def test_keep_outputs_from_config(write_config):
+    assert keep_outputs() == 0 and run_outputs() is None
+    write_config(keep_outputs="bad")
+    assert keep_outputs() == 0
+    write_config(keep_outputs=3)
+    assert run_outputs().keep == 3
@@ -0,0 +1,59 @@
+import os
+
+from core.executor import CommandExecutor, RunContext
+from core.slots import SlotManager
+from core.loads import LoadManager
+
+def run_pipeline(tmp_path, commands):
+    path = tmp_path / "out.log"
+    with open(path, "w") as out:
+        results = CommandExecutor.execute_pipe(commands, RunContext(output=out))
+    return results, path.read_text()
+
+def test_stages_stream_into_each_other(tmp_path):
+    results, output = run_pipeline(tmp_path, ["printf 'b\\na\\nc\\n'", "sort", "tr a-z A-Z"])
+    assert [result["success"] for result in results] == [True, True, True]
+    assert output.endswith("A\nB\nC\n")
+
+def test_each_stage_reports_its_own_exit_code(tmp_path):
+    results, output = run_pipeline(tmp_path, ["echo x", "cat; exit 4", "cat"])
+    assert [result["returncode"] for result in results] == [0, 4, 0]
+    assert "x" in output
+    assert "Stage failed: cat; exit 4" in output
+
+def test_no_descriptors_leak(tmp_path):
+    before = len(os.listdir("/proc/self/fd"))
+    for _ in range(5):
+        run_pipeline(tmp_path, ["yes | head -1000", "wc -l"])
+    assert len(os.listdir("/proc/self/fd")) <= before
+
+def test_pipe_load_inlines_nested_loads(tmp_path):
+    slots = SlotManager()
+    slots.create("printf '3\\n1\\n2\\n'", "numbers")
+    slots.create("sort -n", "sort")
+    slots.create("head -1", "first")
+    loads = LoadManager()
+    loads.create_load("ordered", [1, 2], "s")
+    loads.create_load("smallest", ["load:ordered", 3], "pipe")
+    with open(tmp_path / "out.log", "w") as out:
+        result = loads.execute_load("smallest", slots, context=RunContext(output=out))
+    assert result["success"]
+    assert [item["command"] for item in result["results"]] == ["printf '3\\n1\\n2\\n'", "sort -n", "head -1"]
+    assert (tmp_path / "out.log").read_text().endswith("1\n")
+
+def test_stage_stopped_by_its_reader_is_not_a_failure(tmp_path):
+    results, output = run_pipeline(tmp_path, ["yes", "head -1"])
+    assert [result["returncode"] for result in results] == [-13, 0]
+    assert [result["success"] for result in results] == [True, True]
+    assert "Stage failed" not in output
+    
+    slots = SlotManager()
+    slots.create("yes", "yes")
+    slots.create("head -1", "first")
+    LoadManager().create_load("endless", [1, 2], "pipe")
+    with open(tmp_path / "load.log", "w") as out:
+        assert LoadManager().execute_load("endless", slots, context=RunContext(output=out))["success"]
+    
+    # Only earlier stages: the last one has no reader to lose
+    results, output = run_pipeline(tmp_path, ["echo x", "kill -PIPE $$"])
+    assert [result["success"] for result in results] == [True, False]
@@ -0,0 +1,114 @@
+import pytest
+
+from core.plan import ExecutionPlan, parse_entries, is_load_ref
+from core.slots import SlotManager
+from core.loads import LoadManager
+
+@pytest.fixture
+def managers():
+    slots = SlotManager()
+    for name in "abcd":
+        slots.create(f"echo {name}", name)
+    return slots, LoadManager()
+
+def test_parse_entries():
+    assert parse_entries("1, 2,load:recon,,load:3") == [1, 2, "load:recon", "load:3"]
+    assert is_load_ref("load:3") and not is_load_ref(3)
+    with pytest.raises(ValueError):
+        parse_entries("1,load:")
+    with pytest.raises(ValueError):
+        parse_entries("1,x")
+
+def test_serial_chains_and_parallel_fans_out(managers):
+    slots, loads = managers
+    loads.create_load("fan", [2, 3], "p")
+    loads.create_load("outer", [1, "load:fan", 4], "s")
+    plan = ExecutionPlan(loads, slots, loads.get("outer"))
+    names = [step.slots[0]["name"] for step in plan.steps]
+    assert names == ["a", "b", "c", "d"]
+    assert [set(step.after) for step in plan.steps] == [set(), {0}, {0}, {1, 2}]
+
+def test_cycles_are_refused(managers):
+    slots, loads = managers
+    loads.create_load("x", [1], "s")
+    loads.create_load("y", [2, "load:x"], "s")
+    with pytest.raises(ValueError, match="Load cycle"):
+        loads.edit_load("x", slot_ids=[1, "load:y"])
+    with pytest.raises(ValueError, match="Load cycle"):
+        loads.edit_load("x", slot_ids=["load:x"])
+    
+    # A cycle that got into the store anyway is caught when planning
+    with loads.store.update() as data:
+        data["loads"]["1"]["slot_ids"] = [1, "load:2"]
+    with pytest.raises(ValueError, match="Load cycle: y -> x -> y"):
+        ExecutionPlan(loads, slots, loads.get("y"))
+    assert "Load cycle" in loads.execute_load("y", slots)["error"]
+
+def test_missing_nested_load_is_reported(managers):
+    slots, loads = managers
+    loads.create_load("x", [1, "load:nope"], "s")
+    with pytest.raises(ValueError, match="Load not found: nope"):
+        ExecutionPlan(loads, slots, loads.get("x"))
+
+def test_delete_refuses_included_load(managers):
+    slots, loads = managers
+    loads.create_load("inner", [1], "s")
+    loads.create_load("by_id", ["load:1"], "s")
+    loads.create_load("by_name", ["load:inner"], "s")
+    with pytest.raises(ValueError, match="included by: by_id, by_name"):
+        loads.delete("inner")
+    assert loads.get("inner")
+    loads.delete("by_id")
+    loads.delete("by_name")
+    assert loads.delete("inner")
+
+def test_sort_ids_rewrites_references(managers):
+    slots, loads = managers
+    for name in ["gone1", "gone2", "inner"]:
+        loads.create_load(name, [1], "s")
+    loads.create_load("outer", [2, "load:3"], "s")
+    loads.delete("gone1")
+    loads.delete("gone2")
+    assert loads.sort_ids() == 2
+    assert loads.get("inner")["id"] == 1
+    assert loads.get("outer")["slot_ids"] == [2, "load:1"]
+    plan = ExecutionPlan(loads, slots, loads.get("outer"))
+    assert [step.slots[0]["name"] for step in plan.steps] == ["b", "a"]
+
+def test_sort_ids_keeps_numbers_of_dangling_references(managers):
+    slots, loads = managers
+    loads.create_load("a", [1], "s")
+    loads.create_load("b", [1], "s")
+    loads.create_load("c", ["load:1"], "s")
+    with loads.store.update() as data:
+        del data["loads"]["1"]
+        del data["names"]["a"]
+    loads.sort_ids()
+    assert loads.get("b")["id"] == 2
+    assert loads.get("c")["id"] == 3
+    assert loads.get("c")["slot_ids"] == ["load:1"]
+
+def test_rename_rewrites_name_references(managers):
+    slots, loads = managers
+    loads.create_load("inner", [1], "s")
+    loads.create_load("outer", ["load:inner", 2], "s")
+    loads.edit_load("inner", name="renamed")
+    assert loads.get("outer")["slot_ids"] == ["load:renamed", 2]
+
+@pytest.mark.parametrize("free", ["delete", "compact"])
+def test_referenced_ids_are_not_reused(managers, free):
+    slots, loads = managers
+    loads.create_load("a", [1], "s")
+    loads.create_load("b", [2], "s")
+    loads.delete("a")
+    if free == "compact":
+        loads.compact()
+    # An include pointing at the freed ID, e.g. written before includes were checked
+    loads.edit_load("b", slot_ids=[2, "load:1"])
+    new_id = loads.create_load("c", [3], "s")
+    assert new_id == 3
+    assert "Load not found: 1" in loads.execute_load("b", slots)["error"]
+    
+    # The skipped ID is handed out once nothing points at it any more
+    loads.edit_load("b", slot_ids=[2])
+    assert loads.create_load("d", [4], "s") == 1
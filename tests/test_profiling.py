@@ -0,0 +1,72 @@
+import io
+import sys
+import pstats
+
+from core.profiling import Profiler, PhaseStats
+
+def test_disabled_profiler_records_nothing():
+    profiler = Profiler()
+    with profiler.phase("load"):
+        pass
+    profiler.record("spawn", 1.0)
+    assert profiler.phases == {}
+
+def test_phase_stats():
+    stats = PhaseStats()
+    for seconds in (0.5, 2.0, 1.0):
+        stats.add(seconds)
+    assert (stats.count, stats.total, stats.max) == (3, 3.5, 2.0)
+
+def test_phases_are_timed_even_when_they_raise():
+    profiler = Profiler()
+    profiler.enable()
+    try:
+        with profiler.phase("fails"):
+            raise KeyError
+    except KeyError:
+        pass
+    with profiler.phase("fails"):
+        pass
+    assert profiler.phases["fails"].count == 2
+
+def test_report_lists_slowest_first():
+    profiler = Profiler()
+    profiler.enable()
+    profiler.record("fast", 0.001)
+    profiler.record("slow", 0.250)
+    profiler.record("slow", 0.150)
+    out = io.StringIO()
+    profiler.report(out)
+    rows = [line.split() for line in out.getvalue().splitlines()[4:]]
+    assert [row[0] for row in rows] == ["slow", "fast"]
+    assert rows[0][1:] == ["2", "400.00", "200.000", "250.000"]
+
+def test_reset_forgets_timings():
+    profiler = Profiler()
+    profiler.enable()
+    profiler.record("x", 1.0)
+    profiler.reset()
+    assert profiler.phases == {}
+
+def test_cprofile_dump(tmp_path):
+    profiler = Profiler()
+    assert not profiler.dump(str(tmp_path / "none.prof"))
+    profiler.enable(cprofile=True)
+    sum(range(1000))
+    path = str(tmp_path / "run.prof")
+    assert profiler.dump(path)
+    assert pstats.Stats(path).total_calls > 0
+
+def test_echt_profile_includes_the_usage_write(monkeypatch, capfd):
+    from core import profiling
+    from core.slots import SlotManager
+    from cli.non_interactive import main
+    
+    monkeypatch.setattr(profiling.profiler, "enabled", False)
+    monkeypatch.setattr(profiling.profiler, "phases", {})
+    SlotManager().create("true", "quick")
+    monkeypatch.setattr(sys, "argv", ["echt", "--profile", "run", "quick"])
+    assert main() == 0
+    phases = [line.split()[0] for line in capfd.readouterr().err.splitlines()[4:] if line.strip()]
+    assert "usage.write" in phases
+    assert SlotManager().find_by_name("quick")["usage_count"] == 1
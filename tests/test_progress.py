@@ -0,0 +1,77 @@
+import io
+
+from cli.progress import ProgressDashboard, progress_dashboard, supports, _size, _duration, RESET
+
+class Terminal(io.StringIO):
+    """Output stream that claims to be a terminal"""
+    
+    def isatty(self):
+        return True
+
+def test_size_and_duration():
+    assert _size(900) == "900B"
+    assert _size(1536) == "1.5KB"
+    assert _size(3 * 1024 ** 3) == "3.0GB"
+    assert _duration(None) == "-"
+    assert _duration(4.25) == "4.2s"
+    assert _duration(125) == "2m05s"
+
+def test_supports_only_flat_parallel_loads():
+    assert supports({"mode": "parallel", "slot_ids": [1, 2]})
+    assert not supports({"mode": "serial", "slot_ids": [1, 2]})
+    assert not supports({"mode": "parallel", "slot_ids": [1, "load:inner"]})
+    assert progress_dashboard(None) is None
+    assert progress_dashboard({"name": "web", "mode": "pipe", "slot_ids": [1]}) is None
+    assert progress_dashboard({"name": "web", "mode": "parallel", "slot_ids": [1]}).title == "web"
+
+def dashboard_with_rows():
+    dashboard = ProgressDashboard("scan", io.StringIO())
+    for step, name in enumerate(["done", "failed", "running", "queued"], 1):
+        dashboard.queued(step, {"name": name})
+    for step, returncode in [(1, 0), (2, 1), (3, None)]:
+        dashboard.started(step, f"command {step}")
+        dashboard.output(1024)
+        if returncode is not None:
+            dashboard.finished(step, returncode)
+    return dashboard
+
+def test_hooks_move_rows_through_states():
+    dashboard = dashboard_with_rows()
+    assert [(row.name, row.state) for row in dashboard.rows] == [
+        ("done", "done"), ("failed", "failed"), ("running", "running"), ("queued", "queued")
+    ]
+    assert [row.bytes for row in dashboard.rows] == [1024, 1024, 1024, 0]
+    assert list(dashboard.waiting) == [4]
+
+def test_summary_counts_and_eta():
+    dashboard = dashboard_with_rows()
+    line = dashboard.summary(dashboard.began + 10)
+    assert line.startswith("[*] scan: 2/4 finished, 1 failed, 1 running | 0.2 cmd/s, 307B/s | 3.0KB | 10.0s elapsed")
+    assert line.endswith(", ETA 10.0s")
+
+def test_table_orders_by_state_and_caps_rows():
+    dashboard = dashboard_with_rows()
+    lines = dashboard.table(dashboard.began + 10, 3)
+    assert [line.replace(RESET, "").split()[1] for line in lines[1:4]] == ["running", "failed", "done"]
+    assert lines[-1] == "  ... 1 more"
+
+def test_terminal_draw_prints_log_above_and_redraws_in_place():
+    stream = Terminal()
+    dashboard = ProgressDashboard("scan", stream)
+    assert dashboard.context.output is dashboard
+    dashboard.queued(1, {"name": "probe"})
+    dashboard.write("first line")
+    dashboard.draw()
+    first = stream.getvalue()
+    assert first.startswith("first line\n[*] scan: 0/1 finished")
+    dashboard.draw()
+    assert stream.getvalue()[len(first):].startswith(f"\033[{dashboard.drawn}F\033[J[*] scan")
+
+def test_plain_stream_gets_a_final_status_line():
+    stream = io.StringIO()
+    dashboard = ProgressDashboard("scan", stream)
+    assert dashboard.context.output is None
+    dashboard.start()
+    dashboard.stop()
+    assert stream.getvalue().startswith("[*] scan: 0/0 finished")
+    assert not dashboard.thread.is_alive()
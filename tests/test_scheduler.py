@@ -0,0 +1,115 @@
+import time
+import threading
+
+from core.scheduler import Scheduler, Throttle, TokenBucket, group_key, INTERACTIVE, BULK
+from core.executor import CommandExecutor, RunContext
+
+def hold(scheduler):
+    """Occupy the scheduler's only worker until the returned event is set"""
+    release = threading.Event()
+    started = threading.Event()
+    def blocker():
+        started.set()
+        release.wait(5)
+    future = scheduler.flow("blocker").submit(blocker)
+    started.wait(5)
+    return release, future
+
+def test_interactive_work_runs_before_bulk():
+    scheduler = Scheduler(max_workers=1)
+    release, blocker = hold(scheduler)
+    order = []
+    bulk = scheduler.flow("bulk", priority=BULK)
+    interactive = scheduler.flow("interactive", priority=INTERACTIVE)
+    futures = [bulk.submit(order.append, f"b{i}") for i in range(2)]
+    futures += [interactive.submit(order.append, f"i{i}") for i in range(2)]
+    release.set()
+    for future in [blocker] + futures:
+        future.result(5)
+    assert order == ["i0", "i1", "b0", "b1"]
+
+def test_flows_of_equal_weight_take_turns():
+    scheduler = Scheduler(max_workers=1)
+    release, blocker = hold(scheduler)
+    order = []
+    def work(name):
+        order.append(name)
+        time.sleep(0.01)
+    flows = [scheduler.flow("a"), scheduler.flow("b")]
+    futures = [flow.submit(work, flow.name) for _ in range(3) for flow in flows]
+    release.set()
+    for future in [blocker] + futures:
+        future.result(5)
+    assert sorted(order[:2]) == ["a", "b"]
+    assert sorted(order[2:4]) == ["a", "b"]
+
+def test_per_key_limit_caps_concurrency():
+    scheduler = Scheduler(max_workers=4)
+    flow = scheduler.flow("run", throttle=Throttle("@target", per_key=1))
+    lock = threading.Lock()
+    active = [0, 0]
+    def work():
+        with lock:
+            active[0] += 1
+            active[1] = max(active)
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+    futures = [flow.submit_keyed("host", work) for _ in range(4)]
+    other = flow.submit_keyed("other", lambda: "free")
+    assert other.result(5) == "free"
+    for future in futures:
+        future.result(5)
+    assert active[1] == 1
+
+def test_token_bucket_refills_at_rate_up_to_burst():
+    bucket = TokenBucket(rate=2, burst=2)
+    now = bucket.updated
+    assert bucket.wait_time(now) == 0.0
+    bucket.take(now)
+    bucket.take(now)
+    assert bucket.wait_time(now) == 0.5
+    assert abs(bucket.wait_time(now + 0.25) - 0.25) < 1e-9
+    assert bucket.wait_time(now + 10) == 0.0
+    assert bucket.tokens == 2
+
+def test_rate_limit_spaces_starts():
+    scheduler = Scheduler(max_workers=4)
+    flow = scheduler.flow("run", throttle=Throttle("@target", rate=20, burst=1))
+    starts = []
+    futures = [flow.submit_keyed("host", lambda: starts.append(time.monotonic())) for _ in range(3)]
+    for future in futures:
+        future.result(5)
+    assert starts[2] - starts[0] >= 0.09
+
+def test_finished_flows_leave_no_idle_keys_behind():
+    scheduler = Scheduler(max_workers=4)
+    flow = scheduler.flow("run", throttle=Throttle("@target", rate=1000, burst=1))
+    futures = [flow.submit_keyed(f"10.0.0.{i}", time.sleep, 0.01) for i in range(5)]
+    for future in futures:
+        future.result(5)
+    time.sleep(0.05)
+    # The next flow to finish sweeps the buckets the first one left to refill
+    scheduler.flow("next").submit(lambda: None).result(5)
+    deadline = time.monotonic() + 5
+    while scheduler.flows and time.monotonic() < deadline:
+        time.sleep(0.01)
+    with scheduler.cond:
+        assert scheduler.key_active == {} and scheduler.buckets == {}
+
+def test_group_key():
+    assert group_key("@target", {"target": "example.org"}) == "example.org"
+    assert group_key("@target/24", {"target": "10.0.0.7"}) == "10.0.0.0/24"
+    assert group_key("@target/24", {"target": "example.org"}) == "example.org"
+    assert group_key("@target", {}) is None
+    assert group_key(None, {"target": "x"}) is None
+
+def test_run_goes_through_shared_pool(tmp_path):
+    threads = []
+    with open(tmp_path / "out.log", "w") as out:
+        context = RunContext(output=out)
+        result = CommandExecutor.run("echo pooled", context,
+                                     on_line=lambda line: threads.append(threading.current_thread().name))
+    assert result["success"]
+    assert "pooled" in (tmp_path / "out.log").read_text()
+    assert threads[0].startswith("echtable-worker")
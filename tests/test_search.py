@@ -0,0 +1,57 @@
+from core.search import SlotIndex, tokenize
+from core.slots import SlotManager
+
+def slot(slot_id, name, command):
+    return {"id": slot_id, "name": name, "command": command}
+
+def ranked(index, query):
+    return [slot_id for score, slot_id in index.search(query)]
+
+def test_tokenize_adds_variable_tokens():
+    assert tokenize("nmap -sV @Target") == ["nmap", "sv", "target", "@target"]
+
+def test_slots_matching_more_terms_rank_first():
+    index = SlotIndex()
+    index.add(slot(1, "ping", "ping -c 1 host"))
+    index.add(slot(2, "scan", "nmap -p 80 host"))
+    index.add(slot(3, "web", "curl http://host:80/"))
+    assert ranked(index, "nmap 80")[0] == 2
+    assert set(ranked(index, "host")) == {1, 2, 3}
+    assert ranked(index, "missing") == []
+
+def test_name_matches_outrank_command_matches():
+    index = SlotIndex()
+    index.add(slot(1, "other", "dig dns"))
+    index.add(slot(2, "dns", "dig other"))
+    assert ranked(index, "dns") == [2, 1]
+
+def test_readding_and_removing_keep_index_consistent():
+    index = SlotIndex()
+    index.add(slot(1, "a", "echo one"))
+    index.add(slot(1, "a", "echo two"))
+    assert ranked(index, "one") == []
+    assert ranked(index, "two") == [1]
+    index.remove(1)
+    assert index.postings == {}
+    assert index.total_length == 0
+
+def test_variable_values_are_searchable_and_follow_changes():
+    index = SlotIndex({"target": "example.org"})
+    index.add(slot(1, "scan", "nmap @target"))
+    assert ranked(index, "example") == [1]
+    assert ranked(index, "@target") == [1]
+    index.set_variable("target", "internal.lan")
+    assert ranked(index, "example") == []
+    assert ranked(index, "internal") == [1]
+    index.set_variable("target", None)
+    assert ranked(index, "internal") == []
+
+def test_slot_manager_search_skips_deleted_slots():
+    slots = SlotManager()
+    slots.create("nmap host", "scan")
+    slots.create("nmap -sU host", "udp")
+    slots.delete("scan")
+    assert [entry["name"] for entry in slots.search("nmap")] == ["udp"]
+    slots.variables.set("port", "8443")
+    slots.create("curl host:@port", "web")
+    assert [entry["name"] for entry in slots.search("8443")] == ["web"]
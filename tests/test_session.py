@@ -0,0 +1,136 @@
+import time
+import threading
+
+import pytest
+
+from core.session import Session, merge3, renumber_added
+from core.slots import SlotManager
+from core.loads import LoadManager
+
+def test_merge3_takes_changes_from_both_sides():
+    base = {"a": 1, "b": 1, "c": 1}
+    ours = {"a": 2, "b": 1, "c": 1}
+    theirs = {"a": 1, "b": 3}
+    merged, conflicts = merge3(base, ours, theirs)
+    assert merged == {"a": 2, "b": 3}
+    assert conflicts == []
+
+def test_merge3_nested_conflict_keeps_local_edit():
+    base = {"1": {"name": "x", "command": "ls"}}
+    ours = {"1": {"name": "mine", "command": "ls"}}
+    theirs = {"1": {"name": "theirs", "command": "ls -la"}}
+    merged, conflicts = merge3(base, ours, theirs)
+    assert merged == {"1": {"name": "mine", "command": "ls -la"}}
+    assert conflicts == ["1.name"]
+
+def test_merge3_added_on_both_sides():
+    merged, conflicts = merge3({}, {"1": "a"}, {"2": "b"})
+    assert merged == {"1": "a", "2": "b"}
+    assert conflicts == []
+
+def test_update_writes_behind_and_merges_outside_changes():
+    session = Session()
+    slots = SlotManager(session=session)
+    slots.create("echo one", "one")
+    assert SlotManager().list_all() == []
+    
+    session.sync()
+    SlotManager().create("echo two", "two")
+    session.sync()
+    assert sorted(slot["name"] for slot in slots.list_all()) == ["one", "two"]
+
+def test_update_rolls_back_when_body_raises():
+    session = Session()
+    slots = SlotManager(session=session)
+    slots.create("echo one", "one")
+    
+    with pytest.raises(RuntimeError):
+        with slots.store.update() as data:
+            data["1"]["name"] = "half"
+            raise RuntimeError("boom")
+    
+    assert slots.get(1)["name"] == "one"
+
+def test_read_data_is_never_modified_in_place():
+    session = Session()
+    slots = SlotManager(session=session)
+    slots.create("echo one", "one")
+    before = slots.store.read()
+    snapshot = dict(before)
+    
+    slots.create("echo two", "two")
+    session.sync()
+    SlotManager().create("echo three", "three")
+    session.sync()
+    
+    assert before == snapshot
+    assert len(slots.store.read()) == 3
+
+def test_readers_survive_concurrent_writes_and_flushes():
+    session = Session(flush_interval=0.001)
+    slots = SlotManager(session=session)
+    session.start()
+    stop = threading.Event()
+    errors = []
+    
+    def write():
+        other = SlotManager()
+        i = 0
+        while not stop.is_set():
+            other.create(f"echo {i}", f"outside_{i}")
+            slots.create(f"echo {i}", f"inside_{i}")
+            i += 1
+    
+    writer = threading.Thread(target=write)
+    writer.start()
+    deadline = time.monotonic() + 1.0
+    try:
+        while time.monotonic() < deadline and not errors:
+            try:
+                slots.list_all()
+            except RuntimeError as e:
+                errors.append(e)
+    finally:
+        stop.set()
+        writer.join()
+        session.close()
+    assert errors == []
+
+def test_records_created_concurrently_keep_their_own_ids():
+    session = Session()
+    slots = SlotManager(session=session)
+    loads = LoadManager(session=session)
+    slots.create("echo base", "base")
+    loads.create_load("base", [1], "s")
+    session.sync()
+    
+    outside_slots, outside_loads = SlotManager(), LoadManager()
+    outside_slots.create("echo outside", "from_echt")
+    outside_loads.create_load("from_echt", [2], "s")
+    slots.create("echo inside", "from_framework")
+    loads.create_load("from_framework", [2], "s")
+    loads.create_load("outer", ["load:2"], "s")
+    session.sync()
+    
+    assert sorted(slot["name"] for slot in SlotManager().list_all()) == ["base", "from_echt", "from_framework"]
+    disk = LoadManager()
+    assert disk.get("from_echt")["slot_ids"] == [2]
+    moved = disk.get("from_framework")
+    assert moved["id"] == 4
+    assert moved["slot_ids"] == [3]
+    assert SlotManager().get(3)["name"] == "from_framework"
+    assert disk.get("outer")["slot_ids"] == ["load:4"]
+    assert disk.store.read()["names"] == {"base": "1", "from_echt": "2", "outer": "3", "from_framework": "4"}
+    assert loads.get("from_echt")["id"] == 2
+    warnings = session.drain_warnings()
+    assert "ID 2 in loads.json was taken concurrently; this session's record is now 4" in warnings
+    assert any(warning.startswith("ID 2 in slots.json") for warning in warnings)
+
+def test_renumber_added_leaves_edits_alone():
+    base = {"1": {"id": 1, "name": "a"}, "2": {"id": 2, "deleted": True}}
+    ours = {"1": {"id": 1, "name": "mine"}, "2": {"id": 2, "name": "new"}}
+    theirs = {"1": {"id": 1, "name": "theirs"}, "2": {"id": 2, "name": "other"}}
+    moved_ours, moved = renumber_added(base, ours, theirs)
+    assert moved == [("2", "3")]
+    assert moved_ours == {"1": {"id": 1, "name": "mine"}, "3": {"id": 3, "name": "new"}}
+    assert "2" in ours
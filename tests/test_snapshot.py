@@ -0,0 +1,52 @@
+import os
+import json
+import marshal
+
+from core import snapshot
+from core.storage import JsonStore
+
+def write_json(path, data):
+    with open(path, "w") as f:
+        json.dump(data, f)
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "slots.json")
+    data = {"1": {"id": 1, "name": "a", "command": "echo a"}}
+    write_json(path, data)
+    snapshot.save(path, data)
+    assert os.path.exists(snapshot.snapshot_path(path))
+    assert snapshot.load(path) == data
+
+def test_snapshot_of_older_json_is_ignored(tmp_path):
+    path = str(tmp_path / "slots.json")
+    write_json(path, {"a": 1})
+    snapshot.save(path, {"a": 1})
+    write_json(path, {"a": 1, "b": 2})
+    assert snapshot.load(path) is None
+
+def test_snapshot_from_other_format_is_ignored(tmp_path):
+    path = str(tmp_path / "slots.json")
+    write_json(path, {})
+    with open(snapshot.snapshot_path(path), "wb") as f:
+        marshal.dump((("echtable-snapshot", 0, (2, 7)), snapshot.json_signature(path), {"old": 1}), f)
+    assert snapshot.load(path) is None
+
+def test_damaged_snapshot_is_ignored(tmp_path):
+    path = str(tmp_path / "slots.json")
+    write_json(path, {})
+    with open(snapshot.snapshot_path(path), "wb") as f:
+        f.write(b"\x00garbage")
+    assert snapshot.load(path) is None
+
+def test_store_keeps_snapshot_in_step_with_json(write_config, tmp_path):
+    write_config(binary_snapshot=True)
+    path = str(tmp_path / "store.json")
+    store = JsonStore(path)
+    with store.update() as data:
+        data["x"] = 1
+    assert snapshot.load(path) == {"x": 1}
+
+    with store.update() as data:
+        data["y"] = 2
+    assert snapshot.load(path) == {"x": 1, "y": 2}
+    assert JsonStore(path).read() == {"x": 1, "y": 2}
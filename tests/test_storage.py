@@ -0,0 +1,60 @@
+import os
+import stat
+import threading
+
+from core import utils
+from core.utils import atomic_write_json, file_mode
+from core.storage import JsonStore
+from core.slots import SlotManager
+
+def mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+def test_atomic_write_keeps_existing_permissions(tmp_path):
+    path = str(tmp_path / "data.json")
+    with open(path, "w") as f:
+        f.write("{}")
+    os.chmod(path, 0o640)
+    atomic_write_json(path, {"a": 1})
+    assert mode(path) == 0o640
+
+def test_atomic_write_new_file_follows_umask(tmp_path):
+    path = str(tmp_path / "new.json")
+    atomic_write_json(path, {})
+    assert mode(path) == 0o666 & ~utils.UMASK
+    assert file_mode(path) == mode(path)
+
+def test_atomic_write_leaves_no_temp_files(tmp_path):
+    path = str(tmp_path / "data.json")
+    for i in range(3):
+        atomic_write_json(path, {"i": i})
+    assert sorted(os.listdir(tmp_path)) == ["data.json"]
+
+def test_concurrent_updates_are_not_lost(tmp_path):
+    path = str(tmp_path / "counter.json")
+    JsonStore(path)
+    
+    def bump():
+        store = JsonStore(path)
+        for _ in range(25):
+            with store.update() as data:
+                data["count"] = data.get("count", 0) + 1
+    
+    threads = [threading.Thread(target=bump) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert JsonStore(path).read()["count"] == 100
+
+def test_usage_is_batched_until_flush():
+    slots = SlotManager()
+    slot_id = slots.create("echo hi", "hi")
+    for _ in range(3):
+        assert slots.prepare_command(slot_id) == "echo hi"
+    
+    assert SlotManager().get(slot_id)["usage_count"] == 0
+    slots.flush_usage()
+    record = SlotManager().get(slot_id)
+    assert record["usage_count"] == 3
+    assert record["last_used"] is not None
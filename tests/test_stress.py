@@ -0,0 +1,44 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from stress import parse_mix, percentile, build_commands, workload_command, format_table, run_workload
+
+def test_parse_mix():
+    assert parse_mix("tiny=200, sleep=8") == [("tiny", 200), ("sleep", 8)]
+    with pytest.raises(ValueError):
+        parse_mix("tiny")
+    with pytest.raises(ValueError):
+        parse_mix("tiny=lots")
+
+def test_percentile_is_nearest_rank():
+    samples = list(range(1, 101))
+    assert percentile(samples, 0.50) == 51
+    assert percentile(samples, 0.99) == 100
+    assert percentile(samples, 1.0) == 100
+    assert percentile([7], 0.99) == 7
+    assert percentile([], 0.5) is None
+
+def test_build_commands_is_shuffled_reproducibly():
+    mix = [("tiny", 5), ("sleep", 3)]
+    commands = build_commands(mix, 1, 0.5, seed=1)
+    assert sorted(commands) == sorted([":"] * 5 + ["sleep 0.5"] * 3)
+    assert commands == build_commands(mix, 1, 0.5, seed=1)
+    with pytest.raises(ValueError):
+        workload_command("huge", 1, 0.5)
+
+def test_format_table_shows_missing_values_as_dashes():
+    record = {"mode": "plain", "workers": 4, "completed": 10, "wall_s": 1.234, "throughput": 8.1,
+              "p50_ms": 2.0, "p99_ms": None, "peak_rss_mb": 20.5, "peak_fds": None, "drain_s": None}
+    header, rule, row = format_table([record])
+    assert len(rule) == len(header) == len(row)
+    assert row.split() == ["plain", "4", "10", "1.23", "8.1", "2.0", "-", "20.5", "-", "-"]
+
+@pytest.mark.parametrize("mode", ["capture", "stream", "plain"])
+def test_run_workload(mode):
+    record = run_workload(mode, 2, [":"] * 4 + ["exit 1"])
+    assert (record["commands"], record["completed"], record["failed"]) == (5, 5, 1)
+    assert record["p50_ms"] is not None and record["drain_s"] is None
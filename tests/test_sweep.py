@@ -0,0 +1,65 @@
+import pytest
+
+from core.sweep import parse_sweep, combinations, count_combinations, format_table
+from core.executor import RunContext
+from core.slots import SlotManager
+from core.loads import LoadManager
+
+def test_parse_sweep_from_list_and_file(tmp_path):
+    assert parse_sweep("@port=80, 443,") == ("port", ["80", "443"])
+    hosts = tmp_path / "hosts.txt"
+    hosts.write_text("# targets\na.example\n\nb.example\n")
+    assert parse_sweep(f"target={hosts}") == ("target", ["a.example", "b.example"])
+
+@pytest.mark.parametrize("spec", ["@port", "=1,2", "@port=", "@port=,"])
+def test_parse_sweep_rejects_bad_specs(spec):
+    with pytest.raises(ValueError):
+        parse_sweep(spec)
+
+def test_combinations_are_lazy_and_counted():
+    sweeps = [("host", ["a", "b"]), ("port", ["1", "2", "3"])]
+    combos = combinations(sweeps)
+    assert next(combos) == {"host": "a", "port": "1"}
+    assert len(list(combos)) == 5
+    assert count_combinations(sweeps) == 6
+    assert count_combinations([]) == 1
+
+def test_format_table_aligns_columns():
+    rows = [{"values": {"host": "a.example"}, "ok": 2, "failed": 0, "elapsed": 1.25}]
+    lines = format_table(rows, ["host"])
+    assert lines[0].split() == ["@host", "OK", "Failed", "Time"]
+    assert set(lines[1]) == {"-"}
+    assert lines[2].split() == ["a.example", "2", "0", "1.2s"]
+
+def run_log(tmp_path):
+    return open(tmp_path / "run.log", "w")
+
+def test_sweep_rows_come_back_in_sweep_order(tmp_path):
+    slots = SlotManager()
+    slots.create("sleep 0.0@delay; echo @host", "probe")
+    slots.create("test @host != b", "check")
+    loads = LoadManager()
+    loads.create_load("scan", [1, 2], "s")
+    sweeps = [("host", ["a", "b", "c"]), ("delay", ["3", "1"])]
+    with run_log(tmp_path) as out:
+        result = loads.sweep_load("scan", slots, sweeps, context=RunContext(output=out), max_workers=4)
+    assert result["success"]
+    assert [row["values"] for row in result["rows"]] == list(combinations(sweeps))
+    assert [row["failed"] for row in result["rows"]] == [0, 0, 1, 1, 0, 0]
+    assert slots.get(1)["usage_count"] == 6
+
+@pytest.mark.parametrize("mode", ["s", "p", "pipe"])
+def test_flat_loads_write_usage_once(tmp_path, monkeypatch, mode):
+    slots = SlotManager()
+    slots.create("echo one", "one")
+    slots.create("cat", "two")
+    loads = LoadManager()
+    loads.create_load("flat", [1, 2], mode)
+    writes = []
+    record_usage = slots.record_usage
+    monkeypatch.setattr(slots, "record_usage", lambda counts: writes.append(dict(counts)) or record_usage(counts))
+    monkeypatch.setattr(slots, "_increment_usage", lambda slot_id: pytest.fail("usage counted per slot"))
+    with run_log(tmp_path) as out:
+        assert loads.execute_load("flat", slots, context=RunContext(output=out))["success"]
+    assert writes == [{1: 1, 2: 1}]
+    assert [slots.get(slot_id)["usage_count"] for slot_id in (1, 2)] == [1, 1]
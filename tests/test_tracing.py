@@ -0,0 +1,93 @@
+import io
+import json
+import threading
+
+import pytest
+
+from core.tracing import Tracer
+from core.executor import RunContext
+from core.slots import SlotManager
+from core.loads import LoadManager
+from cli.progress import ProgressDashboard
+
+def test_spans_and_instants_land_on_per_thread_tracks():
+    tracer = Tracer("scan")
+    tracer.span("main", 0, 10)
+    thread = threading.Thread(target=tracer.instant, args=("exit",), kwargs={"returncode": 0})
+    thread.start()
+    thread.join()
+    names = [event for event in tracer.events if event["ph"] == "M"]
+    assert [event["tid"] for event in names] == [1, 2]
+    span, instant = [event for event in tracer.events if event["ph"] != "M"]
+    assert (span["ts"], span["dur"], span["tid"]) == (0, 10, 1)
+    assert (instant["tid"], instant["args"]) == (2, {"returncode": 0})
+
+def test_output_lines_are_merged_into_bursts():
+    tracer = Tracer()
+    for size in (10, 20, 30):
+        tracer.output(size)
+    tracer.flush_output()
+    bursts = [event for event in tracer.events if event["name"] == "output"]
+    assert len(bursts) == 1
+    assert bursts[0]["args"] == {"lines": 3, "bytes": 60}
+
+def test_queue_waits_are_async_pairs():
+    tracer = Tracer()
+    tracer.queued(tracer.origin, tracer.origin + 0.5)
+    begin, end = [event for event in tracer.events if event.get("cat") == "queue"]
+    assert (begin["ph"], end["ph"]) == ("b", "e")
+    assert begin["id"] == end["id"]
+    assert end["ts"] - begin["ts"] == pytest.approx(5e5)
+
+def test_written_trace_is_valid_json(tmp_path):
+    tracer = Tracer("scan")
+    tracer.span("main", 0)
+    path = str(tmp_path / "trace.json")
+    tracer.write(path)
+    with open(path) as f:
+        trace = json.load(f)
+    assert trace["traceEvents"][0]["args"] == {"name": "echtable scan"}
+
+class Recorder:
+    """Run history stand-in"""
+    
+    def __init__(self):
+        self.slots = []
+    
+    def command(self, slot, load, returncode, duration, output_bytes=None, output=None):
+        self.slots.append(slot["name"])
+    
+    def run_finished(self, load, elapsed):
+        pass
+    
+    def flush(self):
+        pass
+
+@pytest.mark.parametrize("mode", ["s", "p", "pipe"])
+def test_identical_commands_keep_their_own_slot(tmp_path, mode):
+    slots = SlotManager()
+    slots.create("echo same", "first")
+    slots.create("echo same", "second")
+    loads = LoadManager()
+    loads.create_load("twins", [1, 2], mode)
+    history = Recorder()
+    with open(tmp_path / "run.log", "w") as out:
+        context = RunContext(output=out, history=history)
+        assert loads.execute_load("twins", slots, context=context)["success"]
+    assert sorted(history.slots) == ["first", "second"]
+    assert context.labels == {}
+
+def test_progress_rows_follow_their_own_step(tmp_path):
+    slots = SlotManager()
+    slots.create("sleep 0.2; echo same", "slow")
+    slots.create("sleep 0.2; echo same", "twin")
+    slots.create("exit 1", "broken")
+    loads = LoadManager()
+    loads.create_load("twins", [1, 2, 3], "p")
+    dashboard = ProgressDashboard("twins", io.StringIO())
+    with open(tmp_path / "run.log", "w") as out:
+        dashboard.context.output = out
+        loads.execute_load("twins", slots, context=dashboard.context)
+    states = {row.name: row.state for row in dashboard.rows}
+    assert states == {"slow": "done", "twin": "done", "broken": "failed"}
+    assert dashboard.waiting == {}